@@ -0,0 +1,149 @@
+import hashlib
+import random
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+#Clause alignment for compare_contracts. Each clause is tokenized once into a
+#set, summarised by a MinHash signature and bucketed with LSH banding; exact
+#Jaccard is only computed for pairs that share a bucket. Signatures are built
+#from content terms only, minus terms that occur in a large share of the two
+#documents' clauses ("party", "agreement", ...): terms shared by nearly every
+#clause would put most pairs in a common bucket. Hashing and the bucket join are
+#vectorised, and each clause keeps only its MAX_CANDIDATES pairs sharing the
+#most bands, so scoring stays linear even in documents full of near-duplicates.
+
+NUM_PERM = 80
+BANDS = 16
+ROWS = NUM_PERM // BANDS # 5 rows: pairs below ~0.45 content-term Jaccard rarely collide
+MATCH_THRESHOLD = 0.3
+EXACT_LIMIT = 2500 # below n*m pairs, brute force is cheaper than hashing
+COMMON_TERM_SHARE = 0.1 # terms in more of the clauses than this are not blocking keys
+MAX_CANDIDATES = 16 # pairs scored per clause of the first document
+
+_rng = random.Random(0xC1A05E)
+# Token hashes are already uniform 64-bit values, so XOR with a random mask is
+# a cheap stand-in for a full (a*x + b) mod p permutation
+_MASKS = np.array([_rng.getrandbits(64) for _ in range(NUM_PERM)], dtype=np.uint64)
+# Odd multipliers folding a band's ROWS minima into one 64-bit bucket key
+_FOLD = np.array([_rng.getrandbits(64) | 1 for _ in range(ROWS)], dtype=np.uint64)
+# Per-band salt so equal keys in different bands land in different buckets
+_BAND_SALT = np.array([_rng.getrandbits(64) for _ in range(BANDS)], dtype=np.uint64)
+SIGNATURE_BLOCK = 1 << 16 # tokens per (tokens x NUM_PERM) temporary, about 32 MB
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+def _token_hash(t: str, memo: Dict[str, int]) -> int:
+    h = memo.get(t)
+    if h is None:
+        h = int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little")
+        memo[t] = h
+    return h
+
+def signatures(sets: Sequence[FrozenSet[str]], memo: Dict[str, int]) -> np.ndarray:
+    # (len(sets), NUM_PERM) MinHash signatures of non-empty sets, in blocks of about SIGNATURE_BLOCK tokens
+    out = np.empty((len(sets), NUM_PERM), dtype=np.uint64)
+    i = 0
+    while i < len(sets):
+        j, tokens = i, 0
+        while j < len(sets) and (j == i or tokens + len(sets[j]) <= SIGNATURE_BLOCK):
+            tokens += len(sets[j])
+            j += 1
+        flat = np.fromiter((_token_hash(t, memo) for s in sets[i:j] for t in s), dtype=np.uint64, count=tokens)
+        starts = np.cumsum([0] + [len(s) for s in sets[i:j - 1]])
+        out[i:j] = np.minimum.reduceat(flat[:, None] ^ _MASKS[None, :], starts, axis=0)
+        i = j
+    return out
+
+def band_keys(sig: np.ndarray) -> np.ndarray:
+    # (len(sig), BANDS) bucket keys; uint64 arithmetic wraps, which is all a hash needs
+    return (sig.reshape(len(sig), BANDS, ROWS) * _FOLD).sum(axis=2, dtype=np.uint64)
+
+def candidate_pairs(sets_a: Sequence[FrozenSet[str]], sets_b: Sequence[FrozenSet[str]]) -> Set[Tuple[int, int]]:
+    # sets_* are the blocking keys (content terms), not necessarily the sets compared afterwards
+    if len(sets_a) * len(sets_b) <= EXACT_LIMIT:
+        return {(i, j) for i in range(len(sets_a)) for j in range(len(sets_b))}
+    df: Dict[str, int] = {}
+    for s in sets_a:
+        for t in s:
+            df[t] = df.get(t, 0) + 1
+    for s in sets_b:
+        for t in s:
+            df[t] = df.get(t, 0) + 1
+    limit = COMMON_TERM_SHARE * (len(sets_a) + len(sets_b))
+    common = {t for t, n in df.items() if n > limit}
+    # Clauses left without keys would all share one bucket; identical clauses are paired by align_clauses
+    keys_a = [(i, s - common) for i, s in enumerate(sets_a)]
+    keys_b = [(j, s - common) for j, s in enumerate(sets_b)]
+    keys_a = [(i, s) for i, s in keys_a if s]
+    keys_b = [(j, s) for j, s in keys_b if s]
+    if not keys_a or not keys_b:
+        return set()
+    memo: Dict[str, int] = {}
+    rows_a = np.repeat(np.array([i for i, _ in keys_a], dtype=np.int64), BANDS)
+    rows_b = np.repeat(np.array([j for j, _ in keys_b], dtype=np.int64), BANDS)
+    flat_a = (band_keys(signatures([s for _, s in keys_a], memo)) ^ _BAND_SALT).ravel()
+    flat_b = (band_keys(signatures([s for _, s in keys_b], memo)) ^ _BAND_SALT).ravel()
+    # Bucket join: sort b's keys once, find each a key's run of equal keys
+    order = np.argsort(flat_b, kind="stable")
+    flat_b, rows_b = flat_b[order], rows_b[order]
+    lo = np.searchsorted(flat_b, flat_a, side="left")
+    counts = np.searchsorted(flat_b, flat_a, side="right") - lo
+    total = int(counts.sum())
+    if not total:
+        return set()
+    ends = np.cumsum(counts)
+    at = np.arange(total) - np.repeat(ends - counts, counts) + np.repeat(lo, counts)
+    codes, shared = np.unique(np.repeat(rows_a, counts) * len(sets_b) + rows_b[at], return_counts=True)
+    left = codes // len(sets_b)
+    # Bands shared estimate similarity: keep each clause's MAX_CANDIDATES best, most shared bands first
+    order = np.lexsort((-shared, left))
+    left, codes = left[order], codes[order]
+    first = np.searchsorted(left, left, side="left")
+    keep = np.arange(len(left)) - first < MAX_CANDIDATES
+    return set(zip(left[keep].tolist(), (codes[keep] % len(sets_b)).tolist()))
+
+def align_clauses(sets_a: Sequence[FrozenSet[str]], sets_b: Sequence[FrozenSet[str]],
+                  keys_a: Optional[Sequence[FrozenSet[str]]] = None,
+                  keys_b: Optional[Sequence[FrozenSet[str]]] = None) -> Dict[str, Any]:
+    # Similarity is exact Jaccard over sets_*; keys_* (default: the sets) only choose which pairs are scored
+    sims: Dict[Tuple[int, int], float] = {}
+    # Identical clauses pair up directly, whatever the bucket sizes
+    by_set: Dict[FrozenSet[str], List[int]] = {}
+    for j, s in enumerate(sets_b):
+        by_set.setdefault(s, []).append(j)
+    for i, s in enumerate(sets_a):
+        for j in by_set.get(s, ()):
+            sims[(i, j)] = 1.0
+    for i, j in candidate_pairs(sets_a if keys_a is None else keys_a, sets_b if keys_b is None else keys_b):
+        if (i, j) not in sims:
+            sims[(i, j)] = jaccard(sets_a[i], sets_b[j])
+
+    best: List[Tuple[float, int]] = [(0.0, -1)] * len(sets_a)
+    for (i, j), sim in sims.items():
+        if sim > best[i][0] or (sim == best[i][0] and best[i][1] != -1 and j < best[i][1]):
+            best[i] = (sim, j)
+
+    # Greedy one-to-one matching, most similar pairs first
+    matched: List[Dict[str, Any]] = []
+    used_a: Set[int] = set()
+    used_b: Set[int] = set()
+    for (i, j), sim in sorted(sims.items(), key=lambda kv: (-kv[1], kv[0])):
+        if sim < MATCH_THRESHOLD:
+            break
+        if i in used_a or j in used_b:
+            continue
+        used_a.add(i)
+        used_b.add(j)
+        matched.append({"a": i, "b": j, "similarity": round(sim, 3), "status": "unchanged" if sim == 1.0 else "modified"})
+    matched.sort(key=lambda m: m["a"])
+    return {
+        "best": best,
+        "matched": matched,
+        "removed": [i for i in range(len(sets_a)) if i not in used_a],
+        "added": [j for j in range(len(sets_b)) if j not in used_b],
+    }
@@ -0,0 +1,224 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.cache import ANALYSIS_CACHE, MISSING, content_digest
+from backend.pipeline import in_executor
+from backend.utils import (
+    DocumentIndex, classify_contract, find_entities_regex, risk_hits, risk_labels,
+    summarize_extract, upcoming_alerts,
+)
+
+#Bulk analysis jobs (POST /analyze/batch). The pure-Python analyzers run on a
+#process pool, one document per task, so they scale with cores instead of
+#sharing the server's GIL; Granite/NLU calls run afterwards as async requests
+#for at most BATCH_IO_WORKERS documents at a time, so remote rate limits do not
+#stall local work. Results are
+#appended to the job as items finish and can be streamed while it runs.
+#Uploads and archive members are checked against the BATCH_MAX_* limits before
+#anything is decompressed, so a zip bomb is rejected from its central directory.
+
+BATCH_PROCESSES = int(os.getenv("CLAUSEWISE_BATCH_PROCESSES", str(os.cpu_count() or 2)))
+BATCH_IO_WORKERS = int(os.getenv("CLAUSEWISE_BATCH_IO_WORKERS", "8"))
+MAX_JOBS = int(os.getenv("CLAUSEWISE_BATCH_MAX_JOBS", "32"))
+BATCH_MAX_UPLOAD_BYTES = int(os.getenv("CLAUSEWISE_BATCH_MAX_UPLOAD_BYTES", str(64 << 20))) # one uploaded file, as sent
+BATCH_MAX_FILES = int(os.getenv("CLAUSEWISE_BATCH_MAX_FILES", "500")) # documents after expanding archives
+BATCH_MAX_FILE_BYTES = int(os.getenv("CLAUSEWISE_BATCH_MAX_FILE_BYTES", str(16 << 20))) # one document, uncompressed
+BATCH_MAX_TOTAL_BYTES = int(os.getenv("CLAUSEWISE_BATCH_MAX_TOTAL_BYTES", str(256 << 20))) # all documents, uncompressed
+LOCAL_STAGES = ("language", "contract_type", "clauses", "risk_hits")
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def process_pool() -> ProcessPoolExecutor:
+    # Created on first use; spawn so workers never inherit the server's threads or sockets
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=BATCH_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+def shutdown_pools():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+def analyze_local(text: str) -> Dict[str, Any]:
+    # Runs in a worker process: everything /analyze computes without IBM services
+    index = DocumentIndex(text)
+    hits = risk_hits(index)
+    clauses = index.clauses()
+    return {
+        "language": index.lang,
+        "contract_type": classify_contract(text),
+        "clauses": clauses,
+        "simplified_examples": clauses[:5],
+        "summary": summarize_extract(index, max_sentences=6),
+        "entities": find_entities_regex(index),
+        "risks": risk_labels(hits),
+        "risk_hits": hits,
+        "alerts": upcoming_alerts(index),
+    }
+
+class BatchTooLarge(ValueError):
+    pass
+
+def read_batch_files(uploads: List[Tuple[str, bytes]], max_files: int = BATCH_MAX_FILES,
+                     max_file_bytes: int = BATCH_MAX_FILE_BYTES, max_total_bytes: int = BATCH_MAX_TOTAL_BYTES) -> List[Tuple[str, bytes]]:
+    # Expands .zip uploads into their member files; other uploads pass through. Raises BatchTooLarge
+    # from the archives' declared sizes, before any member is read
+    plain: List[Tuple[str, bytes]] = []
+    archives: List[Tuple[zipfile.ZipFile, List[zipfile.ZipInfo]]] = []
+    sizes: List[Tuple[str, int]] = []
+    try:
+        for name, raw in uploads:
+            if not name.lower().endswith(".zip"):
+                plain.append((name, raw))
+                sizes.append((name, len(raw)))
+                continue
+            zf = zipfile.ZipFile(io.BytesIO(raw))
+            members = []
+            for info in zf.infolist():
+                base = info.filename.rsplit("/", 1)[-1]
+                if info.is_dir() or info.filename.startswith("__MACOSX/") or base.startswith("."):
+                    continue
+                members.append(info)
+                sizes.append((info.filename, info.file_size))
+            archives.append((zf, members))
+        if len(sizes) > max_files:
+            raise BatchTooLarge(f"{len(sizes)} files, the limit is {max_files}")
+        for name, size in sizes:
+            if size > max_file_bytes:
+                raise BatchTooLarge(f"{name} is {size} bytes uncompressed, the limit is {max_file_bytes}")
+        total = sum(size for _, size in sizes)
+        if total > max_total_bytes:
+            raise BatchTooLarge(f"{total} bytes uncompressed in total, the limit is {max_total_bytes}")
+        out = plain
+        for zf, members in archives:
+            # ZipExtFile stops at the declared file_size, so the checks above bound what is inflated
+            out.extend((info.filename, zf.read(info)) for info in members)
+        return out
+    finally:
+        for zf, _ in archives:
+            zf.close()
+
+class BatchJob:
+    def __init__(self, job_id: str, names: List[str]):
+        self.job_id = job_id
+        self.names = names
+        self.items: List[Dict[str, Any]] = []
+        self.failed = 0
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def status(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        return {
+            "job_id": self.job_id,
+            "status": "done" if self.done else "running",
+            "total": len(self.names),
+            "completed": len(self.items),
+            "failed": self.failed,
+            "elapsed": round(end - self.created, 3),
+            "docs_per_second": round(len(self.items) / (end - self.created), 2) if end > self.created else 0.0,
+        }
+
+    async def add(self, item: Dict[str, Any]):
+        async with self.changed:
+            self.items.append(item)
+            if item["status"] != "ok":
+                self.failed += 1
+            self.changed.notify_all()
+
+    async def follow(self, offset: int = 0):
+        # Yields items from offset in completion order, waiting for new ones until the job ends
+        while True:
+            async with self.changed:
+                while offset >= len(self.items) and not self.done:
+                    await self.changed.wait()
+                batch = self.items[offset:]
+            for item in batch:
+                yield item
+            offset += len(batch)
+            if self.done and offset >= len(self.items):
+                return
+
+def _digest_and_text(raw: bytes) -> Tuple[str, str]:
+    return content_digest(raw), raw.decode("utf-8", errors="ignore")
+
+class BatchManager:
+    def __init__(self, remote: Optional[Callable[[str, str, Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None):
+        # await remote(digest, text, local_result) -> fields to overlay (summary, entities, ...)
+        self.remote = remote
+        self.jobs: Dict[str, BatchJob] = {}
+        self._io_slots: Optional[asyncio.Semaphore] = None
+
+    def submit(self, files: List[Tuple[str, bytes]]) -> BatchJob:
+        job = BatchJob(uuid.uuid4().hex, [name for name, _ in files])
+        self._evict()
+        self.jobs[job.job_id] = job
+        job.task = asyncio.create_task(self._run(job, files))
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    def _evict(self):
+        finished = sorted((j for j in self.jobs.values() if j.done), key=lambda j: j.finished)
+        while len(self.jobs) >= MAX_JOBS and finished:
+            del self.jobs[finished.pop(0).job_id]
+
+    async def _run(self, job: BatchJob, files: List[Tuple[str, bytes]]):
+        # A few more in-flight documents than processes keeps every core busy while remote calls overlap
+        queue: asyncio.Queue = asyncio.Queue()
+        for i, item in enumerate(files):
+            queue.put_nowait((i, item))
+        files.clear()
+
+        async def worker():
+            while not queue.empty():
+                i, (name, raw) = queue.get_nowait()
+                await job.add(await self._analyze(i, name, raw))
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(max(1, BATCH_PROCESSES * 2))])
+        finally:
+            async with job.changed:
+                job.finished = time.time()
+                job.changed.notify_all()
+
+    async def _analyze(self, i: int, name: str, raw: bytes) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        # Hashing and decoding a 16 MB file would stall the event loop
+        digest, text = await in_executor(_digest_and_text, raw)
+        item = {"index": i, "filename": name, "doc_id": digest}
+        try:
+            result = ANALYSIS_CACHE.get(digest, "batch_local")
+            if result is MISSING:
+                result = await loop.run_in_executor(process_pool(), analyze_local, text)
+                ANALYSIS_CACHE.set(digest, "batch_local", result)
+                # Share the individual stages with later /analyze calls on the same file
+                for stage in LOCAL_STAGES:
+                    ANALYSIS_CACHE.set(digest, stage, result[stage])
+            result = dict(result)
+            if self.remote is not None:
+                if self._io_slots is None:
+                    self._io_slots = asyncio.Semaphore(BATCH_IO_WORKERS)
+                async with self._io_slots:
+                    result.update(await self.remote(digest, text, result))
+        except Exception as exc:
+            item.update(status="error", error=f"{type(exc).__name__}: {exc}")
+            return item
+        item.update(status="ok", result=result)
+        return item
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from backend.storage import connect
+
+#Content-addressed cache for per-stage analysis results.
+#Entries are keyed by (sha256 of the uploaded bytes, stage name) so /analyze,
+#/ask and /compare can share whatever an earlier request already computed.
+
+MISSING = object()
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class MemoryTier:
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        expires = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SQLiteTier:
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use, so a configured tier creates no file until something is cached; callers hold _lock
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._db().execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return MISSING
+        value, created = row
+        if self.ttl and created + self.ttl < time.time():
+            with self._lock:
+                self._db().execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+            return MISSING
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._db().execute("INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)", (key, payload, time.time()))
+            self._conn.commit()
+
+class AnalysisCache:
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, db_path: Optional[str] = None):
+        self.memory = MemoryTier(max_entries, ttl)
+        self.disk = SQLiteTier(db_path) if db_path else None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(digest: str, stage: str) -> str:
+        return f"{digest}:{stage}"
+
+    def _count(self, stage: str, outcome: str):
+        with self._lock:
+            s = self._stats.setdefault(stage, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            s[outcome] += 1
+
+    def get(self, digest: str, stage: str) -> Any:
+        k = self.key(digest, stage)
+        value = self.memory.get(k)
+        if value is not MISSING:
+            self._count(stage, "memory_hits")
+            return value
+        if self.disk is not None:
+            value = self.disk.get(k)
+            if value is not MISSING:
+                self.memory.set(k, value)
+                self._count(stage, "disk_hits")
+                return value
+        self._count(stage, "misses")
+        return MISSING
+
+    def set(self, digest: str, stage: str, value: Any):
+        k = self.key(digest, stage)
+        self.memory.set(k, value)
+        if self.disk is not None:
+            self.disk.set(k, value)
+
+    def get_or_compute(self, digest: str, stage: str, fn: Callable[[], Any]) -> Any:
+        value = self.get(digest, stage)
+        if value is MISSING:
+            value = fn()
+            self.set(digest, stage, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {k: dict(v) for k, v in self._stats.items()}
+        hits = sum(s["memory_hits"] + s["disk_hits"] for s in stages.values())
+        misses = sum(s["misses"] for s in stages.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_enabled": self.disk is not None,
+            "stages": stages,
+        }
+
+ANALYSIS_CACHE = AnalysisCache(
+    max_entries=int(os.getenv("CLAUSEWISE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("CLAUSEWISE_CACHE_TTL", "3600")),
+    db_path=os.getenv("CLAUSEWISE_CACHE_DB") or None,
+)
@@ -1,45 +1,410 @@
-from typing import Dict, List, Any 
-from collections import defaultdict
-
-class Room: 
-    def __init__(self): 
-        self.clients: List[Any] = [] 
-        self.state: Dict[str, Any] = {"document": "", "chat": []}
-
-class CollabManager: 
-    def __init__(self): 
-        self.rooms: Dict[str, Room] = defaultdict(Room)
-
-    async def join(self, room_id: str, ws):
-      room = self.rooms[room_id]
-      room.clients.append(ws)
-      await ws.send_json({"type": "state", "payload": room.state})
-
-    async def leave(self, room_id: str, ws):
-      if ws in room.clients:
-        room.clients.remove(ws)
-
-    async def broadcast(self, room_id: str, message: Dict[str, Any]):
-      room = self.rooms[room_id]
-      dead = []
-      for c in room.clients:
-        try:
-            await c.send_json(message)
-        except Exception:
-            dead.append(c)
-      for d in dead:
-        if d in room.clients:
-            room.clients.remove(d)
-
-    async def update_document(self, room_id: str, content: str):
-      room = self.rooms[room_id]
-      room.state["document"] = content
-      await self.broadcast(room_id, {"type": "document", "payload": content})
-
-    async def add_chat(self, room_id: str, user: str, text: str):
-       room = self.rooms[room_id]
-       entry = {"user": user, "text": text}
-       room.state["chat"].append(entry)
-       await self.broadcast(room_id, {"type": "chat", "payload": entry})
-
-COLLAB = CollabManager()
+from typing import Callable, Dict, List, Any, Optional
+from collections import deque
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from backend.metrics import REGISTRY
+from backend.ot import apply_ops, replace_ops, transform, validate
+from backend.pubsub import PubSub, make_pubsub
+from backend.room_store import ROOM_STORE, RoomStore
+
+#Each client gets a bounded outbound queue drained by its own writer task, so a
+#broadcast encodes the message once and only enqueues it: one slow or stalled
+#browser can no longer hold up the room (or alert_broadcaster, which loops over
+#every room). A queued "resync" (a full snapshot) is replaced by a newer one,
+#since only the newest matters, and an "ops" batch that continues the last queued
+#one is merged into it, so a client that falls behind catches up in one message.
+#A client whose queue still overflows is evicted.
+
+#Documents are edited with versioned insert/delete ops (backend/ot.py) rather
+#than full-text replacement. The server rebases late ops over its log, keeps a
+#snapshot every SNAPSHOT_EVERY revisions, and batches all ops applied within one
+#tick into a single broadcast.
+
+#Rooms are loaded on first join (from ROOM_STORE if they were persisted) and
+#evicted from memory once they have had no clients for ROOM_IDLE_SECONDS. Edits
+#and chat go through a PubSub sequencer and are applied when they come back, so
+#with CLAUSEWISE_PUBSUB=unix:PATH one room can span several uvicorn workers.
+
+CLIENT_QUEUE_LIMIT = int(os.getenv("CLAUSEWISE_WS_QUEUE_LIMIT", "256"))
+COALESCE_TYPES = {"resync"}
+DOCUMENT_TYPES = ("state", "resync", "ops") # messages that move a client's revision
+TICK_SECONDS = float(os.getenv("CLAUSEWISE_COLLAB_TICK_MS", "50")) / 1000
+SNAPSHOT_EVERY = int(os.getenv("CLAUSEWISE_SNAPSHOT_EVERY", "100"))
+LOG_KEEP = max(SNAPSHOT_EVERY * 2, int(os.getenv("CLAUSEWISE_OP_LOG_KEEP", "1000")))
+CHAT_KEEP = int(os.getenv("CLAUSEWISE_CHAT_KEEP", "200"))
+ROOM_IDLE_SECONDS = float(os.getenv("CLAUSEWISE_ROOM_IDLE_SECONDS", "600"))
+ROOM_SWEEP_SECONDS = 30.0
+REPLAY_KEEP = 4096 # recent events kept per worker to replay into a room loaded from disk
+WS_SEND_SECONDS = REGISTRY.histogram("clausewise_ws_send_seconds", "Time to write one WebSocket message to a client")
+
+def encode(message: Dict[str, Any]) -> str:
+    # Same encoding Starlette's send_json uses
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+class RoomMetrics:
+    __slots__ = ("broadcasts", "sent", "coalesced", "evicted", "send_latency_avg", "send_latency_max")
+
+    def __init__(self):
+        self.broadcasts = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.evicted = 0
+        self.send_latency_avg = 0.0
+        self.send_latency_max = 0.0
+
+    def record_send(self, elapsed: float):
+        WS_SEND_SECONDS.observe(elapsed)
+        self.sent += 1
+        # EWMA keeps the figure responsive without storing samples
+        self.send_latency_avg += (elapsed - self.send_latency_avg) * 0.1
+        self.send_latency_max = max(self.send_latency_max, elapsed)
+
+class ClientConn:
+    __slots__ = ("id", "ws", "queue", "wakeup", "task", "closed", "metrics", "on_dead")
+
+    def __init__(self, ws, metrics: RoomMetrics, on_dead):
+        self.id = uuid.uuid4().hex[:12]
+        self.ws = ws
+        self.queue: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.metrics = metrics
+        self.on_dead = on_dead
+        self.task = asyncio.create_task(self._writer())
+
+    def offer(self, mtype: str, payload: str) -> bool:
+        # Non-blocking enqueue; False means the client is too far behind and must go
+        if self.closed:
+            return False
+        if mtype in COALESCE_TYPES and self.queue:
+            stale = [item for item in self.queue if item[0] == mtype]
+            if stale:
+                self.queue = deque(item for item in self.queue if item[0] != mtype)
+                self.metrics.coalesced += len(stale)
+        if mtype == "ops" and self._merge_ops(payload):
+            self.wakeup.set()
+            return True
+        if len(self.queue) >= CLIENT_QUEUE_LIMIT:
+            return False
+        self.queue.append((mtype, payload))
+        self.wakeup.set()
+        return True
+
+    def _merge_ops(self, payload: str) -> bool:
+        # Appends the entries to the newest queued "ops" batch if it ends where this one starts
+        for i in range(len(self.queue) - 1, -1, -1):
+            mtype, queued = self.queue[i]
+            if mtype not in DOCUMENT_TYPES:
+                continue
+            if mtype != "ops":
+                return False
+            prev, new = json.loads(queued), json.loads(payload)
+            if prev["payload"]["rev"] != new["payload"]["from_rev"]:
+                return False
+            prev["payload"]["entries"].extend(new["payload"]["entries"])
+            prev["payload"]["rev"] = new["payload"]["rev"]
+            self.queue[i] = (mtype, encode(prev))
+            self.metrics.coalesced += 1
+            return True
+        return False
+
+    async def _writer(self):
+        try:
+            while not self.closed:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.queue and not self.closed:
+                    _, payload = self.queue.popleft()
+                    start = time.perf_counter()
+                    await self.ws.send_text(payload)
+                    self.metrics.record_send(time.perf_counter() - start)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.closed = True
+            self.on_dead(self)
+
+    def close(self, code: Optional[int] = None):
+        self.closed = True
+        self.queue.clear()
+        self.task.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_ws(code))
+
+    async def _close_ws(self, code: int):
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            pass
+
+class Room:
+    def __init__(self):
+        self.clients: List[ClientConn] = []
+        self.state: Dict[str, Any] = {"document": "", "chat": deque(maxlen=CHAT_KEEP)}
+        self.metrics = RoomMetrics()
+        self.rev = 0
+        self.seq = 0 # last sequencer number applied, to skip replays
+        self.snapshot: Dict[str, Any] = {"rev": 0, "document": ""}
+        self.log: deque = deque(maxlen=LOG_KEEP) # {"rev", "client", "ops"} per applied message
+        self.pending: List[Dict[str, Any]] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.last_active = time.monotonic()
+
+    @classmethod
+    def restore(cls, saved: Dict[str, Any]) -> "Room":
+        room = cls()
+        room.snapshot = {"rev": saved["rev"], "document": saved["document"]}
+        document = saved["document"]
+        for entry in saved["log"]:
+            document = apply_ops(document, entry["ops"])
+            room.log.append(entry)
+        room.rev = room.log[-1]["rev"] if room.log else saved["rev"]
+        room.seq = saved["seq"]
+        room.state["document"] = document
+        room.state["chat"].extend(saved["chat"])
+        return room
+
+    def log_floor(self) -> int:
+        # Oldest base revision the log can still rebase from
+        return self.log[0]["rev"] - 1 if self.log else self.rev
+
+    def join_state(self, client_id: str) -> Dict[str, Any]:
+        snap = self.snapshot
+        return {
+            "client_id": client_id,
+            "rev": self.rev,
+            "snapshot": snap,
+            "log": [e for e in self.log if e["rev"] > snap["rev"]],
+            "chat": list(self.state["chat"]),
+        }
+
+    def conn_for(self, ws) -> Optional[ClientConn]:
+        for c in self.clients:
+            if c.ws is ws:
+                return c
+        return None
+
+    def drop(self, conn: ClientConn):
+        if conn in self.clients:
+            self.clients.remove(conn)
+
+class CollabManager:
+    def __init__(self, store: Optional[RoomStore] = None, pubsub: Optional[PubSub] = None):
+      self.rooms: Dict[str, Room] = {}
+      self.store = store
+      self.pubsub = pubsub or make_pubsub()
+      self.pubsub.bind(self._on_event)
+      self.origin = uuid.uuid4().hex
+      self.recent: deque = deque(maxlen=REPLAY_KEEP)
+      self._janitor: Optional[asyncio.Task] = None
+      self._listeners: List[Callable[[str, Optional[str]], None]] = []
+
+    def add_document_listener(self, fn: Callable[[str, Optional[str]], None]):
+      # fn(room_id, document) after loads and edits; document is None when the room is evicted
+      self._listeners.append(fn)
+
+    def _notify(self, room_id: str, document: Optional[str]):
+      for fn in self._listeners:
+        fn(room_id, document)
+
+    async def start(self):
+      await self.pubsub.start()
+      if self._janitor is None:
+        self._janitor = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+      if self._janitor is not None:
+        self._janitor.cancel()
+        self._janitor = None
+      for room_id in list(self.rooms):
+        self._evict(room_id)
+      if self.store is not None:
+        await asyncio.to_thread(self.store.flush)
+      await self.pubsub.close()
+
+    async def room(self, room_id: str) -> Room:
+      # Loads (or creates) the room; only joins call this, so stray broadcasts never create rooms
+      room = self.rooms.get(room_id)
+      if room is not None:
+        return room
+      saved = await asyncio.to_thread(self.store.load, room_id, CHAT_KEEP) if self.store is not None else None
+      room = self.rooms.get(room_id)
+      if room is not None:
+        return room # a concurrent join loaded it first
+      room = Room.restore(saved) if saved else Room()
+      self.rooms[room_id] = room
+      # Events sequenced while the room was being read from disk
+      for event in self.recent:
+        if event["room"] == room_id:
+          self._apply_event(room_id, room, event, persist=False)
+      if room.state["document"]:
+        self._notify(room_id, room.state["document"])
+      return room
+
+    async def join(self, room_id: str, ws):
+      room = await self.room(room_id)
+      room.last_active = time.monotonic()
+      conn = ClientConn(ws, room.metrics, room.drop)
+      room.clients.append(conn)
+      # Late joiners get the last snapshot plus the log tail, not the full current text
+      conn.offer("state", encode({"type": "state", "payload": room.join_state(conn.id)}))
+      return conn
+
+    async def leave(self, room_id: str, ws):
+      room = self.rooms.get(room_id)
+      if room is None:
+        return
+      conn = room.conn_for(ws)
+      if conn is not None:
+        conn.close()
+        room.drop(conn)
+      room.last_active = time.monotonic()
+
+    async def broadcast(self, room_id: str, message: Dict[str, Any]):
+      self.broadcast_nowait(room_id, message)
+
+    def broadcast_nowait(self, room_id: str, message: Dict[str, Any]) -> bool:
+      room = self.rooms.get(room_id)
+      if room is None:
+        return False
+      self._fanout(room, message)
+      return True
+
+    def _fanout(self, room: Room, message: Dict[str, Any]):
+      room.metrics.broadcasts += 1
+      payload = encode(message)
+      mtype = message.get("type", "")
+      for c in list(room.clients):
+        if not c.offer(mtype, payload):
+            room.metrics.evicted += 1
+            c.close(code=1013) # try again later: client fell too far behind
+            room.drop(c)
+
+    async def apply_ops(self, room_id: str, client_id: str, base_rev: int, ops: List[Dict[str, Any]]):
+      # Applied once the sequencer hands the event back; a client out of sync gets a "resync"
+      await self.pubsub.publish({"kind": "ops", "room": room_id, "origin": self.origin, "client": client_id,
+                                 "base_rev": base_rev, "ops": ops})
+
+    async def update_document(self, room_id: str, content: str, client_id: str = ""):
+      # Full-text replacement from older clients becomes one delete+insert at the current revision
+      room = await self.room(room_id)
+      await self.apply_ops(room_id, client_id, room.rev, replace_ops(room.state["document"], content))
+
+    async def add_chat(self, room_id: str, user: str, text: str):
+      await self.pubsub.publish({"kind": "chat", "room": room_id, "origin": self.origin,
+                                 "entry": {"user": user, "text": text}})
+
+    def _on_event(self, event: Dict[str, Any]):
+      self.recent.append(event)
+      room = self.rooms.get(event.get("room"))
+      if room is not None:
+        # Only the publishing worker writes to disk; the others apply the same event in memory
+        self._apply_event(event["room"], room, event, persist=event.get("origin") == self.origin)
+
+    def _apply_event(self, room_id: str, room: Room, event: Dict[str, Any], persist: bool):
+      if event["seq"] <= room.seq:
+        return
+      room.seq = event["seq"]
+      room.last_active = time.monotonic()
+      if event["kind"] == "chat":
+        room.state["chat"].append(event["entry"])
+        if persist and self.store is not None:
+          self.store.append_chat(room_id, event["seq"], event["entry"], CHAT_KEEP)
+        self._fanout(room, {"type": "chat", "payload": event["entry"]})
+        return
+      local = event.get("origin") == self.origin
+      entry = self._apply_ops(room, event["client"], event["base_rev"], event["ops"], resync=local)
+      if entry is None:
+        return
+      self._notify(room_id, room.state["document"])
+      if not persist or self.store is None:
+        return
+      self.store.append_op(room_id, event["seq"], entry)
+      if room.snapshot["rev"] == room.rev:
+        self.store.save_snapshot(room_id, room.rev, room.seq, room.state["document"])
+
+    def _apply_ops(self, room: Room, client_id: str, base_rev: int, ops: List[Dict[str, Any]], resync: bool) -> Optional[Dict[str, Any]]:
+      if not isinstance(base_rev, int) or base_rev < room.log_floor() or base_rev > room.rev:
+        if resync:
+          self._resync(room, client_id)
+        return None
+      try:
+        concurrent = [op for e in room.log if e["rev"] > base_rev for op in e["ops"]]
+        ops, _ = transform(ops, concurrent, a_first=False)
+        ops = validate(ops, len(room.state["document"]))
+      except (ValueError, KeyError, TypeError, AttributeError):
+        if resync:
+          self._resync(room, client_id)
+        return None
+      if not ops:
+        return None
+      room.state["document"] = apply_ops(room.state["document"], ops)
+      room.rev += 1
+      entry = {"rev": room.rev, "client": client_id, "ops": ops}
+      room.log.append(entry)
+      if room.rev - room.snapshot["rev"] >= SNAPSHOT_EVERY:
+        room.snapshot = {"rev": room.rev, "document": room.state["document"]}
+      room.pending.append(entry)
+      if room.flush_handle is None:
+        room.flush_handle = asyncio.get_running_loop().call_later(TICK_SECONDS, self._flush, room)
+      return entry
+
+    def _flush(self, room: Room):
+      # One broadcast per tick carrying every entry applied since the last one
+      room.flush_handle = None
+      if not room.pending:
+        return
+      entries, room.pending = room.pending, []
+      self._fanout(room, {"type": "ops", "payload": {"from_rev": entries[0]["rev"] - 1, "rev": room.rev, "entries": entries}})
+
+    def _resync(self, room: Room, client_id: str):
+      for c in room.clients:
+        if c.id == client_id:
+          c.offer("resync", encode({"type": "resync", "payload": room.join_state(client_id)}))
+
+    def _evict(self, room_id: str):
+      room = self.rooms.pop(room_id)
+      self._notify(room_id, None)
+      if room.flush_handle is not None:
+        room.flush_handle.cancel()
+      for c in room.clients:
+        c.close()
+      if self.store is not None and room.rev > room.snapshot["rev"]:
+        self.store.save_snapshot(room_id, room.rev, room.seq, room.state["document"])
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+      now = time.monotonic() if now is None else now
+      idle = [rid for rid, room in self.rooms.items() if not room.clients and now - room.last_active > ROOM_IDLE_SECONDS]
+      for room_id in idle:
+        self._evict(room_id)
+      return len(idle)
+
+    async def _sweep_loop(self):
+      while True:
+        await asyncio.sleep(ROOM_SWEEP_SECONDS)
+        self.evict_idle()
+
+    def metrics(self) -> Dict[str, Any]:
+      out = {}
+      for room_id, room in self.rooms.items():
+        depths = [len(c.queue) for c in room.clients]
+        m = room.metrics
+        out[room_id] = {
+            "clients": len(room.clients),
+            "rev": room.rev,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "broadcasts": m.broadcasts,
+            "sent": m.sent,
+            "coalesced": m.coalesced,
+            "evicted": m.evicted,
+            "send_latency_avg_ms": round(m.send_latency_avg * 1000, 3),
+            "send_latency_max_ms": round(m.send_latency_max * 1000, 3),
+        }
+      return out
+
+COLLAB = CollabManager(ROOM_STORE)
@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.storage import data_path
+from backend.utils import DocumentIndex
+
+#Persistent contract library for /similar. Documents and clauses are rows of two
+#sparse CSR term-count matrices stored as append-only binary arrays; readers
+#memory-map them, so startup cost does not grow with the corpus and adding a
+#contract appends its rows instead of rewriting the files. TF-IDF weights are
+#applied at query time from the document-frequency vector; adding a contract only
+#marks those statistics stale, and the next query recomputes them once, so a
+#bulk import is not O(corpus) per document. The directory is created and read on
+#first use, not on import.
+
+EXCERPT_CHARS = 300
+
+class _CSR:
+    # indptr/indices/data as append-only .bin files (int64/int32/float32)
+    def __init__(self, root: str, prefix: str):
+        self.paths = {name: os.path.join(root, f"{prefix}_{name}.bin") for name in ("indptr", "indices", "data")}
+        self.dtypes = {"indptr": np.int64, "indices": np.int32, "data": np.float32}
+        if not os.path.exists(self.paths["indptr"]):
+            np.zeros(1, dtype=np.int64).tofile(self.paths["indptr"])
+            for name in ("indices", "data"):
+                open(self.paths[name], "wb").close()
+        self.reload()
+
+    def _map(self, name: str) -> np.ndarray:
+        path, dtype = self.paths[name], self.dtypes[name]
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def reload(self):
+        self.indptr = self._map("indptr")
+        self.indices = self._map("indices")
+        self.data = self._map("data")
+        self._rows = None
+
+    @property
+    def rows(self) -> np.ndarray:
+        # Row index of every stored value, built on first use after a reload
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.n_rows, dtype=np.int32), np.diff(self.indptr))
+        return self._rows
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def append(self, rows: List[Dict[int, int]]):
+        nnz = int(self.indptr[-1])
+        indptr, indices, data = [], [], []
+        for counts in rows:
+            terms = sorted(counts)
+            indices.extend(terms)
+            data.extend(counts[t] for t in terms)
+            nnz += len(terms)
+            indptr.append(nnz)
+        for name, values in (("indices", indices), ("data", data), ("indptr", indptr)):
+            with open(self.paths[name], "ab") as f:
+                np.asarray(values, dtype=self.dtypes[name]).tofile(f)
+        self.reload()
+
+    def weighted(self, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        w = self.data * idf[self.indices]
+        norms = np.sqrt(np.bincount(self.rows, weights=w * w, minlength=self.n_rows))
+        return w, norms
+
+class ContractCorpus:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._opened = False
+
+    def _open(self):
+        # Callers hold _lock
+        if self._opened:
+            return
+        root = self.root
+        os.makedirs(root, exist_ok=True)
+        self.docs_path = os.path.join(root, "docs.jsonl")
+        self.clauses_path = os.path.join(root, "clauses.jsonl")
+        self.vocab_path = os.path.join(root, "vocab.txt")
+        self.docs: List[Dict[str, Any]] = self._read_jsonl(self.docs_path)
+        self.clauses: List[Dict[str, Any]] = self._read_jsonl(self.clauses_path)
+        self.terms: List[str] = []
+        if os.path.exists(self.vocab_path):
+            with open(self.vocab_path, encoding="utf-8") as f:
+                self.terms = [line.rstrip("\n") for line in f]
+        self.vocab: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self.by_id: Dict[str, int] = {d["doc_id"]: i for i, d in enumerate(self.docs)}
+        self.doc_matrix = _CSR(root, "doc")
+        self.clause_matrix = _CSR(root, "clause")
+        self._stale = True
+        self._opened = True
+
+    @staticmethod
+    def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _refresh(self):
+        # IDF, weighted values and row norms for the current matrices; callers hold _lock
+        if not self._stale:
+            return
+        n = self.doc_matrix.n_rows
+        df = np.bincount(self.doc_matrix.indices, minlength=len(self.terms)).astype(np.float32)
+        self.idf = (np.log((n + 1) / (df + 1)) + 1).astype(np.float32)
+        self._doc_w, self._doc_norms = self.doc_matrix.weighted(self.idf)
+        self._clause_w, self._clause_norms = self.clause_matrix.weighted(self.idf)
+        self.clause_doc = np.asarray([c["doc"] for c in self.clauses], dtype=np.int32)
+        self._stale = False
+
+    def _term_ids(self, counts: Dict[str, int], grow: bool) -> Dict[int, int]:
+        out: Dict[int, int] = {}
+        new_terms = []
+        for term, c in counts.items():
+            tid = self.vocab.get(term)
+            if tid is None:
+                if not grow:
+                    continue
+                tid = len(self.terms)
+                self.vocab[term] = tid
+                self.terms.append(term)
+                new_terms.append(term)
+            out[tid] = c
+        if new_terms:
+            with open(self.vocab_path, "a", encoding="utf-8") as f:
+                f.writelines(t + "\n" for t in new_terms)
+        return out
+
+    @staticmethod
+    def _clause_counts(index: DocumentIndex) -> List[Dict[str, int]]:
+        stop = index.stop
+        rows = []
+        for toks in index.clause_tokens:
+            rows.append({w: 1 for w in toks if w not in stop and len(w) > 2})
+        return rows
+
+    def add(self, doc_id: str, index: DocumentIndex, name: str = "") -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            if doc_id in self.by_id:
+                return self.docs[self.by_id[doc_id]]
+            row = len(self.docs)
+            doc_counts = self._term_ids(index.tf, grow=True)
+            clause_rows = [self._term_ids(c, grow=True) for c in self._clause_counts(index)]
+            meta = {"doc_id": doc_id, "name": name, "lang": index.lang, "clauses": len(clause_rows)}
+            clause_meta = [{"doc": row, "i": i, "excerpt": c[:EXCERPT_CHARS]} for i, c in enumerate(index.clauses())]
+            self.doc_matrix.append([doc_counts])
+            self.clause_matrix.append(clause_rows)
+            with open(self.clauses_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(c, ensure_ascii=False) + "\n" for c in clause_meta)
+            with open(self.docs_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+            self.docs.append(meta)
+            self.clauses.extend(clause_meta)
+            self.by_id[doc_id] = row
+            self._stale = True
+            return meta
+
+    def _query_vector(self, counts: Dict[str, int]) -> Tuple[np.ndarray, float]:
+        q = np.zeros(len(self.terms), dtype=np.float32)
+        for tid, c in self._term_ids(counts, grow=False).items():
+            q[tid] = c * self.idf[tid]
+        return q, float(np.sqrt(np.dot(q, q)))
+
+    def similar(self, index: DocumentIndex, k: int = 5, clauses_per_doc: int = 3, exclude: Optional[str] = None) -> Dict[str, Any]:
+        for name, value in (("k", k), ("clauses_per_doc", clauses_per_doc)):
+            if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+                raise ValueError(f"{name} must be a positive integer, got {value!r}")
+        with self._lock:
+            self._open()
+            m = self.doc_matrix
+            if m.n_rows == 0 or not self.terms:
+                return {"matches": [], "clause_matches": []}
+            self._refresh()
+            q, qnorm = self._query_vector(index.tf)
+            if qnorm == 0:
+                return {"matches": [], "clause_matches": []}
+            dots = np.bincount(m.rows, weights=self._doc_w * q[m.indices], minlength=m.n_rows)
+            scores = dots / np.maximum(self._doc_norms * qnorm, 1e-12)
+            if exclude is not None and exclude in self.by_id:
+                scores[self.by_id[exclude]] = -1.0
+            k = min(k, m.n_rows)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top = top[scores[top] > 0]
+            matches = [dict(self.docs[int(r)], score=round(float(scores[r]), 4)) for r in top]
+            clause_matches = self._clause_matches(index, top, clauses_per_doc)
+        return {"matches": matches, "clause_matches": clause_matches}
+
+    def _clause_matches(self, index: DocumentIndex, docs: np.ndarray, per_doc: int) -> List[Dict[str, Any]]:
+        # Dense (query clauses x shared terms) @ (candidate clauses x shared terms)^T
+        if len(docs) == 0 or len(self.clause_doc) == 0:
+            return []
+        cm = self.clause_matrix
+        q_rows = [self._term_ids(c, grow=False) for c in self._clause_counts(index)]
+        cols = sorted({t for r in q_rows for t in r})
+        if not cols:
+            return []
+        col_of = np.full(len(self.terms), -1, dtype=np.int64)
+        col_of[cols] = np.arange(len(cols))
+        Q = np.zeros((len(q_rows), len(cols)), dtype=np.float32)
+        for i, r in enumerate(q_rows):
+            for t, c in r.items():
+                Q[i, col_of[t]] = c * self.idf[t]
+        cand = np.flatnonzero(np.isin(self.clause_doc, docs))
+        nnz_mask = np.isin(cm.rows, cand) & (col_of[cm.indices] >= 0)
+        row_of = np.full(cm.n_rows, -1, dtype=np.int64)
+        row_of[cand] = np.arange(len(cand))
+        C = np.zeros((len(cand), len(cols)), dtype=np.float32)
+        np.add.at(C, (row_of[cm.rows[nnz_mask]], col_of[cm.indices[nnz_mask]]), self._clause_w[nnz_mask])
+        qn = np.linalg.norm(Q, axis=1)
+        sims = (Q @ C.T) / np.maximum(np.outer(qn, self._clause_norms[cand]), 1e-12)
+        out = []
+        for d in docs:
+            in_doc = np.flatnonzero(self.clause_doc[cand] == d)
+            if len(in_doc) == 0:
+                continue
+            sub = sims[:, in_doc]
+            flat = np.argsort(-sub, axis=None)[:per_doc]
+            for qi, ci in zip(*np.unravel_index(flat, sub.shape)):
+                score = float(sub[qi, ci])
+                if score <= 0:
+                    continue
+                meta = self.clauses[int(cand[in_doc[ci]])]
+                out.append({
+                    "clause_index": int(qi),
+                    "doc_id": self.docs[int(d)]["doc_id"],
+                    "corpus_clause_index": meta["i"],
+                    "excerpt": meta["excerpt"],
+                    "score": round(score, 4),
+                })
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._open()
+            return {
+                "documents": len(self.docs),
+                "clauses": len(self.clauses),
+                "terms": len(self.terms),
+                "nnz": int(self.doc_matrix.indptr[-1]) + int(self.clause_matrix.indptr[-1]),
+            }
+
+CORPUS = ContractCorpus(data_path("CLAUSEWISE_CORPUS_DIR", "corpus"))
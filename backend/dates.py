@@ -0,0 +1,70 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from dateutil import parser as dtparser
+
+#Date normalization for DATE_REGEX matches. The three shapes that regex accepts
+#(ISO, numeric d/m/y or m/d/y, "Month d, yyyy") are parsed with strict fast paths
+#that reproduce dateutil's dayfirst=False behaviour; anything else falls back to
+#dateutil's fuzzy parser. Results are memoized, since schedules and annexes
+#repeat the same few dates many times.
+
+ISO_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+NUMERIC_DATE = re.compile(r"(\d{1,2})([-/. ])(\d{1,2})\2(\d{2}|\d{4})")
+NAMED_DATE = re.compile(r"([A-Za-z]+) (\d{1,2}), (\d{4})")
+RENEWAL_CONTEXT = re.compile(r"renew|term|expire", re.I)
+
+MONTHS = {}
+for _n, _name in enumerate(["january", "february", "march", "april", "may", "june", "july",
+                            "august", "september", "october", "november", "december"], start=1):
+    MONTHS[_name] = _n
+    MONTHS[_name[:3]] = _n
+MONTHS["sept"] = 9
+
+def _two_digit_year(year: int) -> int:
+    # Same window dateutil uses: within 50 years of the current year
+    now = datetime.now().year
+    year += now // 100 * 100
+    if year >= now + 50:
+        year -= 100
+    elif year < now - 50:
+        year += 100
+    return year
+
+def _fast_parse(text: str) -> Optional[datetime]:
+    m = ISO_DATE.fullmatch(text)
+    if m:
+        return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    m = NUMERIC_DATE.fullmatch(text)
+    if m:
+        first, second, year = int(m.group(1)), int(m.group(3)), m.group(4)
+        y = _two_digit_year(int(year)) if len(year) == 2 else int(year)
+        # dayfirst=False: month first unless that is impossible
+        if first > 12 and second <= 12:
+            first, second = second, first
+        return datetime(y, first, second)
+    m = NAMED_DATE.fullmatch(text)
+    if m:
+        month = MONTHS.get(m.group(1).lower())
+        if month is not None:
+            return datetime(int(m.group(3)), month, int(m.group(2)))
+    return None
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str) -> Optional[datetime]:
+    try:
+        d = _fast_parse(text)
+        if d is not None:
+            return d
+    except ValueError:
+        pass
+    try:
+        return dtparser.parse(text, dayfirst=False, fuzzy=True)
+    except Exception:
+        return None
+
+def normalize_date(text: str) -> Optional[str]:
+    d = parse_date(text)
+    return d.date().isoformat() if d else None
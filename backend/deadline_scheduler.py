@@ -0,0 +1,166 @@
+import asyncio
+import heapq
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from backend.dates import parse_date
+from backend.pipeline import in_executor
+from backend.utils import DocumentIndex, upcoming_alerts
+
+#Deadline alerts for collaboration rooms. Each room's document is scanned for
+#dates (DATE_REGEX via DocumentIndex) whenever it changes, debounced, and every
+#future (date, lead time) pair becomes an entry on one timer heap. A single task
+#sleeps until the earliest entry is due, so an idle server does no work at all.
+#Recomputing a room bumps its generation; heap entries from older generations
+#are skipped when they surface instead of being searched for and removed.
+
+LEAD_DAYS = (60, 30, 7, 1, 0)
+DEBOUNCE_SECONDS = float(os.getenv("CLAUSEWISE_ALERT_DEBOUNCE", "2"))
+
+Entry = Tuple[float, int, str, str, int] # (fire_at, generation, room_id, date iso, lead days)
+
+class RoomSchedule:
+    __slots__ = ("generation", "deadlines", "renewals", "sent", "debounce")
+
+    def __init__(self):
+        self.generation = 0
+        self.deadlines: Dict[str, str] = {} # date iso -> excerpt
+        self.renewals: Set[str] = set()
+        self.sent: Set[Tuple[str, int]] = set() # (date iso, lead) already delivered, or ("renewal:" + duration, -1)
+        self.debounce: Optional[asyncio.TimerHandle] = None
+
+def _day_start(iso: str) -> float:
+    return datetime.fromisoformat(iso).timestamp()
+
+def scan_document(text: str) -> Tuple[Dict[str, str], Set[str]]:
+    # Upcoming dates (any distance ahead; lead times decide when they fire) and renewal windows
+    idx = DocumentIndex(text)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    deadlines: Dict[str, str] = {}
+    for _, _, dtxt in idx.dates:
+        d = parse_date(dtxt)
+        if d is not None and d >= today:
+            deadlines.setdefault(d.date().isoformat(), dtxt)
+    renewals = {a["duration"] for a in upcoming_alerts(idx) if a["type"] == "renewal-window"}
+    return deadlines, renewals
+
+class DeadlineScheduler:
+    def __init__(self, collab):
+        self.collab = collab
+        self.rooms: Dict[str, RoomSchedule] = {}
+        self.heap: List[Entry] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        collab.add_document_listener(self.document_changed)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def document_changed(self, room_id: str, document: Optional[str]):
+        # None means the room was evicted from memory
+        if document is None:
+            sched = self.rooms.pop(room_id, None)
+            if sched is not None and sched.debounce is not None:
+                sched.debounce.cancel()
+            return
+        sched = self.rooms.setdefault(room_id, RoomSchedule())
+        if sched.debounce is not None:
+            sched.debounce.cancel()
+        loop = asyncio.get_running_loop()
+        sched.debounce = loop.call_later(DEBOUNCE_SECONDS, lambda: asyncio.ensure_future(self._recompute(room_id, sched)))
+
+    async def _recompute(self, room_id: str, sched: RoomSchedule):
+        sched.debounce = None
+        room = self.collab.rooms.get(room_id)
+        if room is None or self.rooms.get(room_id) is not sched:
+            return
+        deadlines, renewals = await in_executor(scan_document, room.state["document"])
+        if self.rooms.get(room_id) is not sched:
+            return
+        for duration in sorted(renewals - sched.renewals):
+            self._deliver(room_id, sched, ("renewal:" + duration, -1), {
+                "kind": "renewal-window", "duration": duration,
+                "message": f"Renewal window of {duration} found in the document.",
+            })
+        sched.renewals = renewals
+        if deadlines == sched.deadlines:
+            return
+        sched.deadlines = deadlines
+        sched.generation += 1
+        now = time.time()
+        earliest = self.heap[0][0] if self.heap else None
+        for iso, excerpt in deadlines.items():
+            due = _day_start(iso)
+            passed = [lead for lead in LEAD_DAYS if due - lead * 86400 <= now]
+            if passed:
+                # Already inside a lead window: tell the room once now, at the tightest lead reached
+                tightest = min(passed)
+                if (iso, tightest) not in sched.sent:
+                    self._deliver(room_id, sched, (iso, tightest), self._payload(iso, excerpt, now))
+                sched.sent.update((iso, lead) for lead in passed)
+            for lead in LEAD_DAYS:
+                fire_at = due - lead * 86400
+                if fire_at > now and (iso, lead) not in sched.sent:
+                    heapq.heappush(self.heap, (fire_at, sched.generation, room_id, iso, lead))
+        if self.heap and (earliest is None or self.heap[0][0] < earliest):
+            self._wakeup.set()
+        self._compact()
+
+    def _compact(self):
+        # Lazy deletion leaves stale entries behind; rebuild once they dominate the heap
+        live = sum(1 for e in self.heap if self._live(e))
+        if len(self.heap) > 64 and live * 2 < len(self.heap):
+            self.heap = [e for e in self.heap if self._live(e)]
+            heapq.heapify(self.heap)
+
+    def _live(self, entry: Entry) -> bool:
+        sched = self.rooms.get(entry[2])
+        return sched is not None and sched.generation == entry[1]
+
+    def _payload(self, iso: str, excerpt: str, now: float) -> Dict[str, Any]:
+        days = max(0, int((_day_start(iso) - now + 86399) // 86400))
+        when = "today" if days == 0 else f"in {days} day{'s' if days != 1 else ''}"
+        return {"kind": "deadline", "date": iso, "days_left": days, "excerpt": excerpt,
+                "message": f"Deadline {iso} ({excerpt}) is due {when}."}
+
+    def _deliver(self, room_id: str, sched: RoomSchedule, key: Tuple[str, int], payload: Dict[str, Any]):
+        sched.sent.add(key)
+        if self.collab.broadcast_nowait(room_id, {"type": "alert", "payload": payload}):
+            self.fired += 1
+
+    async def _run(self):
+        while True:
+            timeout = None
+            if self.heap:
+                timeout = max(0.0, self.heap[0][0] - time.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                entry = heapq.heappop(self.heap)
+                if not self._live(entry):
+                    continue
+                _, _, room_id, iso, lead = entry
+                sched = self.rooms[room_id]
+                if (iso, lead) not in sched.sent:
+                    self._deliver(room_id, sched, (iso, lead), self._payload(iso, sched.deadlines.get(iso, iso), now))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self.rooms),
+            "heap": len(self.heap),
+            "next_due": datetime.fromtimestamp(self.heap[0][0]).isoformat() if self.heap else None,
+            "fired": self.fired,
+        }
@@ -0,0 +1,110 @@
+import difflib
+import hashlib
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from backend.utils import normalize, sentence_tokenize
+
+#Clause-level diff for large contracts. Clauses are compared by a hash of their
+#normalized tokens, so reflowed whitespace, case and punctuation do not count as
+#changes; word-level diffs are computed only for clauses that actually changed,
+#and only for the hunks a caller asks for.
+
+TEXT_DIFF_LIMIT = 200_000 # combined chars; above this "auto" switches to clause mode
+WORD_DIFF_LIMIT = 4000 # combined words; larger clauses are diffed sentence by sentence first
+
+def clause_key(clause: str) -> str:
+    return hashlib.blake2b(" ".join(normalize(clause)).encode("utf-8"), digest_size=16).hexdigest()
+
+def clause_opcodes(clauses_a: Sequence[str], clauses_b: Sequence[str]) -> List[Tuple[str, int, int]]:
+    # One (op, a_index, b_index) descriptor per changed clause; -1 when absent on that side
+    sm = difflib.SequenceMatcher(None, [clause_key(c) for c in clauses_a], [clause_key(c) for c in clauses_b], autojunk=False)
+    out: List[Tuple[str, int, int]] = []
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag == "replace":
+            paired = min(i2 - i1, j2 - j1)
+            out.extend(("modify", i1 + k, j1 + k) for k in range(paired))
+            out.extend(("delete", i, -1) for i in range(i1 + paired, i2))
+            out.extend(("insert", -1, j) for j in range(j1 + paired, j2))
+        elif tag == "delete":
+            out.extend(("delete", i, -1) for i in range(i1, i2))
+        else:
+            out.extend(("insert", -1, j) for j in range(j1, j2))
+    return out
+
+def _diff_words(wa: List[str], wb: List[str], segs: List[List[str]]):
+    sm = difflib.SequenceMatcher(None, wa, wb, autojunk=False)
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == "equal":
+            segs.append(["=", " ".join(wa[i1:i2])])
+            continue
+        if i2 > i1:
+            segs.append(["-", " ".join(wa[i1:i2])])
+        if j2 > j1:
+            segs.append(["+", " ".join(wb[j1:j2])])
+
+def word_diff(a: str, b: str) -> List[List[str]]:
+    wa, wb = a.split(), b.split()
+    segs: List[List[str]] = []
+    if len(wa) + len(wb) <= WORD_DIFF_LIMIT:
+        _diff_words(wa, wb, segs)
+        return segs
+    # Huge clause: align sentences by hash, then word-diff only the changed pairs that are small enough
+    sa, sb = sentence_tokenize(a), sentence_tokenize(b)
+    sm = difflib.SequenceMatcher(None, [clause_key(s) for s in sa], [clause_key(s) for s in sb], autojunk=False)
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == "equal":
+            segs.append(["=", " ".join(sa[i1:i2])])
+            continue
+        left, right = " ".join(sa[i1:i2]).split(), " ".join(sb[j1:j2]).split()
+        if tag == "replace" and len(left) + len(right) <= WORD_DIFF_LIMIT:
+            _diff_words(left, right, segs)
+            continue
+        if left:
+            segs.append(["-", " ".join(left)])
+        if right:
+            segs.append(["+", " ".join(right)])
+    return segs
+
+def render_hunk(op: Tuple[str, int, int], clauses_a: Sequence[str], clauses_b: Sequence[str]) -> Dict[str, Any]:
+    kind, i, j = op
+    hunk: Dict[str, Any] = {"op": kind, "a_index": i, "b_index": j}
+    if kind == "modify":
+        hunk["words"] = word_diff(clauses_a[i], clauses_b[j])
+    elif kind == "delete":
+        hunk["words"] = [["-", clauses_a[i]]]
+    else:
+        hunk["words"] = [["+", clauses_b[j]]]
+    return hunk
+
+def iter_hunks(clauses_a: Sequence[str], clauses_b: Sequence[str], offset: int = 0, limit: int = -1) -> Iterator[Dict[str, Any]]:
+    if offset < 0:
+        raise ValueError("offset must be >= 0")
+    ops = clause_opcodes(clauses_a, clauses_b)
+    end = len(ops) if limit < 0 else min(len(ops), offset + limit)
+    for op in ops[offset:end]:
+        yield render_hunk(op, clauses_a, clauses_b)
+
+def diff_page(clauses_a: Sequence[str], clauses_b: Sequence[str], offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+    if offset < 0 or limit <= 0:
+        raise ValueError("offset must be >= 0 and limit positive")
+    ops = clause_opcodes(clauses_a, clauses_b)
+    page = ops[offset:offset + limit]
+    return {
+        "total": len(ops),
+        "offset": offset,
+        "limit": limit,
+        "hunks": [render_hunk(op, clauses_a, clauses_b) for op in page],
+    }
+
+def format_hunks(hunks: Sequence[Dict[str, Any]]) -> str:
+    # Plain-text rendering for clients that show the diff as a code block
+    lines = []
+    for h in hunks:
+        lines.append(f"@@ {h['op']} A#{h['a_index']} B#{h['b_index']} @@")
+        parts = []
+        for tag, text in h["words"]:
+            parts.append(text if tag == "=" else f"[{tag}{text}{tag}]")
+        lines.append(" ".join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from backend.cache import MISSING, MemoryTier
+from backend.retrieval import DocumentRetriever
+from backend.storage import connect, data_path
+from backend.utils import DocumentIndex
+
+#Upload-once document store. A document's id is the SHA-256 of its bytes (the
+#same digest ANALYSIS_CACHE uses), and its BM25 retriever is persisted next to
+#the text so later /ask calls by id never rebuild it. The database is opened on
+#first use, not on import.
+
+class StoredDocument:
+    __slots__ = ("doc_id", "text", "lang", "retriever", "created")
+
+    def __init__(self, doc_id: str, text: str, lang: str, retriever: DocumentRetriever, created: float):
+        self.doc_id = doc_id
+        self.text = text
+        self.lang = lang
+        self.retriever = retriever
+        self.created = created
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "doc_id": self.doc_id,
+            "language": self.lang,
+            "chars": len(self.text),
+            "sentences": len(self.retriever.sentences.passages),
+            "clauses": len(self.retriever.clauses.passages),
+            "created": self.created,
+        }
+
+class DocumentStore:
+    def __init__(self, db_path: str, max_loaded: int = 64):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = MemoryTier(max_loaded, ttl=0)
+
+    def _db(self) -> sqlite3.Connection:
+        # Callers hold _lock
+        if self._conn is None:
+            self._conn = connect(self.db_path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents (doc_id TEXT PRIMARY KEY, text TEXT NOT NULL, lang TEXT NOT NULL, "
+                "retriever TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def put(self, doc_id: str, index: DocumentIndex) -> StoredDocument:
+        doc = self.get(doc_id)
+        if doc is not None:
+            return doc
+        retriever = DocumentRetriever.build(index)
+        doc = StoredDocument(doc_id, index.text, index.lang, retriever, time.time())
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO documents (doc_id, text, lang, retriever, created) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, doc.text, doc.lang, json.dumps(retriever.to_dict(), ensure_ascii=False), doc.created),
+            )
+            self._conn.commit()
+        self._loaded.set(doc_id, doc)
+        return doc
+
+    def get(self, doc_id: str) -> Optional[StoredDocument]:
+        doc = self._loaded.get(doc_id)
+        if doc is not MISSING:
+            return doc
+        with self._lock:
+            row = self._db().execute("SELECT text, lang, retriever, created FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return None
+        text, lang, retriever, created = row
+        doc = StoredDocument(doc_id, text, lang, DocumentRetriever.from_dict(json.loads(retriever)), created)
+        self._loaded.set(doc_id, doc)
+        return doc
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            cur = self._db().execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
+        self._loaded.set(doc_id, None)
+        return cur.rowcount > 0
+
+DOC_STORE = DocumentStore(data_path("CLAUSEWISE_DOC_DB", "docs.db"))
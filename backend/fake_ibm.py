@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import os
+import random
+import re
+import time
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException, Request
+
+from backend.utils import WORD_REGEX, STOPWORDS, detect_language, find_entities_regex, summarize_extract
+
+#Local stand-in for IAM, watsonx.ai text generation and Watson NLU, for load
+#tests and offline development. Answers come from the same local heuristics the
+#app falls back to; latency, jitter and error rate are configurable so timeouts,
+#rate limits and the circuit breaker can be exercised without IBM credentials:
+#
+#    python -m backend.fake_ibm --port 8099 --latency 200 --error-rate 0.1
+#    WATSONX_APIKEY=x WATSONX_PROJECT_ID=x WATSONX_URL=http://127.0.0.1:8099 \
+#    IBM_IAM_URL=http://127.0.0.1:8099/identity/token \
+#    WATSON_NLU_APIKEY=x WATSON_NLU_URL=http://127.0.0.1:8099 uvicorn backend.main:app
+
+CONFIG: Dict[str, float] = {
+    "latency_ms": float(os.getenv("FAKE_IBM_LATENCY_MS", "100")),
+    "jitter_ms": float(os.getenv("FAKE_IBM_JITTER_MS", "50")),
+    "error_rate": float(os.getenv("FAKE_IBM_ERROR_RATE", "0")),
+    "hang_rate": float(os.getenv("FAKE_IBM_HANG_RATE", "0")), # requests that never answer within any sane timeout
+}
+STATS = {"token": 0, "generation": 0, "analyze": 0, "errors": 0}
+
+app = FastAPI(title="Fake IBM services")
+
+async def _simulate():
+    if random.random() < CONFIG["hang_rate"]:
+        await asyncio.sleep(3600)
+    await asyncio.sleep(max(0.0, CONFIG["latency_ms"] + random.uniform(-1, 1) * CONFIG["jitter_ms"]) / 1000)
+    if random.random() < CONFIG["error_rate"]:
+        STATS["errors"] += 1
+        raise HTTPException(status_code=503, detail="Simulated upstream failure")
+
+@app.post("/identity/token")
+async def token():
+    STATS["token"] += 1
+    return {"access_token": "fake-token", "token_type": "Bearer", "expires_in": 3600, "expiration": int(time.time()) + 3600}
+
+@app.post("/ml/v1/text/generation")
+async def generation(request: Request):
+    STATS["generation"] += 1
+    body = await request.json()
+    await _simulate()
+    prompt = body.get("input", "")
+    user = prompt.split("<|user|>\n", 1)[-1].rsplit("\n<|assistant|>", 1)[0]
+    text = summarize_extract(user, max_sentences=3)
+    return {
+        "model_id": body.get("model_id"),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": [{"generated_text": "\n".join(f"- {s}" for s in text.split(". ") if s), "generated_token_count": len(text.split()),
+                     "input_token_count": len(prompt.split()), "stop_reason": "eos_token"}],
+    }
+
+@app.post("/v1/analyze")
+async def analyze(request: Request):
+    STATS["analyze"] += 1
+    body = await request.json()
+    await _simulate()
+    text = body.get("text", "")
+    lang = detect_language(text)
+    found = find_entities_regex(text)
+    entities = []
+    for kind, values in found.items():
+        for t in values:
+            spans = [m.start() for m in re.finditer(re.escape(t), text)]
+            entities.append({"type": kind.rstrip("s").capitalize(), "text": t, "relevance": round(random.uniform(0.3, 0.9), 3),
+                             "count": len(spans), "mentions": [{"text": t, "location": [s, s + len(t)]} for s in spans]})
+    tf: Dict[str, int] = {}
+    stop = STOPWORDS.get(lang, STOPWORDS["en"])
+    for w in WORD_REGEX.findall(text.lower()):
+        if w not in stop and len(w) > 3:
+            tf[w] = tf.get(w, 0) + 1
+    top = sorted(tf.items(), key=lambda kv: -kv[1])[:25]
+    keywords = [{"text": w, "relevance": round(n / top[0][1], 3), "count": n} for w, n in top]
+    return {"language": lang, "usage": {"text_characters": len(text), "features": 2}, "entities": entities[:50], "keywords": keywords}
+
+@app.get("/fake/config")
+async def get_config() -> Dict[str, Any]:
+    return {**CONFIG, "stats": STATS}
+
+@app.post("/fake/config")
+async def set_config(request: Request) -> Dict[str, Any]:
+    # Change latency / error rate mid-run, e.g. to watch the breaker open and recover
+    for key, value in (await request.json()).items():
+        if key in CONFIG:
+            CONFIG[key] = float(value)
+    return {**CONFIG, "stats": STATS}
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Fake IAM / watsonx.ai / Watson NLU server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=CONFIG["latency_ms"], help="mean latency in ms")
+    parser.add_argument("--jitter", type=float, default=CONFIG["jitter_ms"], help="uniform +/- jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"], help="fraction of 503 responses")
+    parser.add_argument("--hang-rate", type=float, default=CONFIG["hang_rate"], help="fraction of requests that never answer")
+    args = parser.parse_args()
+    CONFIG.update(latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate, hang_rate=args.hang_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
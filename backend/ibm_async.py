@@ -0,0 +1,224 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import httpx
+except Exception:  # optional until the async provider layer is used
+    httpx = None
+
+from backend.ibm_clients import GENERATION_CACHE
+from backend.metrics import PROVIDER_CALLS, span
+from backend.pipeline import stage_deadline
+from backend.resilience import CircuitBreaker, TokenBucket
+
+#Async watsonx.ai / Watson NLU client over their REST APIs, used by the FastAPI
+#app instead of the blocking SDK calls in ibm_clients.py. One pooled httpx client
+#per event loop, an explicit timeout per call, a token bucket per service and a
+#circuit breaker that makes callers fall back immediately while a service is
+#failing. Every method returns None / {} on failure, like IBMProviders.
+#
+#Point WATSONX_URL, WATSON_NLU_URL and IBM_IAM_URL at `python -m backend.fake_ibm`
+#to exercise all of this offline.
+
+WX_API_VERSION = "2023-05-29"
+NLU_API_VERSION = "2021-08-01"
+
+# Pipeline stages that call each service. A call must time out (and count against
+# the breaker) well before the shortest of their deadlines cancels it, leaving
+# room for the rate-limit wait and an IAM token refresh.
+WX_STAGES = ("simplify", "summary", "answer")
+NLU_STAGES = ("nlu",)
+MAX_QUEUE_WAIT = 3.0
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+def _default_timeout(stages) -> float:
+    return max(1.0, 0.5 * min(stage_deadline(s) for s in stages))
+
+class AsyncIBMProviders:
+    def __init__(self):
+        self.wx_apikey = os.getenv("WATSONX_APIKEY")
+        self.wx_url = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com").rstrip("/")
+        self.wx_project = os.getenv("WATSONX_PROJECT_ID")
+        self.model_id = os.getenv("GRANITE_MODEL_ID", "ibm/granite-13b-chat-v2")
+        self.generation_parameters = {
+            "decoding_method": "greedy",
+            "max_new_tokens": 256,
+            "min_new_tokens": 1,
+            "temperature": 0.2,
+            "top_k": 50,
+            "top_p": 1.0,
+        }
+        self.iam_url = os.getenv("IBM_IAM_URL", "https://iam.cloud.ibm.com/identity/token")
+        self.nlu_apikey = os.getenv("WATSON_NLU_APIKEY")
+        self.nlu_url = (os.getenv("WATSON_NLU_URL") or "").rstrip("/")
+
+        self.wx_timeout = _env_float("CLAUSEWISE_WX_TIMEOUT", _default_timeout(WX_STAGES))
+        self.nlu_timeout = _env_float("CLAUSEWISE_NLU_TIMEOUT", _default_timeout(NLU_STAGES))
+        self.max_queue_wait = _env_float("CLAUSEWISE_RATE_MAX_WAIT", MAX_QUEUE_WAIT)
+        self.wx_bucket = TokenBucket(_env_float("CLAUSEWISE_WX_RPS", 8.0), _env_float("CLAUSEWISE_WX_BURST", 8.0))
+        self.nlu_bucket = TokenBucket(_env_float("CLAUSEWISE_NLU_RPS", 10.0), _env_float("CLAUSEWISE_NLU_BURST", 10.0))
+        self.wx_breaker = CircuitBreaker(int(os.getenv("CLAUSEWISE_BREAKER_FAILURES", "5")), _env_float("CLAUSEWISE_BREAKER_RESET", 30.0))
+        self.nlu_breaker = CircuitBreaker(int(os.getenv("CLAUSEWISE_BREAKER_FAILURES", "5")), _env_float("CLAUSEWISE_BREAKER_RESET", 30.0))
+        self.gen_cache = GENERATION_CACHE
+        self.counters = {"wx_calls": 0, "wx_errors": 0, "nlu_calls": 0, "nlu_errors": 0, "rate_limited": 0}
+
+        self._client = None
+        self._client_loop = None
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_task: Optional[asyncio.Task] = None
+
+    def wx_ready(self) -> bool:
+        return bool(self.wx_apikey and self.wx_project and httpx is not None)
+
+    def nlu_ready(self) -> bool:
+        return bool(self.nlu_apikey and self.nlu_url and httpx is not None)
+
+    def wx_available(self) -> bool:
+        # Configured and not short-circuited: worth starting a multi-call job such as map-reduce
+        return self.wx_ready() and self.wx_breaker.available()
+
+    def client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                timeout=httpx.Timeout(self.wx_timeout, connect=5.0),
+            )
+            self._client_loop = loop
+            self._token_task = None
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch_token(self) -> str:
+        resp = await self.client().post(
+            self.iam_url,
+            data={"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": self.wx_apikey},
+            headers={"Accept": "application/json"},
+            timeout=self.wx_timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        self._token = data["access_token"]
+        self._token_expires = time.time() + float(data.get("expires_in", 3600)) - 60
+        return self._token
+
+    async def _iam_token(self) -> str:
+        if self._token and time.time() < self._token_expires:
+            return self._token
+        # One refresh at a time; concurrent callers wait on the same task
+        if self._token_task is None or self._token_task.done():
+            self._token_task = asyncio.ensure_future(self._fetch_token())
+        return await asyncio.shield(self._token_task)
+
+    @staticmethod
+    def _is_service_failure(exc: BaseException) -> bool:
+        # Timeouts, connection errors, 429 and 5xx count against the breaker; other 4xx are our own fault
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code == 429 or exc.response.status_code >= 500
+        return isinstance(exc, httpx.HTTPError)
+
+    async def _guarded(self, breaker: CircuitBreaker, bucket: TokenBucket, call, prefix: str, span_name: str):
+        provider = "watsonx" if prefix == "wx" else prefix
+        if not breaker.allow():
+            PROVIDER_CALLS.inc(provider=provider, outcome="short_circuited")
+            return None
+        try:
+            acquired = await bucket.acquire(max_wait=self.max_queue_wait)
+        except BaseException:
+            breaker.release() # cancelled while queued: the call was never made
+            raise
+        if not acquired:
+            self.counters["rate_limited"] += 1
+            PROVIDER_CALLS.inc(provider=provider, outcome="rate_limited")
+            breaker.release()
+            return None
+        self.counters[f"{prefix}_calls"] += 1
+        try:
+            with span(span_name):
+                result = await call()
+        except asyncio.CancelledError:
+            # The stage deadline expired first: as far as the caller is concerned the service timed out.
+            # Recording it also ends a half-open trial, which would otherwise stay "in flight" forever.
+            self.counters[f"{prefix}_errors"] += 1
+            PROVIDER_CALLS.inc(provider=provider, outcome="cancelled")
+            breaker.record_failure()
+            raise
+        except (httpx.HTTPError, ValueError, KeyError, IndexError) as exc:
+            self.counters[f"{prefix}_errors"] += 1
+            PROVIDER_CALLS.inc(provider=provider, outcome="timeout" if isinstance(exc, httpx.TimeoutException) else "error")
+            if self._is_service_failure(exc):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return None
+        except BaseException:
+            # Not a verdict on the service (a bug on our side, shutdown): free the trial slot and propagate
+            self.counters[f"{prefix}_errors"] += 1
+            PROVIDER_CALLS.inc(provider=provider, outcome="error")
+            breaker.release()
+            raise
+        PROVIDER_CALLS.inc(provider=provider, outcome="ok")
+        breaker.record_success()
+        return result
+
+    async def generate(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        if not self.wx_ready():
+            return None
+        key = self.gen_cache.key(self.model_id, self.generation_parameters, system_prompt, user_prompt)
+        return await self.gen_cache.aget_or_generate(key, lambda: self._generate(system_prompt, user_prompt))
+
+    async def _generate(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        async def call():
+            token = await self._iam_token()
+            resp = await self.client().post(
+                f"{self.wx_url}/ml/v1/text/generation",
+                params={"version": WX_API_VERSION},
+                json={
+                    "model_id": self.model_id,
+                    "project_id": self.wx_project,
+                    "input": f"<|system|>\n{system_prompt}\n<|user|>\n{user_prompt}\n<|assistant|>",
+                    "parameters": self.generation_parameters,
+                },
+                headers={"Authorization": f"Bearer {token}", "Accept": "application/json"},
+                timeout=self.wx_timeout,
+            )
+            resp.raise_for_status()
+            return resp.json()["results"][0].get("generated_text", "")
+        return await self._guarded(self.wx_breaker, self.wx_bucket, call, "wx", "watsonx.generate")
+
+    async def nlu_entities(self, text: str) -> Dict[str, Any]:
+        if not self.nlu_ready():
+            return {}
+
+        async def call():
+            resp = await self.client().post(
+                f"{self.nlu_url}/v1/analyze",
+                params={"version": NLU_API_VERSION},
+                json={
+                    "text": text,
+                    "features": {"entities": {"emotion": False, "sentiment": False, "mentions": True, "limit": 50}, "keywords": {"limit": 25}},
+                },
+                auth=("apikey", self.nlu_apikey),
+                timeout=self.nlu_timeout,
+            )
+            resp.raise_for_status()
+            return resp.json()
+        return await self._guarded(self.nlu_breaker, self.nlu_bucket, call, "nlu", "nlu.analyze") or {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watsonx": {"ready": self.wx_ready(), "breaker": self.wx_breaker.stats(), "bucket": self.wx_bucket.stats()},
+            "nlu": {"ready": self.nlu_ready(), "breaker": self.nlu_breaker.stats(), "bucket": self.nlu_bucket.stats()},
+            **self.counters,
+        }
+
+IBM_ASYNC = AsyncIBMProviders()
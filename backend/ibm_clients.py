@@ -1,105 +1,261 @@
-import os 
-from typing import Optional, Dict, Any
-
-#--- watsonx.ai (Granite) ---
-
-try:
-     from ibm_watsonx_ai import Credentials 
-     from ibm_watsonx_ai.foundation_models import Model 
-except Exception:  # package might not be installed yet 
-    Credentials = None 
-    Model = None
-
-#--- IBM Watson NLU (classic) ---
-
-try: 
-    from ibm_watson import NaturalLanguageUnderstandingV1 
-    from ibm_cloud_sdk_core.authenticators import IAMAuthenticator 
-    from ibm_watson.natural_language_understanding_v1 import Features, EntitiesOptions, KeywordsOptions 
-except Exception: 
-    NaturalLanguageUnderstandingV1 = None 
-    IAMAuthenticator = None
-    Features = None 
-    EntitiesOptions = None
-    KeywordsOptions = None
-
-class IBMProviders: 
-    def __init__(self):
-         # watsonx.ai 
-         self.wx_apikey = os.getenv("WATSONX_APIKEY") 
-         self.wx_url = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com") 
-         self.wx_project = os.getenv("WATSONX_PROJECT_ID") 
-         self.model_id = os.getenv("GRANITE_MODEL_ID", "ibm/granite-13b-chat-v2") 
-         self.generation_parameters = { 
-             "decoding_method": "greedy", 
-             "max_new_tokens": 256, 
-             "min_new_tokens": 1, 
-             "temperature": 0.2, 
-             "top_k": 50, 
-             "top_p": 1.0 
-         } 
-         self._wx_model = None
-
-         # NLU
-         self.nlu_apikey = os.getenv("WATSON_NLU_APIKEY")
-         self.nlu_url = os.getenv("WATSON_NLU_URL")
-         self._nlu_client = None
-
-    def wx_ready(self) -> bool:
-      return bool(self.wx_apikey and self.wx_project and Model is not None)
-
-    def nlu_ready(self) -> bool:
-      return bool(self.nlu_apikey and self.nlu_url and NaturalLanguageUnderstandingV1 is not None)
-    def wx_model(self):
-     if not self.wx_ready():
-        return None
-     if self._wx_model is None:
-        creds = Credentials(self.wx_apikey, self.wx_url)
-        self._wx_model = Model(
-            model_id=self.model_id,
-            credentials=creds,
-            project_id=self.wx_project,
-            params=self.generation_parameters,
-        )
-     return self._wx_model
-
-    def nlu_client(self):
-     if not self.nlu_ready():
-        return None
-     if self._nlu_client is None:
-        auth = IAMAuthenticator(self.nlu_apikey)
-        self._nlu_client = NaturalLanguageUnderstandingV1(version="2021-08-01", authenticator=auth)
-        self._nlu_client.set_service_url(self.nlu_url)
-     return self._nlu_client
-
-# ----- High-level helpers -----
-    def wx_generate(self, system_prompt: str, user_prompt: str) -> Optional[str]:
-     mdl = self.wx_model()
-     if mdl is None:
-        return None
-    # simple chat-style prompt
-     prompt = f"<|system|>\n{system_prompt}\n<|user|>\n{user_prompt}\n<|assistant|>"
-     try:
-        resp = mdl.generate_text(prompt=prompt)
-        if isinstance(resp, dict):
-            return resp.get("results", [{}])[0].get("generated_text", "")
-        # fallback for SDKs that return list
-        if isinstance(resp, list) and resp:
-            return resp[0].get("generated_text", "")
-     except Exception:
-      return None
-     return None
-
-    def nlu_entities(self, text: str) -> Dict[str, Any]:
-     cli = self.nlu_client()
-     if cli is None:
-        return {}
-     try:
-        features = Features(entities=EntitiesOptions(emotion=False, sentiment=False, limit=50),
-                            keywords=KeywordsOptions(limit=25))
-        res = cli.analyze(text=text, features=features, language=None).get_result()
-        return res
-     except Exception:
-        return {}
-
-IBM = IBMProviders()
+import os 
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from backend.cache import MISSING, MemoryTier, SQLiteTier
+from backend.metrics import PROVIDER_CALLS, timed
+from backend.storage import data_path
+
+#--- watsonx.ai (Granite) ---
+
+try:
+     from ibm_watsonx_ai import Credentials 
+     from ibm_watsonx_ai.foundation_models import Model 
+except Exception:  # package might not be installed yet 
+    Credentials = None 
+    Model = None
+
+#--- IBM Watson NLU (classic) ---
+
+try: 
+    from ibm_watson import NaturalLanguageUnderstandingV1 
+    from ibm_cloud_sdk_core.authenticators import IAMAuthenticator 
+    from ibm_watson.natural_language_understanding_v1 import Features, EntitiesOptions, KeywordsOptions 
+except Exception: 
+    NaturalLanguageUnderstandingV1 = None 
+    IAMAuthenticator = None
+    Features = None 
+    EntitiesOptions = None
+    KeywordsOptions = None
+
+#--- Generation cache ---
+#Granite output is cached per (model id, generation parameters, system prompt,
+#user prompt): boilerplate clauses recur across almost every contract. Identical
+#requests already in flight are joined rather than sent again (single-flight),
+#from threads and coroutines alike. Empty/failed generations are never cached.
+#A leader cancelled mid-generation (its stage hit the deadline) hands the key
+#back instead of its CancelledError: the next follower in line generates it.
+
+_ABANDONED = object()
+
+class GenerationCache:
+    def __init__(self, max_entries: int = 2048, ttl: float = 30 * 24 * 3600.0, db_path: Optional[str] = None):
+        self.memory = MemoryTier(max_entries, ttl=0)
+        self.disk = SQLiteTier(db_path, ttl) if db_path else None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "abandoned": 0}
+
+    @staticmethod
+    def key(model_id: str, params: Dict[str, Any], system_prompt: str, user_prompt: str) -> str:
+        payload = json.dumps([model_id, params, system_prompt, user_prompt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is MISSING and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not MISSING:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def _join(self, key: str):
+        # (cached value or MISSING, future, leader?) under the lock
+        with self._lock:
+            value = self.memory.get(key)
+            if value is not MISSING:
+                self._stats["hits"] += 1
+                return value, None, False
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self._stats["coalesced"] += 1
+                return MISSING, fut, False
+            fut = Future()
+            fut.set_running_or_notify_cancel() # a cancelled async follower must not cancel it for everyone
+            self._inflight[key] = fut
+            return MISSING, fut, True
+
+    def _settle(self, key: str, fut: Future, value: Optional[str], exc: Optional[BaseException] = None):
+        if value:
+            self.set(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(value)
+
+    def _abandon(self, key: str, fut: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._stats["abandoned"] += 1
+        fut.set_result(_ABANDONED)
+
+    def _leader_lookup(self, key: str) -> Any:
+        # Disk tier is checked by the leader only, outside the lock
+        value = self.disk.get(key) if self.disk is not None else MISSING
+        with self._lock:
+            self._stats["hits" if value is not MISSING else "misses"] += 1
+        if value is not MISSING:
+            self.memory.set(key, value)
+        return value
+
+    def get_or_generate(self, key: str, fn: Callable[[], Optional[str]]) -> Optional[str]:
+        while True:
+            value, fut, leader = self._join(key)
+            if value is not MISSING:
+                return value
+            if leader:
+                break
+            value = fut.result()
+            if value is not _ABANDONED:
+                return value
+        try:
+            value = self._leader_lookup(key)
+            if value is MISSING:
+                value = fn()
+        except BaseException as exc:
+            self._settle(key, fut, None, exc)
+            raise
+        self._settle(key, fut, value)
+        return value
+
+    async def aget_or_generate(self, key: str, fn: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        while True:
+            value, fut, leader = self._join(key)
+            if value is not MISSING:
+                return value
+            if leader:
+                break
+            value = await asyncio.wrap_future(fut)
+            if value is not _ABANDONED:
+                return value
+        try:
+            value = self._leader_lookup(key)
+            if value is MISSING:
+                value = await fn()
+        except asyncio.CancelledError:
+            self._abandon(key, fut)
+            raise
+        except BaseException as exc:
+            self._settle(key, fut, None, exc)
+            raise
+        self._settle(key, fut, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["inflight"] = len(self._inflight)
+        out["memory_entries"] = len(self.memory)
+        out["disk_enabled"] = self.disk is not None
+        return out
+
+GENERATION_CACHE = GenerationCache(
+    max_entries=int(os.getenv("CLAUSEWISE_GEN_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("CLAUSEWISE_GEN_CACHE_TTL", str(30 * 24 * 3600))),
+    db_path=data_path("CLAUSEWISE_GEN_CACHE_DB", "generations.db") or None,
+)
+
+class IBMProviders: 
+    def __init__(self):
+         # watsonx.ai 
+         self.wx_apikey = os.getenv("WATSONX_APIKEY") 
+         self.wx_url = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com") 
+         self.wx_project = os.getenv("WATSONX_PROJECT_ID") 
+         self.model_id = os.getenv("GRANITE_MODEL_ID", "ibm/granite-13b-chat-v2") 
+         self.generation_parameters = { 
+             "decoding_method": "greedy", 
+             "max_new_tokens": 256, 
+             "min_new_tokens": 1, 
+             "temperature": 0.2, 
+             "top_k": 50, 
+             "top_p": 1.0 
+         } 
+         self._wx_model = None
+         self.gen_cache = GENERATION_CACHE
+
+         # NLU
+         self.nlu_apikey = os.getenv("WATSON_NLU_APIKEY")
+         self.nlu_url = os.getenv("WATSON_NLU_URL")
+         self._nlu_client = None
+
+    def wx_ready(self) -> bool:
+      return bool(self.wx_apikey and self.wx_project and Model is not None)
+
+    def nlu_ready(self) -> bool:
+      return bool(self.nlu_apikey and self.nlu_url and NaturalLanguageUnderstandingV1 is not None)
+    def wx_model(self):
+     if not self.wx_ready():
+        return None
+     if self._wx_model is None:
+        creds = Credentials(self.wx_apikey, self.wx_url)
+        self._wx_model = Model(
+            model_id=self.model_id,
+            credentials=creds,
+            project_id=self.wx_project,
+            params=self.generation_parameters,
+        )
+     return self._wx_model
+
+    def nlu_client(self):
+     if not self.nlu_ready():
+        return None
+     if self._nlu_client is None:
+        auth = IAMAuthenticator(self.nlu_apikey)
+        self._nlu_client = NaturalLanguageUnderstandingV1(version="2021-08-01", authenticator=auth)
+        self._nlu_client.set_service_url(self.nlu_url)
+     return self._nlu_client
+
+# ----- High-level helpers -----
+    def wx_generate(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+     if not self.wx_ready():
+        return None
+     key = self.gen_cache.key(self.model_id, self.generation_parameters, system_prompt, user_prompt)
+     return self.gen_cache.get_or_generate(key, lambda: self._wx_generate_uncached(system_prompt, user_prompt))
+
+    @timed("watsonx.generate")
+    def _wx_generate_uncached(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+     mdl = self.wx_model()
+     if mdl is None:
+        return None
+    # simple chat-style prompt
+     prompt = f"<|system|>\n{system_prompt}\n<|user|>\n{user_prompt}\n<|assistant|>"
+     try:
+        resp = mdl.generate_text(prompt=prompt)
+        PROVIDER_CALLS.inc(provider="watsonx", outcome="ok")
+        if isinstance(resp, dict):
+            return resp.get("results", [{}])[0].get("generated_text", "")
+        # fallback for SDKs that return list
+        if isinstance(resp, list) and resp:
+            return resp[0].get("generated_text", "")
+     except Exception:
+      PROVIDER_CALLS.inc(provider="watsonx", outcome="error")
+      return None
+     return None
+
+    @timed("nlu.analyze")
+    def nlu_entities(self, text: str) -> Dict[str, Any]:
+     cli = self.nlu_client()
+     if cli is None:
+        return {}
+     try:
+        features = Features(entities=EntitiesOptions(emotion=False, sentiment=False, limit=50),
+                            keywords=KeywordsOptions(limit=25))
+        res = cli.analyze(text=text, features=features, language=None).get_result()
+        PROVIDER_CALLS.inc(provider="nlu", outcome="ok")
+        return res
+     except Exception:
+        PROVIDER_CALLS.inc(provider="nlu", outcome="error")
+        return {}
+
+IBM = IBMProviders()
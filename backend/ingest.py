@@ -0,0 +1,278 @@
+import codecs
+import hashlib
+import heapq
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.dates import RENEWAL_CONTEXT, parse_date
+from backend.risk_engine import get_engine
+from backend.utils import (
+    CLAUSE_SPLIT_REGEX, CONTRACT_KEYWORDS, DATE_REGEX, DURATION_REGEX, MONEY_REGEX, STOPWORDS, WORD_REGEX,
+    detect_language,
+)
+
+#Bounded-memory ingestion for very large uploads. Starlette already spools an
+#UploadFile to disk past 1 MB; spool_upload() hashes it in chunks without reading
+#it into one bytes object, and SpooledUpload.chunks() decodes it incrementally.
+#The *Stream classes consume those chunks and emit sentences, clauses and regex
+#hits as soon as they are final, holding back only a short tail in case a match
+#continues into the next chunk. Peak memory is a few chunks plus the outputs.
+
+CHUNK_SIZE = 1 << 20
+LARGE_DOC_BYTES = int(os.getenv("CLAUSEWISE_LARGE_DOC_BYTES", str(4 << 20)))
+SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[.!?।])\s+|\n+")
+HOLDBACK = 4096 # longest match any streamed pattern is expected to produce
+CONTEXT = 64 # chars kept before the scan position for lookbehinds and alert context
+SAMPLE_CHARS = 20000
+
+class SpooledUpload:
+    __slots__ = ("digest", "size", "fileobj")
+
+    def __init__(self, digest: str, size: int, fileobj: BinaryIO):
+        self.digest = digest
+        self.size = size
+        self.fileobj = fileobj
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        # Text in chunks; a multi-byte character split across reads is completed by the decoder
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.fileobj.seek(0)
+        while True:
+            raw = self.fileobj.read(chunk_size)
+            if not raw:
+                break
+            text = decoder.decode(raw)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def sample(self, chars: int = SAMPLE_CHARS) -> str:
+        self.fileobj.seek(0)
+        return self.fileobj.read(chars * 4).decode("utf-8", errors="ignore")[:chars]
+
+    def read_text(self) -> str:
+        self.fileobj.seek(0)
+        return self.fileobj.read().decode("utf-8", errors="ignore")
+
+async def spool_upload(file, chunk_size: int = CHUNK_SIZE) -> SpooledUpload:
+    h = hashlib.sha256()
+    size = 0
+    await file.seek(0)
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        h.update(chunk)
+        size += len(chunk)
+    await file.seek(0)
+    return SpooledUpload(h.hexdigest(), size, file.file)
+
+class SplitStream:
+    # Streaming re.split: feed() returns the (start, end, text) segments between separators that are now final
+    # keep_separators also collects each separator's (start, end, text) in separator_spans, for the caller to drain
+    def __init__(self, pattern, holdback: int = HOLDBACK, strip: bool = True, keep_separators: bool = False):
+        self.pattern = pattern
+        self.holdback = holdback
+        self.strip = strip
+        self.keep_separators = keep_separators
+        self.buf = ""
+        self.base = 0 # absolute offset of buf[0]
+        self.scan_from = 0
+        self.separators = 0
+        self.separator_spans: List[Tuple[int, int, str]] = []
+
+    def _segment(self, s: int, e: int) -> Optional[Tuple[int, int, str]]:
+        buf = self.buf
+        if self.strip:
+            while s < e and buf[s].isspace():
+                s += 1
+            while e > s and buf[e - 1].isspace():
+                e -= 1
+        if e <= s:
+            return None
+        return self.base + s, self.base + e, buf[s:e]
+
+    def feed(self, chunk: str, final: bool = False) -> List[Tuple[int, int, str]]:
+        self.buf += chunk
+        limit = len(self.buf) if final else len(self.buf) - self.holdback
+        out = []
+        seg = 0
+        resume = None
+        for m in self.pattern.finditer(self.buf, self.scan_from):
+            if m.end() > limit or m.end() == m.start():
+                resume = m.start()
+                break
+            item = self._segment(seg, m.start())
+            if item is not None:
+                out.append(item)
+            seg = m.end()
+            self.separators += 1
+            if self.keep_separators:
+                self.separator_spans.append((self.base + m.start(), self.base + m.end(), m.group()))
+        if final:
+            item = self._segment(seg, len(self.buf))
+            if item is not None:
+                out.append(item)
+            seg = len(self.buf)
+        if resume is None:
+            resume = max(seg, limit)
+        self.buf = self.buf[seg:]
+        self.base += seg
+        self.scan_from = max(0, resume - seg)
+        return out
+
+    def close(self) -> List[Tuple[int, int, str]]:
+        return self.feed("", final=True)
+
+class RegexStream:
+    # Streaming finditer: feed() returns (start, end, text, context, lastgroup) for matches that can no longer grow
+    def __init__(self, pattern, holdback: int = HOLDBACK, context: int = 0):
+        self.pattern = pattern
+        self.holdback = max(holdback, context)
+        self.context = context
+        self.buf = ""
+        self.base = 0
+        self.scan_from = 0
+
+    def feed(self, chunk: str, final: bool = False) -> List[Tuple[int, int, str, str, Optional[str]]]:
+        self.buf += chunk
+        buf = self.buf
+        limit = len(buf) if final else len(buf) - self.holdback
+        out = []
+        resume = None
+        for m in self.pattern.finditer(buf, self.scan_from):
+            if m.end() > limit:
+                resume = m.start()
+                break
+            s, e = m.start(), m.end()
+            ctx = buf[max(0, s - self.context):e + self.context] if self.context else ""
+            out.append((self.base + s, self.base + e, m.group(0), ctx, m.lastgroup))
+        if resume is None:
+            resume = max(self.scan_from, limit, out[-1][1] - self.base if out else 0)
+        cut = max(0, resume - CONTEXT - self.context)
+        self.buf = buf[cut:]
+        self.base += cut
+        self.scan_from = resume - cut
+        return out
+
+    def close(self):
+        return self.feed("", final=True)
+
+def _drain(stream, chunks: Iterable[str]) -> Iterator:
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+def iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    # Same sentences as sentence_tokenize(), without materialising the text
+    for _, _, s in _drain(SplitStream(SENTENCE_SPLIT_REGEX), chunks):
+        yield s
+
+def iter_clauses(chunks: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+    # Same (start, end, text) clauses as clause_spans(). Its blank-line fallback only
+    # applies to all-whitespace text, which yields nothing either way.
+    yield from _drain(SplitStream(CLAUSE_SPLIT_REGEX), chunks)
+
+def analyze_stream(upload: SpooledUpload, lang: Optional[str] = None, max_sentences: int = 6,
+                   packs: Optional[List[str]] = None) -> Dict[str, Any]:
+    # Local /analyze stages over a spooled upload: one pass for clauses, regexes and term
+    # frequencies, one more to pick summary sentences
+    if lang is None:
+        lang = detect_language(upload.sample())
+    stop = STOPWORDS.get(lang, STOPWORDS["en"])
+    engine = get_engine(packs)
+    dates, money = RegexStream(DATE_REGEX), RegexStream(MONEY_REGEX)
+    durations = RegexStream(DURATION_REGEX, context=60)
+    sentences = SplitStream(SENTENCE_SPLIT_REGEX)
+    clause_split = SplitStream(CLAUSE_SPLIT_REGEX, keep_separators=True)
+    found: set = set()
+    keywords = [k for _, ks in CONTRACT_KEYWORDS for k in ks]
+    tail = ""
+    tf: Dict[str, int] = {}
+    clauses: List[str] = []
+    hits: List[Dict[str, Any]] = []
+    date_hits: List[str] = []
+    money_hits: Dict[str, None] = {}
+    duration_hits: Dict[str, None] = {}
+    renewals: List[Dict[str, Any]] = []
+
+    def feed(chunk: str, final: bool):
+        for s, e, text in clause_split.feed(chunk, final):
+            # Risk rules stop at newlines and clause headings are lines of their own, so scanning each
+            # finished clause and each heading gives the same (possibly overlapping) hits as
+            # RiskEngine.scan on the whole text; headings belong to no clause (-1)
+            for hit in engine.scan(text):
+                hit.update(start=hit["start"] + s, end=hit["end"] + s, clause=len(clauses))
+                hits.append(hit)
+            clauses.append(text)
+        for s, e, text in clause_split.separator_spans:
+            for hit in engine.scan(text):
+                hit.update(start=hit["start"] + s, end=hit["end"] + s, clause=-1)
+                hits.append(hit)
+        clause_split.separator_spans.clear()
+        for _, _, sent in sentences.feed(chunk, final):
+            for w in WORD_REGEX.findall(sent.lower()):
+                if w not in stop and len(w) > 2:
+                    w = sys.intern(w)
+                    tf[w] = tf.get(w, 0) + 1
+        date_hits.extend(t for _, _, t, _, _ in dates.feed(chunk, final))
+        money_hits.update((t, None) for _, _, t, _, _ in money.feed(chunk, final))
+        for _, _, t, ctx, _ in durations.feed(chunk, final):
+            duration_hits[t] = None
+            if RENEWAL_CONTEXT.search(ctx):
+                renewals.append({"type": "renewal-window", "duration": t, "context": ctx.strip()})
+
+    for chunk in upload.chunks():
+        low = tail + chunk.lower()
+        found.update(k for k in keywords if k in low)
+        tail = low[-16:]
+        feed(chunk, False)
+    feed("", True)
+    hits.sort(key=lambda h: h["start"]) # heading hits were collected apart from the clauses around them
+
+    # Second pass: score sentences against the finished term frequencies, keeping only the top few
+    top: List[Tuple[float, int, str]] = []
+    first: List[str] = []
+    for i, s in enumerate(iter_sentences(upload.chunks())):
+        if len(first) < max_sentences:
+            first.append(s)
+        words = [w for w in WORD_REGEX.findall(s.lower()) if w in tf]
+        if not words:
+            continue
+        score = sum(tf[w] for w in words) / (len(words) + 1)
+        item = (score, -i, s)
+        if len(top) < max_sentences:
+            heapq.heappush(top, item)
+        elif item > top[0]:
+            heapq.heapreplace(top, item)
+    summary = " ".join(s for _, _, s in sorted(top, key=lambda x: -x[1])) if tf else " ".join(first)
+
+    alerts = []
+    now = datetime.now()
+    for d in date_hits:
+        when = parse_date(d)
+        if when is not None and now <= when <= now + timedelta(days=60):
+            alerts.append({"type": "deadline", "when": when.isoformat(), "excerpt": d})
+    alerts.extend(renewals)
+
+    contract_type = "General Contract"
+    for label, ks in CONTRACT_KEYWORDS:
+        if any(k in found for k in ks):
+            contract_type = label
+            break
+
+    return {
+        "language": lang,
+        "contract_type": contract_type,
+        "clauses": clauses,
+        "summary": summary,
+        "entities": {"dates": list(dict.fromkeys(date_hits)), "money": list(money_hits), "durations": list(duration_hits)},
+        "risks": engine.labels(hits),
+        "risk_hits": hits,
+        "alerts": alerts,
+    }
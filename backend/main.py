@@ -1,122 +1,469 @@
-from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect 
-from fastapi.middleware.cors import CORSMiddleware 
-from fastapi.staticfiles import StaticFiles 
-from typing import Optional 
-import asyncio
-
-from backend.utils import ( 
-    extract_clauses, classify_contract, summarize_extract, keyword_qa, find_entities_regex, detect_risks, upcoming_alerts, detect_language, compare_contracts 
-    )
-from backend.collab_manager import COLLAB
-from backend.ibm_clients import IBMProviders
-
-app = FastAPI(title="ClauseWise  IBM Watson/Granite (No HF/Torch)")
-
-app.add_middleware( 
-    CORSMiddleware, 
-    allow_origins=["*"], 
-    allow_credentials=True, 
-    allow_methods=["*"], 
-    allow_headers=["*"], )
-
-#You can mount static assets if you add an HTML collab page
-
-app.mount("/static", 
-          StaticFiles(directory="frontend"), 
-          name="static"
-         )
-
-#---- Helpers that use IBM Granite when available ----
-
-def summarise(text: str) -> str: 
-    g = IBMProviders.wx_generate( 
-        system_prompt="You are a legal assistant. Summarize the contract in 5-7 bullet points in the same language as the input.", 
-        user_prompt=text[:12000] 
-    ) 
-    return g or summarize_extract(text, max_sentences=6)
-
-def simplify_clause(clause: str) -> str: 
-    g = IBMProviders.wx_generate(
-         system_prompt="Rewrite the clause in simpler, layman-friendly language while preserving legal meaning.", 
-         user_prompt=clause[:4000] 
-    ) 
-    return g or clause
-
-def answer_llm(context: str, question: str) -> str: 
-    g = IBMProviders.wx_generate( 
-        system_prompt="Answer strictly using the provided contract text. If unknown, say 'Not found in document.'", 
-        user_prompt=f"Contract:\n{context[:10000]}\n\nQuestion: {question}" 
-    ) 
-    return g or keyword_qa(context, question)
-
-@app.post("/analyze") 
-async def analyze(file: UploadFile = File(...)): 
-    text = (await file.read()).decode("utf-8", errors="ignore") 
-    lang = detect_language(text) 
-    clauses = extract_clauses(text) 
-    contract_type = classify_contract(text) 
-    summary = summarise(text) # Entities: try IBM NLU first, fallback to regex 
-    
-    nlu = IBMProviders.nlu_entities(text) 
-    
-    entities = nlu.get("entities") if nlu else None 
-    
-    entities_out = nlu if nlu else find_entities_regex(text) 
-    risks = detect_risks(text) 
-    alerts = upcoming_alerts(text) # Simplify top clauses 
-    
-    simplified = [simplify_clause(c) for c in clauses[:5]] 
-    return {
-         "language": lang, 
-         "contract_type": contract_type, 
-         "clauses": clauses, 
-         "simplified_examples": simplified, 
-         "summary": summary, 
-         "entities": entities_out, 
-         "risks": risks, 
-         "alerts": alerts, 
-         "uses_granite": IBMProviders.wx_ready(), 
-         "uses_watson_nlu": IBMProviders.nlu_ready(), 
-         }
-
-@app.post("/ask") 
-async def ask(file: UploadFile = File(...), question: str = Form(...)): 
-    text = (await file.read()).decode("utf-8", errors="ignore") 
-    ans = answer_llm(text, question) 
-    return {"answer": ans}
-
-@app.post("/compare") 
-async def compare(file_a: UploadFile = File(...), file_b: UploadFile = File(...)):
-     a = (await file_a.read()).decode("utf-8", errors="ignore") 
-     b = (await file_b.read()).decode("utf-8", errors="ignore") 
-     result = compare_contracts(a, b) 
-     return result
-
-#-------- Real-time Collaboration via WebSockets --------
-
-@app.websocket("/ws/{room_id}")
-async def ws_endpoint(ws: WebSocket, room_id: str): 
-    await ws.accept() 
-    await COLLAB.join(room_id, ws) 
-    try: 
-        while True: 
-            data = await ws.receive_json()
-            mtype = data.get("type") 
-            if mtype == "document": 
-                await COLLAB.update_document(room_id, data.get("payload", ""))
-            elif mtype == "chat": 
-                await COLLAB.add_chat(room_id, data.get("user", "anon"), data.get("payload", ""))
-    except WebSocketDisconnect: 
-        await COLLAB.leave(room_id, ws)
-
-async def alert_broadcaster(): 
-    while True: 
-        for room_id, room in COLLAB.rooms.items(): 
-            await COLLAB.broadcast(room_id, {"type": "alert", "payload": {"message": "Smart alert: check upcoming deadlines in 60 days."}}) 
-        await asyncio.sleep(30)
-
-@app.on_event("startup") 
-async def startup_event(): 
-    asyncio.create_task(alert_broadcaster()
-    )
-
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, WebSocket, WebSocketDisconnect 
+from fastapi.middleware.cors import CORSMiddleware 
+from fastapi.staticfiles import StaticFiles 
+from fastapi.responses import PlainTextResponse, StreamingResponse 
+from typing import Any, Dict, List, Optional, Tuple 
+import asyncio
+import functools
+import json
+import time
+
+from backend.utils import ( 
+    extract_clauses, classify_contract, summarize_extract, find_entities_regex, risk_hits, risk_labels, upcoming_alerts, warm_language_detector, compare_contracts, DocumentIndex, Doc 
+    )
+from backend.cache import ANALYSIS_CACHE, MISSING
+from backend.pipeline import Degraded, StageResult, run_stage, in_executor
+from backend.batch import BATCH_MAX_UPLOAD_BYTES, BatchManager, BatchTooLarge, read_batch_files, shutdown_pools
+from backend.summarize import map_reduce_summary
+from backend.nlu import chunked_nlu, streamed_nlu
+from backend.ingest import LARGE_DOC_BYTES, SpooledUpload, analyze_stream, spool_upload
+from backend.doc_store import DOC_STORE, StoredDocument
+from backend.corpus import CORPUS
+from backend.diff import diff_page, iter_hunks
+from backend.collab_manager import COLLAB
+from backend.deadline_scheduler import DeadlineScheduler
+from backend.ibm_async import IBM_ASYNC as IBM
+from backend import metrics
+
+app = FastAPI(title="ClauseWise  IBM Watson/Granite (No HF/Torch)")
+
+app.add_middleware( 
+    CORSMiddleware, 
+    allow_origins=["*"], 
+    allow_credentials=True, 
+    allow_methods=["*"], 
+    allow_headers=["*"], 
+    expose_headers=["Server-Timing", "X-Profile-Id"], )
+
+@app.middleware("http") 
+async def timing_middleware(request: Request, call_next): 
+    # Spans recorded while serving the request come back as Server-Timing; X-Profile: 1 samples it when profiling is enabled 
+    token, timings = metrics.start_request() 
+    profiler = None 
+    if metrics.PROFILING_ENABLED and request.headers.get("x-profile") == "1": 
+        profiler = metrics.SamplingProfiler() 
+        profiler.start() 
+    start = time.perf_counter() 
+    try: 
+        response = await call_next(request) 
+    finally: 
+        metrics.end_request(token) 
+    total = time.perf_counter() - start 
+    route = request.scope.get("route") 
+    metrics.HTTP_SECONDS.observe(total, method=request.method, route=getattr(route, "path", "unmatched"), status=response.status_code) 
+    response.headers["Server-Timing"] = metrics.server_timing(timings, total) 
+    if profiler is not None: 
+        response.headers["X-Profile-Id"] = metrics.keep_profile(profiler.stop()) 
+    return response
+
+#You can mount static assets if you add an HTML collab page
+
+app.mount("/static", 
+          StaticFiles(directory="frontend"), 
+          name="static"
+         )
+
+#---- Helpers that use IBM Granite when available ----
+
+async def granite(system_prompt: str, user_prompt: str) -> Optional[str]: 
+    # Rate-limited, circuit-broken and cached; None means "use the local heuristic" 
+    return await IBM.generate(system_prompt, user_prompt)
+
+async def summarise(doc: Doc) -> str: 
+    # Map-reduce over clause-aligned chunks, so the whole contract is summarised, not just its first pages. 
+    # Local passes go to the stage pool: this coroutine runs on the event loop 
+    if not IBM.wx_available(): 
+        raise Degraded(await in_executor(summarize_extract, doc, 6), "granite unavailable") 
+    clauses = await in_executor(extract_clauses, doc) 
+    summary = await map_reduce_summary(clauses, granite) 
+    if not summary: 
+        raise Degraded(await in_executor(summarize_extract, doc, 6), "empty summary") 
+    return summary
+
+async def simplify_clause(clause: str) -> str: 
+    g = await granite(
+         system_prompt="Rewrite the clause in simpler, layman-friendly language while preserving legal meaning.", 
+         user_prompt=clause[:4000] 
+    ) 
+    if not g: 
+        raise Degraded(clause, "granite unavailable") 
+    return g
+
+async def answer_llm(doc: StoredDocument, question: str) -> str: 
+    # Send the BM25 top-k clauses instead of whatever happens to be in the first 10k characters 
+    context = doc.retriever.context(question, budget=10000) or doc.text[:10000] 
+    g = await granite( 
+        system_prompt="Answer strictly using the provided contract text. If unknown, say 'Not found in document.'", 
+        user_prompt=f"Contract:\n{context}\n\nQuestion: {question}" 
+    ) 
+    if not g: 
+        raise Degraded(doc.retriever.answer(question), "granite unavailable") 
+    return g
+
+async def read_upload(file: UploadFile) -> Tuple[str, str]: 
+    # Hashed in chunks from Starlette's spooled file, then decoded whole: callers build a DocumentIndex, 
+    # BM25 index or diff over the full text. Only /analyze uploads over LARGE_DOC_BYTES are streamed (analyze_large) 
+    upload = await spool_upload(file) 
+    return upload.digest, upload.read_text()
+
+async def read_input(file: Optional[UploadFile], doc_id: Optional[str], name: str = "file") -> Tuple[str, str]: 
+    # A fresh upload or a document stored via POST /documents (its doc_id is the content digest, so caches are shared) 
+    if doc_id: 
+        doc = DOC_STORE.get(doc_id) 
+        if doc is None: 
+            raise HTTPException(status_code=404, detail="Unknown document id") 
+        return doc.doc_id, doc.text 
+    if file is None: 
+        raise HTTPException(status_code=400, detail=f"Provide {name} or its doc_id") 
+    return await read_upload(file)
+
+def cached(digest: str, stage: str, fn, *args): 
+    return ANALYSIS_CACHE.get_or_compute(digest, stage, lambda: fn(*args))
+
+def document_index(digest: str, text: str) -> DocumentIndex: 
+    # Memory tier only (not JSON-serialisable); the language is restored from its own stage entry 
+    index = cached(digest, "index", DocumentIndex, text) 
+    if not index.has_language: 
+        lang = ANALYSIS_CACHE.get(digest, "language") 
+        if lang is not MISSING: 
+            index.lang = lang 
+    return index
+
+async def cached_stage(digest: str, stage: str, fn, *args, fallback=None) -> StageResult: 
+    # Degraded values (deadline fallbacks, or a stage raising Degraded) are returned but never cached, 
+    # so the next request retries the real stage 
+    hit = ANALYSIS_CACHE.get(digest, stage) 
+    if hit is not MISSING: 
+        return StageResult(stage, hit) 
+    res = await run_stage(stage, fn, *args, fallback=fallback) 
+    if not res.degraded: 
+        ANALYSIS_CACHE.set(digest, stage, res.value) 
+    return res
+
+async def analyze_large(upload: SpooledUpload) -> Dict[str, Any]: 
+    # Streaming path for uploads over LARGE_DOC_BYTES: the text is never held in memory as a whole 
+    digest = upload.digest 
+    local = ANALYSIS_CACHE.get(digest, "stream") 
+    if local is MISSING: 
+        local = await in_executor(analyze_stream, upload) 
+        ANALYSIS_CACHE.set(digest, "stream", local) 
+    top = local["clauses"][:5] 
+    summary, nlu, *simplified = await asyncio.gather( 
+        cached_stage(digest, "summary", map_reduce_summary, local["clauses"], granite, fallback=lambda: local["summary"]) if IBM.wx_available() 
+        else asyncio.sleep(0, StageResult("summary", local["summary"])), 
+        cached_stage(digest, "nlu", streamed_nlu, upload, IBM.nlu_entities, fallback=lambda: {}) if IBM.nlu_ready() 
+        else asyncio.sleep(0, StageResult("nlu", {})), 
+        *[cached_stage(digest, f"simplify:{i}", simplify_clause, c, fallback=functools.partial(lambda c: c, c)) for i, c in enumerate(top)], 
+    ) 
+    stages = [summary, nlu, *simplified] 
+    return {
+         **local, 
+         "simplified_examples": [s.value for s in simplified], 
+         "summary": summary.value, 
+         "entities": nlu.value if nlu.value else local["entities"], # regex entities from the streamed pass otherwise 
+         "uses_granite": IBM.wx_ready(), 
+         "uses_watson_nlu": IBM.nlu_ready(), 
+         "streamed": True, 
+         "degraded": {s.name: s.reason for s in stages if s.degraded}, 
+         }
+
+@app.post("/analyze") 
+async def analyze(file: Optional[UploadFile] = File(None), doc_id: Optional[str] = Form(None)): 
+    if doc_id or file is None: 
+        digest, text = await read_input(file, doc_id) 
+    else: 
+        upload = await spool_upload(file) 
+        if upload.size > LARGE_DOC_BYTES: 
+            return await analyze_large(upload) 
+        digest, text = upload.digest, upload.read_text() 
+    index = document_index(digest, text) 
+    lang, contract_type = await asyncio.gather( 
+        cached_stage(digest, "language", lambda: index.lang, fallback=lambda: "en"), 
+        cached_stage(digest, "contract_type", classify_contract, text, fallback=lambda: "General Contract"), 
+    ) 
+    index.lang = lang.value 
+    clauses = await cached_stage(digest, "clauses", index.clauses, fallback=lambda: []) 
+    # Independent stages fan out together: wall-clock is the slowest stage, not the sum 
+    top = clauses.value[:5] 
+    summary, nlu, risks, alerts, *simplified = await asyncio.gather( 
+        cached_stage(digest, "summary", summarise, index, fallback=lambda: summarize_extract(index, max_sentences=6)), 
+        cached_stage(digest, "nlu", chunked_nlu, text, IBM.nlu_entities, fallback=lambda: {}) if IBM.nlu_ready() 
+        else asyncio.sleep(0, StageResult("nlu", {})), 
+        cached_stage(digest, "risk_hits", risk_hits, index, fallback=lambda: []), 
+        run_stage("alerts", upcoming_alerts, index, fallback=lambda: []), # alerts depend on today's date so they are not cached 
+        *[cached_stage(digest, f"simplify:{i}", simplify_clause, c, fallback=functools.partial(lambda c: c, c)) for i, c in enumerate(top)], 
+    ) 
+    
+    # Entities: IBM NLU first, fallback to regex 
+    entities_out = nlu.value if nlu.value else cached(digest, "entities", find_entities_regex, index) 
+    stages = [lang, clauses, contract_type, summary, nlu, risks, alerts, *simplified] 
+    return {
+         "language": lang.value, 
+         "contract_type": contract_type.value, 
+         "clauses": clauses.value, 
+         "simplified_examples": [s.value for s in simplified], 
+         "summary": summary.value, 
+         "entities": entities_out, 
+         "risks": risk_labels(risks.value), 
+         "risk_hits": risks.value, 
+         "alerts": alerts.value, 
+         "uses_granite": IBM.wx_ready(), 
+         "uses_watson_nlu": IBM.nlu_ready(), 
+         "degraded": {s.name: s.reason for s in stages if s.degraded}, 
+         }
+
+#-------- Batch analysis --------
+
+async def batch_remote(digest: str, text: str, local: Dict[str, Any]) -> Dict[str, Any]: 
+    # Shares cache entries with /analyze; the provider's token bucket paces the whole batch 
+    out: Dict[str, Any] = {"uses_granite": IBM.wx_ready(), "uses_watson_nlu": IBM.nlu_ready()} 
+    if IBM.wx_available(): 
+        summary, *simplified = await asyncio.gather( 
+            cached_stage(digest, "summary", map_reduce_summary, local["clauses"], granite, fallback=lambda: local["summary"]), 
+            *[cached_stage(digest, f"simplify:{i}", simplify_clause, c, fallback=functools.partial(lambda c: c, c)) for i, c in enumerate(local["clauses"][:5])], 
+        ) 
+        out["summary"] = summary.value 
+        out["simplified_examples"] = [s.value for s in simplified] 
+    if IBM.nlu_ready(): 
+        nlu = await cached_stage(digest, "nlu", chunked_nlu, text, IBM.nlu_entities, fallback=lambda: {}) 
+        if nlu.value: 
+            out["entities"] = nlu.value 
+    return out
+
+BATCH = BatchManager(remote=batch_remote)
+
+@app.post("/analyze/batch") 
+async def analyze_batch(files: List[UploadFile] = File(...)): 
+    # Many .txt files and/or .zip archives; poll or stream the results by job id 
+    uploads = [] 
+    for i, f in enumerate(files): 
+        # Starlette has spooled the upload already; read at most one byte past the limit 
+        raw = await f.read(BATCH_MAX_UPLOAD_BYTES + 1) 
+        if len(raw) > BATCH_MAX_UPLOAD_BYTES: 
+            raise HTTPException(status_code=413, detail=f"{f.filename or f'file-{i}'} is larger than {BATCH_MAX_UPLOAD_BYTES} bytes") 
+        uploads.append((f.filename or f"file-{i}", raw)) 
+    try: 
+        items = await in_executor(read_batch_files, uploads) # inflating archives must not block the loop 
+    except BatchTooLarge as exc: 
+        raise HTTPException(status_code=413, detail=f"Batch too large: {exc}") 
+    except Exception as exc: 
+        raise HTTPException(status_code=400, detail=f"Unreadable archive: {exc}") 
+    if not items: 
+        raise HTTPException(status_code=400, detail="No files to analyze") 
+    job = BATCH.submit(items) 
+    return job.status()
+
+def batch_job(job_id: str): 
+    job = BATCH.get(job_id) 
+    if job is None: 
+        raise HTTPException(status_code=404, detail="Unknown batch job") 
+    return job
+
+@app.get("/analyze/batch/{job_id}") 
+async def analyze_batch_status(job_id: str): 
+    return batch_job(job_id).status()
+
+@app.get("/analyze/batch/{job_id}/results") 
+async def analyze_batch_results(job_id: str, offset: int = 0, limit: int = 100, stream: bool = False): 
+    # stream=true sends every item from offset as NDJSON as soon as it completes, until the job ends 
+    job = batch_job(job_id) 
+    if stream: 
+        lines = (json.dumps(item, ensure_ascii=False) + "\n" async for item in job.follow(offset)) 
+        return StreamingResponse(lines, media_type="application/x-ndjson") 
+    return {**job.status(), "offset": offset, "items": job.items[offset:offset + limit]}
+
+async def store_upload(file: UploadFile) -> StoredDocument: 
+    digest, text = await read_upload(file) 
+    doc = DOC_STORE.get(digest) 
+    if doc is None: 
+        doc = await in_executor(DOC_STORE.put, digest, document_index(digest, text)) 
+    return doc
+
+@app.post("/documents") 
+async def upload_document(file: UploadFile = File(...)): 
+    doc = await store_upload(file) 
+    return doc.meta()
+
+@app.get("/documents/{doc_id}") 
+async def get_document(doc_id: str): 
+    doc = DOC_STORE.get(doc_id) 
+    if doc is None: 
+        raise HTTPException(status_code=404, detail="Unknown document id") 
+    return doc.meta()
+
+@app.delete("/documents/{doc_id}") 
+async def delete_document(doc_id: str): 
+    return {"deleted": DOC_STORE.delete(doc_id)}
+
+@app.post("/ask") 
+async def ask(question: str = Form(...), file: Optional[UploadFile] = File(None), doc_id: Optional[str] = Form(None)): 
+    # Either upload the contract or reference one stored via POST /documents 
+    if doc_id: 
+        doc = DOC_STORE.get(doc_id) 
+        if doc is None: 
+            raise HTTPException(status_code=404, detail="Unknown document id") 
+    elif file is not None: 
+        doc = await store_upload(file) 
+    else: 
+        raise HTTPException(status_code=400, detail="Provide a file or a doc_id") 
+    res = await run_stage("answer", answer_llm, doc, question, fallback=lambda: doc.retriever.answer(question)) 
+    return {"answer": res.value, "doc_id": doc.doc_id, "degraded": res.degraded}
+
+@app.post("/compare") 
+async def compare(file_a: Optional[UploadFile] = File(None), file_b: Optional[UploadFile] = File(None), diff_mode: str = Form("auto"), 
+                  doc_id_a: Optional[str] = Form(None), doc_id_b: Optional[str] = Form(None)):
+     digest_a, a = await read_input(file_a, doc_id_a, "file_a") 
+     digest_b, b = await read_input(file_b, doc_id_b, "file_b") 
+     result = await in_executor(compare_contracts, document_index(digest_a, a), document_index(digest_b, b), diff_mode) 
+     return result
+
+@app.post("/compare/diff") 
+async def compare_diff(file_a: Optional[UploadFile] = File(None), file_b: Optional[UploadFile] = File(None), 
+                       offset: int = Form(0), limit: int = Form(50), stream: bool = Form(False), 
+                       doc_id_a: Optional[str] = Form(None), doc_id_b: Optional[str] = Form(None)): 
+    # Clause-level diff, paginated by hunk; stream=true sends every hunk from offset as NDJSON 
+    if offset < 0: 
+        raise HTTPException(status_code=400, detail="offset must be >= 0") 
+    if limit <= 0 and not stream: 
+        raise HTTPException(status_code=400, detail="limit must be a positive integer") 
+    digest_a, a = await read_input(file_a, doc_id_a, "file_a") 
+    digest_b, b = await read_input(file_b, doc_id_b, "file_b") 
+
+    def clauses(): 
+        return document_index(digest_a, a).clauses(), document_index(digest_b, b).clauses() 
+
+    if stream: 
+        clauses_a, clauses_b = await in_executor(clauses) 
+        lines = (json.dumps(h, ensure_ascii=False) + "\n" for h in iter_hunks(clauses_a, clauses_b, offset, -1 if limit <= 0 else limit)) 
+        return StreamingResponse(lines, media_type="application/x-ndjson") 
+    return await in_executor(lambda: diff_page(*clauses(), offset, limit))
+
+@app.get("/cache/stats") 
+async def cache_stats(): 
+    return {**ANALYSIS_CACHE.stats(), "generation": IBM.gen_cache.stats()}
+
+@app.get("/providers/stats") 
+async def provider_stats(): 
+    # Breaker state, token buckets and call/error counters for watsonx.ai and NLU 
+    return IBM.stats()
+
+#-------- Prometheus metrics and profiling --------
+
+def cache_metric_families(): 
+    stages = ANALYSIS_CACHE.stats()["stages"] 
+    yield ("clausewise_cache_lookups", "gauge", "Analysis cache lookups by stage and result (memory_hits, disk_hits, misses)", 
+           [({"stage": stage, "result": result}, n) for stage, counts in stages.items() for result, n in counts.items()]) 
+    ratios = [] 
+    for stage, counts in stages.items(): 
+        total = sum(counts.values()) 
+        ratios.append(({"stage": stage}, (counts.get("memory_hits", 0) + counts.get("disk_hits", 0)) / total if total else 0.0)) 
+    yield ("clausewise_cache_hit_ratio", "gauge", "Analysis cache hit ratio by stage", ratios) 
+    gen = IBM.gen_cache.stats() 
+    yield ("clausewise_generation_cache", "gauge", "Granite generation cache counters", 
+           [({"field": k}, v) for k, v in gen.items() if isinstance(v, (int, float)) and not isinstance(v, bool)])
+
+def provider_metric_families(): 
+    states = {"closed": 0, "half_open": 1, "open": 2} 
+    stats = IBM.stats() 
+    yield ("clausewise_provider_breaker_state", "gauge", "Circuit breaker state (0 closed, 1 half-open, 2 open)", 
+           [({"provider": p}, states[stats[p]["breaker"]["state"]]) for p in ("watsonx", "nlu")]) 
+    yield ("clausewise_provider_bucket_tokens", "gauge", "Tokens left in the provider rate limiter", 
+           [({"provider": p}, stats[p]["bucket"]["tokens"]) for p in ("watsonx", "nlu")])
+
+def collab_metric_families(): 
+    rooms = COLLAB.metrics() 
+    yield ("clausewise_ws_rooms", "gauge", "Rooms loaded on this worker", [({}, len(rooms))]) 
+    yield ("clausewise_ws_clients", "gauge", "Connected clients per room", [({"room": r}, m["clients"]) for r, m in rooms.items()]) 
+    yield ("clausewise_ws_queue_depth", "gauge", "Messages queued for the slowest client per room", [({"room": r}, m["queue_depth_max"]) for r, m in rooms.items()]) 
+    yield ("clausewise_ws_broadcasts", "counter", "Broadcasts per room", [({"room": r}, m["broadcasts"]) for r, m in rooms.items()]) 
+    yield ("clausewise_ws_evicted", "counter", "Slow clients evicted per room", [({"room": r}, m["evicted"]) for r, m in rooms.items()]) 
+    yield ("clausewise_ws_send_latency_avg_seconds", "gauge", "Moving average of per-client send latency", 
+           [({"room": r}, m["send_latency_avg_ms"] / 1000) for r, m in rooms.items()]) 
+    yield ("clausewise_ws_send_latency_max_seconds", "gauge", "Slowest per-client send so far", 
+           [({"room": r}, m["send_latency_max_ms"] / 1000) for r, m in rooms.items()])
+
+metrics.REGISTRY.register_collector(cache_metric_families) 
+metrics.REGISTRY.register_collector(provider_metric_families) 
+metrics.REGISTRY.register_collector(collab_metric_families)
+
+@app.get("/metrics") 
+async def prometheus_metrics(): 
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile/{profile_id}") 
+async def debug_profile(profile_id: str): 
+    # Collapsed stacks ("frame;frame;frame count") for flamegraph.pl or speedscope 
+    collapsed = metrics.PROFILES.get(profile_id) 
+    if collapsed is None: 
+        raise HTTPException(status_code=404, detail="Unknown profile id") 
+    return PlainTextResponse(collapsed)
+
+#-------- Contract library / similar-contract search --------
+
+@app.post("/corpus") 
+async def corpus_add(file: UploadFile = File(...)): 
+    digest, text = await read_upload(file) 
+    return await in_executor(CORPUS.add, digest, document_index(digest, text), file.filename or "")
+
+@app.get("/corpus/stats") 
+async def corpus_stats(): 
+    return CORPUS.stats()
+
+@app.post("/similar") 
+async def similar(file: UploadFile = File(...), k: int = Form(5), add: bool = Form(False)): 
+    digest, text = await read_upload(file) 
+    if k <= 0: 
+        raise HTTPException(status_code=400, detail="k must be a positive integer") 
+    index = document_index(digest, text) 
+    result = await in_executor(CORPUS.similar, index, k, 3, digest) 
+    if add: 
+        await in_executor(CORPUS.add, digest, index, file.filename or "") 
+    return result
+
+#-------- Real-time Collaboration via WebSockets --------
+
+@app.websocket("/ws/{room_id}")
+async def ws_endpoint(ws: WebSocket, room_id: str): 
+    await ws.accept() 
+    conn = await COLLAB.join(room_id, ws) 
+    try: 
+        while True: 
+            data = await ws.receive_json()
+            mtype = data.get("type") 
+            if mtype == "ops": 
+                await COLLAB.apply_ops(room_id, conn.id, data.get("rev"), data.get("ops") or [])
+            elif mtype == "document": 
+                await COLLAB.update_document(room_id, data.get("payload", ""), conn.id)
+            elif mtype == "chat": 
+                await COLLAB.add_chat(room_id, data.get("user", "anon"), data.get("payload", ""))
+    except WebSocketDisconnect: 
+        pass 
+    finally: 
+        # Also reached when the server evicted a slow client and closed its socket 
+        await COLLAB.leave(room_id, ws)
+
+@app.get("/collab/metrics") 
+async def collab_metrics(): 
+    return COLLAB.metrics()
+
+#Deadline alerts are computed from each room's document and pushed only to that room 
+DEADLINES = DeadlineScheduler(COLLAB)
+
+@app.get("/collab/deadlines") 
+async def collab_deadlines(): 
+    return DEADLINES.stats()
+
+@app.on_event("startup") 
+async def startup_event(): 
+    await in_executor(warm_language_detector) 
+    await COLLAB.start()
+    DEADLINES.start()
+
+@app.on_event("shutdown") 
+async def shutdown_event(): 
+    # Persist every loaded room before the worker exits
+    await DEADLINES.close()
+    await COLLAB.close()
+    await IBM.aclose()
+    shutdown_pools()
+
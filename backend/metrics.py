@@ -0,0 +1,254 @@
+import asyncio
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+#Lightweight instrumentation: counters and latency histograms rendered in the
+#Prometheus text format by GET /metrics, timing spans that also feed the
+#Server-Timing header of the request they ran in, and an opt-in sampling
+#profiler for chasing individual slow requests. No client library: the handful
+#of metric types we need is a few dozen lines, and scraping must not cost more
+#than the requests it measures.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROFILING_ENABLED = os.getenv("CLAUSEWISE_PROFILING", "") not in ("", "0", "false")
+PROFILE_INTERVAL = float(os.getenv("CLAUSEWISE_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_KEEP = 20
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items)
+    return "{" + body + "}"
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = list(self.values.items())
+        for labels, value in items:
+            yield self.name + "_total", labels, value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self.values: Dict[Labels, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        i = 0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        with self._lock:
+            cur = self.values.get(key)
+            if cur is None:
+                cur = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            cur[0][i] += 1
+            cur[1] += value
+            cur[2] += 1
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self.values.items()]
+        for labels, counts, total, count in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                yield self.name + "_bucket", labels + (("le", _fmt_value(bound)),), running
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, count
+
+# A collector is called on every scrape and yields (name, type, help, [(labels dict, value), ...])
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]]]
+
+class Registry:
+    def __init__(self):
+        self.metrics: "OrderedDict[str, Any]" = OrderedDict()
+        self.collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def register_collector(self, fn: Collector):
+        self.collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self.metrics.values():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in m.samples():
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+        for collect in self.collectors:
+            try:
+                families = list(collect())
+            except Exception as exc:
+                lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {type(exc).__name__}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_fmt_labels(_labels(labels))} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+SPAN_SECONDS = REGISTRY.histogram("clausewise_span_seconds", "Duration of instrumented analyzers and remote calls")
+STAGE_SECONDS = REGISTRY.histogram("clausewise_stage_seconds", "Duration of /analyze pipeline stages, including fallbacks")
+STAGE_FALLBACKS = REGISTRY.counter("clausewise_stage_fallbacks", "Stages that timed out or failed and returned their local fallback")
+HTTP_SECONDS = REGISTRY.histogram("clausewise_http_request_seconds", "HTTP request latency by route")
+PROVIDER_CALLS = REGISTRY.counter("clausewise_provider_calls", "Remote IBM calls by provider and outcome")
+
+#---- Spans and Server-Timing ----
+
+# Per-request list of (name, seconds); run_stage/in_executor copy the context into worker threads
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("clausewise_timings", default=None)
+
+def record(name: str, seconds: float):
+    SPAN_SECONDS.observe(seconds, span=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name: Optional[str] = None):
+    # Decorator for sync and async functions
+    def wrap(fn):
+        label = name or fn.__name__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(label, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return wrap
+
+def start_request() -> Tuple[contextvars.Token, List[Tuple[str, float]]]:
+    timings: List[Tuple[str, float]] = []
+    return _request_timings.set(timings), timings
+
+def end_request(token: contextvars.Token):
+    _request_timings.reset(token)
+
+def server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    # Repeated spans (e.g. five simplify calls) are summed; desc carries the call count
+    agg: "OrderedDict[str, List[float]]" = OrderedDict()
+    for name, seconds in list(timings):
+        cur = agg.setdefault(name, [0.0, 0])
+        cur[0] += seconds
+        cur[1] += 1
+    parts = []
+    for name, (seconds, count) in agg.items():
+        token = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name)
+        parts.append(f'{token};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else ""))
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+#---- Sampling profiler ----
+
+class SamplingProfiler:
+    # Samples every thread's stack (except its own) at a fixed interval and counts collapsed
+    # stacks, ready for flamegraph.pl / speedscope. Other requests running at the same time
+    # show up too, so profile outliers on a quiet worker.
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="clausewise-profiler", daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                key = ";".join([names.get(ident, str(ident))] + stack[::-1])
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "\n".join(f"{k} {v}" for k, v in sorted(self.stacks.items(), key=lambda kv: -kv[1]))
+
+PROFILES: "OrderedDict[str, str]" = OrderedDict()
+
+def keep_profile(collapsed: str) -> str:
+    profile_id = uuid.uuid4().hex[:12]
+    PROFILES[profile_id] = collapsed
+    while len(PROFILES) > PROFILE_KEEP:
+        PROFILES.popitem(last=False)
+    return profile_id
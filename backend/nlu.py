@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.cache import ANALYSIS_CACHE, MISSING
+from backend.ingest import SpooledUpload, iter_clauses
+from backend.pipeline import Degraded, in_executor
+from backend.utils import DocumentIndex, clause_spans
+
+#Watson NLU over the whole contract in clause-aligned chunks instead of one call
+#with the full text. Chunks are analyzed concurrently, each result is cached by
+#the chunk's content hash (offsets stay chunk-relative, so a clause that moved
+#still hits), and the merge shifts mention offsets back into the document and
+#re-ranks entities and keywords across chunks. Chunks NLU could not analyze are
+#filled from the regex extractor, and the result is raised as Degraded so the
+#document-level entry is not cached until every chunk has an NLU answer.
+#Uploads too large to decode whole (analyze_large) are chunked from the spooled
+#file by streamed_nlu, with the same chunks and the same merge.
+
+Analyze = Callable[[str], Awaitable[Dict[str, Any]]]
+
+NLU_CHUNK_CHARS = int(os.getenv("CLAUSEWISE_NLU_CHUNK_CHARS", "10000"))
+NLU_CONCURRENCY = int(os.getenv("CLAUSEWISE_NLU_CONCURRENCY", "4"))
+ENTITY_LIMIT = 50
+KEYWORD_LIMIT = 25
+REGEX_TYPES = (("dates", "Date"), ("money", "Money"), ("durations", "Duration"))
+
+def _chunk_spans(clauses: Iterable[Tuple[int, int, str]], limit: int) -> Iterator[Tuple[int, int]]:
+    # (start, end) runs of whole clauses from (start, end, text) clauses; a clause longer than limit is cut at whitespace
+    start = end = None
+    for s, e, clause in clauses:
+        pieces = []
+        base = s
+        while e - s > limit:
+            cut = clause.rfind(" ", s - base + limit // 2, s - base + limit) + base
+            cut = cut if cut > s else s + limit
+            pieces.append((s, cut))
+            s = cut
+        pieces.append((s, e))
+        for ps, pe in pieces:
+            if start is not None and pe - start > limit:
+                yield start, end
+                start = None
+            if start is None:
+                start = ps
+            end = pe
+    if start is not None:
+        yield start, end
+
+def nlu_chunks(text: str, limit: int = NLU_CHUNK_CHARS) -> List[Tuple[int, str]]:
+    # (offset, text[offset:offset + len]) runs of whole clauses
+    clauses = ((s, e, text[s:e]) for s, e in clause_spans(text))
+    return [(s, text[s:e]) for s, e in _chunk_spans(clauses, limit)]
+
+def stream_nlu_chunks(upload: SpooledUpload, limit: int = NLU_CHUNK_CHARS) -> Iterator[Tuple[int, str]]:
+    # Same chunks as nlu_chunks(upload.read_text()) in two passes over the spooled file: the chunk
+    # spans first, then each chunk's text, so no more than one chunk is held at a time
+    spans = list(_chunk_spans(iter_clauses(upload.chunks()), limit))
+    reader = upload.chunks()
+    buf, base = "", 0
+    for s, e in spans:
+        while base + len(buf) < e:
+            buf += next(reader)
+        buf, base = buf[s - base:], s
+        yield s, buf[:e - s]
+
+def _regex_entities(chunk: str) -> Dict[str, Any]:
+    # NLU-shaped stand-in for a failed chunk; relevance 0 ranks these below anything NLU found
+    index = DocumentIndex(chunk)
+    hits = {"dates": index.dates, "money": index.money, "durations": index.durations}
+    entities: Dict[str, Dict[str, Any]] = {}
+    for field, kind in REGEX_TYPES:
+        for s, e, t in hits[field]:
+            ent = entities.setdefault(t, {"type": kind, "text": t, "relevance": 0.0, "count": 0, "mentions": []})
+            ent["count"] += 1
+            ent["mentions"].append({"text": t, "location": [s, e]})
+    return {"entities": list(entities.values()), "keywords": []}
+
+async def _analyze_chunk(analyze: Analyze, chunk: str) -> Optional[Dict[str, Any]]:
+    key = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+    hit = ANALYSIS_CACHE.get(key, "nlu_chunk")
+    if hit is not MISSING:
+        return hit
+    try:
+        out = await analyze(chunk)
+    except Exception:
+        out = None
+    if out:
+        ANALYSIS_CACHE.set(key, "nlu_chunk", out)
+    return out or None
+
+def _merge(items: List[Dict[str, Any]], key, offsets: List[int], limit: int) -> List[Dict[str, Any]]:
+    # Same item from several chunks: counts add up, relevance combines as 1 - prod(1 - r), mentions are shifted
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for item, offset in zip(items, offsets):
+        k = key(item)
+        cur = merged.get(k)
+        mentions = [{**m, "location": [m["location"][0] + offset, m["location"][1] + offset]}
+                    for m in item.get("mentions") or [] if m.get("location")]
+        if cur is None:
+            merged[k] = {**item, "count": item.get("count", 1), "relevance": float(item.get("relevance", 0.0)), "mentions": mentions}
+            continue
+        cur["count"] += item.get("count", 1)
+        cur["relevance"] = 1 - (1 - cur["relevance"]) * (1 - float(item.get("relevance", 0.0)))
+        cur["mentions"].extend(mentions)
+    ranked = sorted(merged.values(), key=lambda x: (-x["relevance"], -x["count"]))[:limit]
+    for x in ranked:
+        x["relevance"] = round(x["relevance"], 6)
+        if not x["mentions"]:
+            del x["mentions"]
+    return ranked
+
+def _combine(parts: List[Tuple[int, Optional[Dict[str, Any]], str]]) -> Dict[str, Any]:
+    # parts: (offset, NLU result or None, chunk text) in document order
+    entities: List[Dict[str, Any]] = []
+    entity_offsets: List[int] = []
+    keywords: List[Dict[str, Any]] = []
+    keyword_offsets: List[int] = []
+    language = None
+    failed = 0
+    for offset, res, chunk in parts:
+        if res is None:
+            failed += 1
+            res = _regex_entities(chunk)
+        language = language or res.get("language")
+        for ent in res.get("entities") or []:
+            entities.append(ent)
+            entity_offsets.append(offset)
+        for kw in res.get("keywords") or []:
+            keywords.append(kw)
+            keyword_offsets.append(offset)
+    out = {
+        "language": language,
+        "entities": _merge(entities, lambda e: (e.get("type"), e.get("text", "").lower()), entity_offsets, ENTITY_LIMIT),
+        "keywords": _merge(keywords, lambda k: k.get("text", "").lower(), keyword_offsets, KEYWORD_LIMIT),
+        "chunks": len(parts),
+        "fallback_chunks": failed,
+    }
+    if failed:
+        raise Degraded(out, f"{failed} of {len(parts)} chunks from regex")
+    return out
+
+async def chunked_nlu(text: str, analyze: Analyze, limit: int = NLU_CHUNK_CHARS,
+                      concurrency: int = NLU_CONCURRENCY) -> Dict[str, Any]:
+    # analyze(chunk) -> NLU /v1/analyze JSON, {} on failure; raises Degraded({}) when no chunk succeeded
+    chunks = nlu_chunks(text, limit)
+    if not chunks:
+        return {}
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(chunk: str):
+        async with sem:
+            return await _analyze_chunk(analyze, chunk)
+
+    results = await asyncio.gather(*[run(c) for _, c in chunks])
+    if not any(results):
+        raise Degraded({}, "nlu unavailable")
+    return _combine([(offset, res, chunk) for (offset, chunk), res in zip(chunks, results)])
+
+async def streamed_nlu(upload: SpooledUpload, analyze: Analyze, limit: int = NLU_CHUNK_CHARS,
+                       concurrency: int = NLU_CONCURRENCY) -> Dict[str, Any]:
+    # chunked_nlu over a spooled upload too large to decode whole: chunks are read from the file
+    # in the executor as workers free up, and a chunk's text is dropped once it has been analyzed
+    chunks = stream_nlu_chunks(upload, limit)
+    reading = asyncio.Lock()
+    parts: List[Tuple[int, Optional[Dict[str, Any]], str]] = []
+
+    async def worker():
+        while True:
+            async with reading:
+                item = await in_executor(next, chunks, None)
+            if item is None:
+                return
+            offset, chunk = item
+            res = await _analyze_chunk(analyze, chunk)
+            # Failed chunks keep their text for the regex fallback; the rest keep only the result
+            parts.append((offset, res, chunk if res is None else ""))
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    if not parts:
+        return {}
+    if not any(res for _, res, _ in parts):
+        raise Degraded({}, "nlu unavailable")
+    parts.sort(key=lambda p: p[0])
+    return _combine(parts)
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+#Character-wise operational transform for collaborative contract editing.
+#An op is {"op": "insert", "pos": int, "text": str} or
+#{"op": "delete", "pos": int, "len": int}; a message carries a list of ops that
+#apply one after the other. transform() rebases a client's ops, written against
+#an older revision, over the ops the server has applied since.
+
+Op = Dict[str, Any]
+
+def validate(ops: Sequence[Op], length: int) -> List[Op]:
+    out = []
+    for op in ops:
+        kind = op.get("op")
+        pos = op.get("pos")
+        if not isinstance(pos, int) or pos < 0 or pos > length:
+            raise ValueError(f"Bad position in {op!r}")
+        if kind == "insert":
+            text = op.get("text")
+            if not isinstance(text, str):
+                raise ValueError(f"Insert without text: {op!r}")
+            if text:
+                out.append({"op": "insert", "pos": pos, "text": text})
+                length += len(text)
+        elif kind == "delete":
+            n = op.get("len")
+            if not isinstance(n, int) or n < 0 or pos + n > length:
+                raise ValueError(f"Bad delete length in {op!r}")
+            if n:
+                out.append({"op": "delete", "pos": pos, "len": n})
+                length -= n
+        else:
+            raise ValueError(f"Unknown op {kind!r}")
+    return out
+
+def apply_ops(text: str, ops: Sequence[Op]) -> str:
+    for op in ops:
+        pos = op["pos"]
+        if op["op"] == "insert":
+            text = text[:pos] + op["text"] + text[pos:]
+        else:
+            text = text[:pos] + text[pos + op["len"]:]
+    return text
+
+def replace_ops(old: str, new: str) -> List[Op]:
+    # Smallest single delete+insert turning old into new (shared prefix/suffix kept)
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    ops: List[Op] = []
+    if end_old > start:
+        ops.append({"op": "delete", "pos": start, "len": end_old - start})
+    if end_new > start:
+        ops.append({"op": "insert", "pos": start, "text": new[start:end_new]})
+    return ops
+
+def transform_op(a: Op, b: Op, a_first: bool) -> List[Op]:
+    # a rewritten to apply after b; a_first breaks ties between inserts at the same spot
+    if a["op"] == "insert":
+        if b["op"] == "insert":
+            if a["pos"] < b["pos"] or (a["pos"] == b["pos"] and a_first):
+                return [a]
+            return [dict(a, pos=a["pos"] + len(b["text"]))]
+        b_end = b["pos"] + b["len"]
+        if a["pos"] <= b["pos"]:
+            return [a]
+        if a["pos"] >= b_end:
+            return [dict(a, pos=a["pos"] - b["len"])]
+        return [dict(a, pos=b["pos"])]
+    a_end = a["pos"] + a["len"]
+    if b["op"] == "insert":
+        if b["pos"] <= a["pos"]:
+            return [dict(a, pos=a["pos"] + len(b["text"]))]
+        if b["pos"] >= a_end:
+            return [a]
+        # Insert landed inside the deleted range: delete around it
+        head = b["pos"] - a["pos"]
+        return [
+            {"op": "delete", "pos": a["pos"], "len": head},
+            {"op": "delete", "pos": a["pos"] + len(b["text"]), "len": a["len"] - head},
+        ]
+    b_end = b["pos"] + b["len"]
+    overlap = max(0, min(a_end, b_end) - max(a["pos"], b["pos"]))
+    remaining = a["len"] - overlap
+    if remaining == 0:
+        return []
+    if a["pos"] <= b["pos"]:
+        pos = a["pos"]
+    elif a["pos"] >= b_end:
+        pos = a["pos"] - b["len"]
+    else:
+        pos = b["pos"]
+    return [{"op": "delete", "pos": pos, "len": remaining}]
+
+def transform(ops_a: Sequence[Op], ops_b: Sequence[Op], a_first: bool) -> Tuple[List[Op], List[Op]]:
+    # Returns (a', b') with apply(apply(s, b), a') == apply(apply(s, a), b')
+    ops_a, ops_b = list(ops_a), list(ops_b)
+    if not ops_a or not ops_b:
+        return ops_a, ops_b
+    if len(ops_a) == 1 and len(ops_b) == 1:
+        return transform_op(ops_a[0], ops_b[0], a_first), transform_op(ops_b[0], ops_a[0], not a_first)
+    if len(ops_a) > 1:
+        head_a, rest_b = transform(ops_a[:1], ops_b, a_first)
+        tail_a, final_b = transform(ops_a[1:], rest_b, a_first)
+        return head_a + tail_a, final_b
+    rest_a, head_b = transform(ops_a, ops_b[:1], a_first)
+    final_a, tail_b = transform(rest_a, ops_b[1:], a_first)
+    return final_a, head_b + tail_b
@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from backend.metrics import STAGE_FALLBACKS, STAGE_SECONDS, record
+
+#Bounded fan-out for the /analyze pipeline. Blocking stages (Granite, NLU,
+#regex passes) run on STAGE_EXECUTOR so the event loop keeps serving other
+#requests and WebSocket rooms; each stage gets its own deadline.
+
+STAGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CLAUSEWISE_STAGE_WORKERS", "16")),
+    thread_name_prefix="clausewise-stage",
+)
+
+DEFAULT_DEADLINES: Dict[str, float] = {
+    "language": 5.0,
+    "clauses": 5.0,
+    "contract_type": 2.0,
+    "summary": 20.0,
+    "nlu": 10.0,
+    "simplify": 15.0,
+    "risk_hits": 5.0,
+    "alerts": 5.0,
+    "entities": 5.0,
+    "answer": 20.0,
+}
+
+def stage_deadline(stage: str) -> float:
+    env = os.getenv(f"CLAUSEWISE_DEADLINE_{stage.upper()}")
+    if env:
+        return float(env)
+    return DEFAULT_DEADLINES.get(stage, 10.0)
+
+class Degraded(Exception):
+    # Raised by a stage that answered from its own local fallback (provider unavailable or failing);
+    # run_stage returns the value marked degraded, so it is reported and never cached as the real result
+    def __init__(self, value: Any, reason: str = "fallback"):
+        super().__init__(reason)
+        self.value = value
+        self.reason = reason
+
+class StageResult:
+    __slots__ = ("name", "value", "degraded", "reason", "elapsed")
+
+    def __init__(self, name: str, value: Any, degraded: bool = False, reason: Optional[str] = None, elapsed: float = 0.0):
+        self.name = name
+        self.value = value
+        self.degraded = degraded
+        self.reason = reason
+        self.elapsed = elapsed
+
+async def run_stage(name: str, fn: Callable, *args, fallback: Optional[Callable[[], Any]] = None,
+                    deadline: Optional[float] = None) -> StageResult:
+    loop = asyncio.get_running_loop()
+    timeout = stage_deadline(name.split(":")[0]) if deadline is None else deadline
+    start = time.perf_counter()
+    stage = name.split(":")[0]
+    if asyncio.iscoroutinefunction(fn):
+        work = fn(*args)
+    else:
+        # Copied context: spans recorded in the worker thread land in this request's Server-Timing
+        work = loop.run_in_executor(STAGE_EXECUTOR, functools.partial(contextvars.copy_context().run, fn, *args))
+    try:
+        value = await asyncio.wait_for(work, timeout)
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        record(f"stage.{stage}", elapsed)
+        return StageResult(name, value, elapsed=elapsed)
+    except Degraded as exc:
+        elapsed = time.perf_counter() - start
+        STAGE_FALLBACKS.inc(stage=stage, reason="fallback")
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        record(f"stage.{stage}", elapsed)
+        return StageResult(name, exc.value, degraded=True, reason=f"fallback: {exc.reason}", elapsed=elapsed)
+    except asyncio.TimeoutError:
+        reason = "timeout"
+    except Exception as exc:
+        reason = f"error: {type(exc).__name__}"
+    STAGE_FALLBACKS.inc(stage=stage, reason=reason.split(":")[0])
+    # The executor thread may still be running; the fallback is a cheap local heuristic
+    value = await asyncio.to_thread(fallback) if fallback else None
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage=stage)
+    record(f"stage.{stage}", elapsed)
+    return StageResult(name, value, degraded=True, reason=reason, elapsed=elapsed)
+
+async def in_executor(fn: Callable, *args) -> Any:
+    # Same bounded pool, no deadline: for local work that must finish (indexing, persistence)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(STAGE_EXECUTOR, functools.partial(contextvars.copy_context().run, fn, *args))
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+#Cross-worker fan-out for collaboration rooms. Every room event (ops, chat) is
+#published here and only applied when it comes back, stamped with a sequence
+#number: the sequencer gives all workers one total order, so each worker applies
+#the same events in the same order and reaches the same state.
+#
+#InProcessPubSub is the single-worker default. UnixSocketPubSub talks to a small
+#broker on a local Unix socket (start it with `python -m backend.pubsub PATH`)
+#and is selected with CLAUSEWISE_PUBSUB=unix:PATH.
+
+Handler = Callable[[Dict[str, Any]], None]
+
+def _initial_seq() -> int:
+    # Wall-clock microseconds, so a restarted sequencer keeps numbering past what workers have stored
+    return time.time_ns() // 1000
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+class PubSub:
+    def bind(self, handler: Handler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def publish(self, message: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class InProcessPubSub(PubSub):
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+        self.seq = _initial_seq()
+
+    async def publish(self, message: Dict[str, Any]):
+        self.seq += 1
+        if self.handler is not None:
+            self.handler(dict(message, seq=self.seq))
+
+class UnixSocketPubSub(PubSub):
+    def __init__(self, path: str, retry: float = 1.0):
+        self.path = path
+        self.retry = retry
+        self.handler: Optional[Handler] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._connected.wait(), timeout=10)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=2 ** 24)
+            except OSError:
+                await asyncio.sleep(self.retry)
+                continue
+            self._writer = writer
+            self._connected.set()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    if self.handler is not None:
+                        self.handler(json.loads(line))
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                pass
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(self.retry)
+
+    async def publish(self, message: Dict[str, Any]):
+        if self._writer is None:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        self._writer.write(_encode(message))
+        await self._writer.drain()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+
+def make_pubsub(spec: Optional[str] = None) -> PubSub:
+    spec = os.getenv("CLAUSEWISE_PUBSUB", "") if spec is None else spec
+    if spec.startswith("unix:"):
+        return UnixSocketPubSub(spec[len("unix:"):])
+    if spec not in ("", "memory"):
+        raise ValueError(f"Unknown CLAUSEWISE_PUBSUB backend {spec!r}")
+    return InProcessPubSub()
+
+class Broker:
+    # Sequencer: stamps each line with the next seq and relays it to every connection, sender included
+    def __init__(self, max_buffer: int = 2 ** 24):
+        self.seq = _initial_seq()
+        self.max_buffer = max_buffer
+        self.clients: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                self.seq += 1
+                message["seq"] = self.seq
+                data = _encode(message)
+                for w in list(self.clients):
+                    # A worker this far behind is disconnected; it rehydrates rooms from SQLite on reconnect
+                    if w.transport.get_write_buffer_size() > self.max_buffer:
+                        self.clients.discard(w)
+                        w.close()
+                        continue
+                    w.write(data)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def serve(self, path: str):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self.handle, path=path, limit=2 ** 24)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    ap = argparse.ArgumentParser(description="ClauseWise collaboration broker")
+    ap.add_argument("path", nargs="?", default="/tmp/clausewise-collab.sock")
+    args = ap.parse_args()
+    asyncio.run(Broker().serve(args.path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+#Client-side protection for remote services: a token bucket keeps us under the
+#provider's request quota, and a circuit breaker stops sending requests to a
+#service that keeps failing, so callers fall back to local heuristics at once
+#instead of waiting out a timeout on every request.
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, n: float, max_wait: Optional[float]) -> Optional[float]:
+        # Takes n tokens (possibly going negative, i.e. queueing) and returns the wait; None if it would exceed max_wait
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= n else (n - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= n
+            return wait
+
+    async def acquire(self, n: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        wait = self._reserve(n, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return {"rate": self.rate, "capacity": self.capacity, "tokens": round(tokens, 2)}
+
+class CircuitBreaker:
+    # closed -> open after failure_threshold consecutive failures; open -> half_open after reset_timeout,
+    # when a single trial call decides whether to close again or re-open
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = "closed"
+        self.trial_in_flight = False
+        self.short_circuited = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.trial_in_flight = False
+            if self.state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def available(self) -> bool:
+        # Read-only check for callers choosing between remote and local paths up front
+        with self._lock:
+            return self.state != "open" or time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def release(self):
+        # The admitted call was never made (e.g. rate limited); let another caller be the half-open trial
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "short_circuited": self.short_circuited}
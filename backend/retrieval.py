@@ -0,0 +1,99 @@
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.utils import DocumentIndex, normalize
+
+#Okapi BM25 over the passages (sentences or clauses) of a single document.
+#Postings are term -> [[passage_id, tf], ...] so the index round-trips through JSON.
+
+K1 = 1.5
+B = 0.75
+
+class BM25Index:
+    def __init__(self, passages: Sequence[str], tokens: Iterable[Sequence[str]], stop: Optional[set] = None):
+        self.passages: List[str] = list(passages)
+        self.stop = stop or set()
+        self.postings: Dict[str, List[List[int]]] = {}
+        self.lengths: List[int] = []
+        for pid, toks in enumerate(tokens):
+            counts: Dict[str, int] = {}
+            for w in toks:
+                if w not in self.stop:
+                    counts[w] = counts.get(w, 0) + 1
+            self.lengths.append(sum(counts.values()))
+            for w, tf in counts.items():
+                self.postings.setdefault(w, []).append([pid, tf])
+        self._finish()
+
+    def _finish(self):
+        n = len(self.lengths)
+        self.avgdl = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {w: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for w, p in self.postings.items()}
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, int]]:
+        terms = [w for w in dict.fromkeys(normalize(query)) if w in self.postings]
+        if not terms or not self.avgdl:
+            return []
+        scores: Dict[int, float] = {}
+        for w in terms:
+            idf = self.idf[w]
+            for pid, tf in self.postings[w]:
+                norm = K1 * (1 - B + B * self.lengths[pid] / self.avgdl)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        return heapq.nlargest(k, ((s, pid) for pid, s in scores.items()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"passages": self.passages, "postings": self.postings, "lengths": self.lengths, "stop": sorted(self.stop)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BM25Index":
+        obj = cls.__new__(cls)
+        obj.passages = data["passages"]
+        obj.postings = data["postings"]
+        obj.lengths = data["lengths"]
+        obj.stop = set(data.get("stop", []))
+        obj._finish()
+        return obj
+
+class DocumentRetriever:
+    # Sentence index answers keyword questions; clause index picks LLM context
+    def __init__(self, sentences: BM25Index, clauses: BM25Index):
+        self.sentences = sentences
+        self.clauses = clauses
+
+    @classmethod
+    def build(cls, index: DocumentIndex) -> "DocumentRetriever":
+        stop = index.stop
+        clauses = index.clauses()
+        return cls(
+            BM25Index(index.sentences, index.tokens, stop),
+            BM25Index(clauses, (normalize(c) for c in clauses), stop),
+        )
+
+    def answer(self, question: str) -> str:
+        if len([w for w in normalize(question) if len(w) > 2]) == 0:
+            return "Question too short."
+        hits = self.sentences.search(question, k=1)
+        return self.sentences.passages[hits[0][1]] if hits else "Answer not found in document."
+
+    def context(self, question: str, budget: int = 10000, k: int = 8) -> str:
+        # Top-k clauses that fit the budget, re-emitted in document order
+        picked: List[int] = []
+        used = 0
+        for _, pid in self.clauses.search(question, k=k):
+            size = len(self.clauses.passages[pid])
+            if used + size > budget and picked:
+                continue
+            picked.append(pid)
+            used += size
+        if not picked:
+            return ""
+        return "\n\n".join(self.clauses.passages[pid][:budget] for pid in sorted(picked))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"sentences": self.sentences.to_dict(), "clauses": self.clauses.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentRetriever":
+        return cls(BM25Index.from_dict(data["sentences"]), BM25Index.from_dict(data["clauses"]))
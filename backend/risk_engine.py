@@ -0,0 +1,149 @@
+import json
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import yaml
+except Exception:  # optional: only needed for .yaml/.yml rule packs
+    yaml = None
+
+#Single-pass risk scanner. All rules (built-in plus any packs) are compiled into
+#one alternation of named groups, so the text is scanned once regardless of the
+#number of rules. Every pattern is bounded (no unanchored .*), which keeps the
+#scan linear in the input size. Rules match at word starts by default; when all
+#of them do, the \b is hoisted out of the alternation so most positions are
+#rejected before any rule is tried. Hits may overlap: the combined scan only
+#finds the next position where some rule matches, every rule is then tried
+#there, and the scan resumes one character later. Each rule yields exactly the
+#matches its own finditer() would.
+
+SEVERITIES = ("low", "medium", "high")
+
+class RiskRule:
+    __slots__ = ("id", "label", "pattern", "severity", "flags", "word_start")
+
+    def __init__(self, id: str, label: str, pattern: str, severity: str = "medium", flags: str = "i", word_start: bool = True):
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown severity {severity!r} for rule {id!r}")
+        re.compile(pattern)
+        self.id = id
+        self.label = label
+        self.pattern = pattern
+        self.severity = severity
+        self.flags = flags
+        self.word_start = word_start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "label": self.label, "pattern": self.pattern, "severity": self.severity,
+                "flags": self.flags, "word_start": self.word_start}
+
+BUILTIN_RULES: Tuple[RiskRule, ...] = (
+    RiskRule("auto-renewal", "Auto-renewal present", r"auto[-\s]?renew|automatic renewal", "medium"),
+    RiskRule("indemnity", "Broad indemnity risk", r"indemnif(?:y|ies|ication)\b", "high"),
+    RiskRule("venue", "Exclusive venue/jurisdiction", r"exclusive jurisdiction|venue\b", "low"),
+    # Was liability.*(unlimited|without limit): unbounded and backtracking on long lines
+    RiskRule("uncapped-liability", "Uncapped liability", r"unlimited liability|liability[^.;\n]{0,200}?(?:unlimited|without limit)", "high"),
+    RiskRule("non-compete", "Non-compete restriction", r"non[-\s]?compete|restraint of trade", "medium"),
+)
+
+class RiskEngine:
+    def __init__(self, rules: Sequence[RiskRule]):
+        self.rules = list(rules)
+        hoist = all(r.word_start for r in self.rules)
+        parts = []
+        self.single = []
+        for n, rule in enumerate(self.rules):
+            flags = "".join(f for f in rule.flags if f in "imsx")
+            body = f"(?{flags}:{rule.pattern})" if flags else f"(?:{rule.pattern})"
+            if rule.word_start:
+                self.single.append(re.compile(r"\b" + body))
+                if not hoist:
+                    body = r"\b" + body
+            else:
+                self.single.append(re.compile(body))
+            parts.append(f"(?P<r{n}>{body})")
+        pattern = "|".join(parts)
+        if hoist:
+            pattern = rf"\b(?:{pattern})"
+        self.regex = re.compile(pattern) if parts else None
+
+    def scan(self, text: str, clause_spans: Optional[Sequence[Tuple[int, int]]] = None) -> List[Dict[str, Any]]:
+        if self.regex is None:
+            return []
+        starts = [s for s, _ in clause_spans] if clause_spans else None
+        hits = []
+        # Per rule, where its previous hit ended: a rule's own matches never overlap each other
+        resume = [0] * len(self.rules)
+        search = self.regex.search
+        pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                break
+            first = int(m.lastgroup[1:])
+            at = m.start(m.lastgroup)
+            clause = -1
+            if starts:
+                k = bisect_right(starts, at) - 1
+                if k >= 0 and at < clause_spans[k][1]:
+                    clause = k
+            for n, rule in enumerate(self.rules):
+                if n < first or at < resume[n]:
+                    continue # rules before the alternation's pick cannot match here
+                hit = m if n == first else self.single[n].match(text, at)
+                if hit is None:
+                    continue
+                start, end = hit.span(m.lastgroup) if n == first else hit.span()
+                resume[n] = max(end, start + 1)
+                hits.append({
+                    "rule": rule.id,
+                    "label": rule.label,
+                    "severity": rule.severity,
+                    "start": start,
+                    "end": end,
+                    "clause": clause,
+                    "match": text[start:end],
+                })
+            pos = at + 1
+        return hits
+
+    def labels(self, hits: Sequence[Dict[str, Any]]) -> List[str]:
+        # Distinct labels in rule order, the shape detect_risks has always returned
+        seen = {h["rule"] for h in hits}
+        return list(dict.fromkeys(r.label for r in self.rules if r.id in seen))
+
+def _parse_pack(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("PyYAML is required to load YAML rule packs")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+@lru_cache(maxsize=64)
+def _load_pack_cached(path: str, mtime: float) -> Tuple[RiskRule, ...]:
+    data = _parse_pack(path)
+    rules = data.get("rules", []) if isinstance(data, dict) else data
+    return tuple(RiskRule(**r) for r in rules)
+
+def load_rule_pack(path: str) -> Tuple[RiskRule, ...]:
+    # Cached per (path, mtime): editing a pack on disk invalidates it
+    path = os.path.abspath(path)
+    return _load_pack_cached(path, os.path.getmtime(path))
+
+@lru_cache(maxsize=32)
+def _engine_cached(packs: Tuple[Tuple[str, float], ...]) -> RiskEngine:
+    rules = list(BUILTIN_RULES)
+    for path, mtime in packs:
+        rules.extend(_load_pack_cached(path, mtime))
+    return RiskEngine(rules)
+
+def get_engine(pack_paths: Optional[Sequence[str]] = None) -> RiskEngine:
+    if pack_paths is None:
+        env = os.getenv("CLAUSEWISE_RISK_PACKS", "")
+        pack_paths = [p for p in env.split(os.pathsep) if p]
+    packs = tuple((os.path.abspath(p), os.path.getmtime(p)) for p in pack_paths)
+    return _engine_cached(packs)
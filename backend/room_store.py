@@ -0,0 +1,152 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.storage import connect, data_path
+
+#SQLite persistence for collaboration rooms. A room is stored as its latest
+#snapshot plus the op log and chat entries written since, so an evicted room (or
+#one opened by another worker) is rebuilt from disk on the next join. Several
+#uvicorn workers can share one file; every write is idempotent per (room, rev).
+#
+#Writes are called from the event loop for every WebSocket event, so they only
+#enqueue: one writer thread commits whatever has queued up in a single
+#transaction. load() and flush() wait for the queue first, so reads always see
+#earlier writes. The database is opened on first use, not on import.
+
+Statement = Tuple[str, tuple]
+
+class RoomStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes: "queue.Queue[Optional[List[Statement]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock() # not _lock: enqueueing must never wait for a commit
+        self.failed_writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # Callers hold _lock
+        if self._conn is None:
+            conn = connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rooms (room_id TEXT PRIMARY KEY, rev INTEGER NOT NULL, seq INTEGER NOT NULL, "
+                "document TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS room_ops (room_id TEXT NOT NULL, rev INTEGER NOT NULL, seq INTEGER NOT NULL, "
+                "entry TEXT NOT NULL, PRIMARY KEY (room_id, rev))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS room_chat (room_id TEXT NOT NULL, seq INTEGER NOT NULL, entry TEXT NOT NULL, "
+                "PRIMARY KEY (room_id, seq))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _submit(self, statements: List[Statement]):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="clausewise-room-store", daemon=True)
+                self._writer.start()
+        self._writes.put(statements)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._lock:
+                    conn = self._db()
+                    try:
+                        for statements in batch:
+                            for sql, params in statements or ():
+                                conn.execute(sql, params)
+                        conn.commit()
+                    except sqlite3.Error:
+                        # Writes are idempotent, so one bad write must not take its neighbours down: retry one by one
+                        conn.rollback()
+                        for statements in batch:
+                            try:
+                                for sql, params in statements or ():
+                                    conn.execute(sql, params)
+                                conn.commit()
+                            except sqlite3.Error:
+                                conn.rollback()
+                                self.failed_writes += 1
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if None in batch:
+                return
+
+    def flush(self):
+        # Blocks until every queued write is committed
+        self._writes.join()
+
+    def close(self):
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join()
+
+    def load(self, room_id: str, chat_keep: int) -> Optional[Dict[str, Any]]:
+        self.flush()
+        with self._lock:
+            conn = self._db()
+            row = conn.execute("SELECT rev, seq, document FROM rooms WHERE room_id = ?", (room_id,)).fetchone()
+            ops = conn.execute(
+                "SELECT seq, entry FROM room_ops WHERE room_id = ? AND rev > ? ORDER BY rev", (room_id, row[0] if row else 0)
+            ).fetchall()
+            chat = conn.execute(
+                "SELECT seq, entry FROM room_chat WHERE room_id = ? ORDER BY seq DESC LIMIT ?", (room_id, chat_keep)
+            ).fetchall()
+        if row is None and not ops and not chat:
+            return None
+        rev, seq, document = row if row else (0, 0, "")
+        seq = max([seq] + [s for s, _ in ops] + [s for s, _ in chat])
+        return {
+            "rev": rev,
+            "seq": seq,
+            "document": document,
+            "log": [json.loads(e) for _, e in ops],
+            "chat": [json.loads(e) for _, e in reversed(chat)],
+        }
+
+    def append_op(self, room_id: str, seq: int, entry: Dict[str, Any]):
+        self._submit([(
+            "INSERT OR IGNORE INTO room_ops (room_id, rev, seq, entry) VALUES (?, ?, ?, ?)",
+            (room_id, entry["rev"], seq, json.dumps(entry, ensure_ascii=False)),
+        )])
+
+    def append_chat(self, room_id: str, seq: int, entry: Dict[str, Any], chat_keep: int):
+        self._submit([
+            ("INSERT OR IGNORE INTO room_chat (room_id, seq, entry) VALUES (?, ?, ?)",
+             (room_id, seq, json.dumps(entry, ensure_ascii=False))),
+            ("DELETE FROM room_chat WHERE room_id = ? AND seq NOT IN "
+             "(SELECT seq FROM room_chat WHERE room_id = ? ORDER BY seq DESC LIMIT ?)",
+             (room_id, room_id, chat_keep)),
+        ])
+
+    def save_snapshot(self, room_id: str, rev: int, seq: int, document: str):
+        # Never moves a room backwards if another worker already stored a later snapshot
+        self._submit([
+            ("INSERT INTO rooms (room_id, rev, seq, document, updated) VALUES (?, ?, ?, ?, ?) "
+             "ON CONFLICT(room_id) DO UPDATE SET rev = excluded.rev, seq = excluded.seq, "
+             "document = excluded.document, updated = excluded.updated WHERE excluded.rev >= rooms.rev",
+             (room_id, rev, seq, document, time.time())),
+            ("DELETE FROM room_ops WHERE room_id = ? AND rev <= ?", (room_id, rev)),
+        ])
+
+ROOM_STORE = RoomStore(data_path("CLAUSEWISE_ROOM_DB", "rooms.db"))
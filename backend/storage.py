@@ -0,0 +1,19 @@
+import os
+import sqlite3
+
+#Where the persistent stores live. Nothing is created on import: each store
+#opens (and creates) its files on first use, under CLAUSEWISE_DATA_DIR unless
+#its own CLAUSEWISE_* variable points somewhere else.
+
+DATA_DIR = os.getenv("CLAUSEWISE_DATA_DIR", "clausewise_data")
+
+def data_path(env: str, name: str) -> str:
+    # The store's own override if set (possibly "" to disable it), else DATA_DIR/name
+    value = os.getenv(env)
+    return os.path.join(DATA_DIR, name) if value is None else value
+
+def connect(path: str, **kwargs) -> sqlite3.Connection:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    return sqlite3.connect(path, check_same_thread=False, **kwargs)
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from backend.cache import ANALYSIS_CACHE, MISSING
+from backend.pipeline import Degraded, in_executor
+from backend.utils import sentence_tokenize, summarize_extract
+
+#Map-reduce summarization over the whole contract instead of its first 12k
+#characters. Clauses are packed into chunks whose boundaries depend only on
+#nearby clause content, so editing one clause changes one chunk and every other
+#chunk's partial summary comes from ANALYSIS_CACHE. Partial summaries are then
+#reduced (hierarchically, if they are still too long) into the final bullets.
+#Chunks Granite could not summarise get an extractive stand-in; the summary is
+#then raised as Degraded, so it is shown but not cached as the real one.
+
+Generate = Callable[[str, str], Awaitable[Optional[str]]]
+
+CHUNK_CHARS = int(os.getenv("CLAUSEWISE_SUMMARY_CHUNK_CHARS", "6000"))
+MIN_CHUNK_CHARS = CHUNK_CHARS // 4
+SUMMARY_CONCURRENCY = int(os.getenv("CLAUSEWISE_SUMMARY_CONCURRENCY", "4"))
+
+FULL_PROMPT = "You are a legal assistant. Summarize the contract in 5-7 bullet points in the same language as the input."
+MAP_PROMPT = ("You are a legal assistant. Summarize this part of a contract in 2-4 short bullet points in the same "
+              "language as the input. Keep parties, amounts, dates and obligations.")
+REDUCE_PROMPT = ("You are a legal assistant. These are summaries of consecutive parts of one contract. Merge them into "
+                 "5-7 bullet points in the same language as the input, without repetition.")
+
+def _key(prompt: str, text: str) -> str:
+    return hashlib.sha256(f"{prompt}\n\n{text}".encode("utf-8")).hexdigest()
+
+def _pieces(clause: str, limit: int) -> List[str]:
+    # A clause longer than one chunk is cut at sentence boundaries (hard-cut only for a giant sentence)
+    if len(clause) <= limit:
+        return [clause]
+    out, cur = [], ""
+    for sent in sentence_tokenize(clause):
+        while len(sent) > limit:
+            if cur:
+                out.append(cur)
+                cur = ""
+            out.append(sent[:limit])
+            sent = sent[limit:]
+        if cur and len(cur) + 1 + len(sent) > limit:
+            out.append(cur)
+            cur = ""
+        cur = f"{cur} {sent}" if cur else sent
+    if cur:
+        out.append(cur)
+    return out
+
+def summary_chunks(clauses: Sequence[str], limit: int = CHUNK_CHARS) -> List[str]:
+    pieces = [p for clause in clauses for p in _pieces(clause, limit)]
+    chunks, cur = [], ""
+    for piece in pieces:
+        if cur and len(cur) + 2 + len(piece) > limit:
+            chunks.append(cur)
+            cur = ""
+        cur = f"{cur}\n\n{piece}" if cur else piece
+        # Content-defined cut: roughly one clause in four ends a chunk, decided by that clause alone
+        if len(cur) >= MIN_CHUNK_CHARS and int(_key("", piece)[:8], 16) % 4 == 0:
+            chunks.append(cur)
+            cur = ""
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+async def _cached_generate(generate: Generate, prompt: str, text: str, stage: str) -> Optional[str]:
+    key = _key(prompt, text)
+    hit = ANALYSIS_CACHE.get(key, stage)
+    if hit is not MISSING:
+        return hit
+    out = await generate(prompt, text)
+    if out:
+        ANALYSIS_CACHE.set(key, stage, out)
+    return out
+
+async def map_reduce_summary(clauses: Sequence[str], generate: Generate, limit: int = CHUNK_CHARS,
+                             concurrency: int = SUMMARY_CONCURRENCY) -> str:
+    # clauses as returned by extract_clauses / DocumentIndex.clauses(); chunking and the extractive
+    # fallbacks run on the stage pool, since this coroutine runs on the event loop
+    chunks = await in_executor(summary_chunks, clauses, limit)
+    if not chunks:
+        return ""
+    sem = asyncio.Semaphore(concurrency)
+    failed = []
+
+    async def summarize(prompt: str, text: str, stage: str, fallback_sentences: int) -> str:
+        async with sem:
+            out = await _cached_generate(generate, prompt, text, stage)
+        if out:
+            return out
+        # Granite failed for this chunk: an extractive stand-in keeps the rest of the summary usable
+        failed.append(stage)
+        return await in_executor(summarize_extract, text, fallback_sentences)
+
+    if len(chunks) == 1:
+        summary = await summarize(FULL_PROMPT, chunks[0], "summary_chunk", 6)
+        if failed:
+            raise Degraded(summary, "granite unavailable")
+        return summary
+    parts = await asyncio.gather(*[summarize(MAP_PROMPT, c, "summary_chunk", 3) for c in chunks])
+    # Reduce level by level until the partial summaries fit in one prompt
+    while sum(len(p) + 2 for p in parts) > limit and len(parts) > 1:
+        groups, cur = [], ""
+        for p in parts:
+            if cur and len(cur) + 2 + len(p) > limit:
+                groups.append(cur)
+                cur = ""
+            cur = f"{cur}\n\n{p}" if cur else p
+        groups.append(cur)
+        if len(groups) == len(parts):
+            break
+        parts = await asyncio.gather(*[summarize(REDUCE_PROMPT, g, "summary_reduce", 4) for g in groups])
+    summary = await summarize(REDUCE_PROMPT, "\n\n".join(parts), "summary_reduce", 6)
+    if failed:
+        raise Degraded(summary, f"{len(failed)} summary calls failed")
+    return summary
@@ -1,178 +1,401 @@
-from typing import List, Tuple, Dict, Any 
-import re 
-from datetime import datetime, timedelta 
-from dateutil import parser as dtparser 
-from langdetect import detect 
-import difflib 
-import math
-
-#Minimal stopwords
-
-STOPWORDS = { "en": set("a an and are as at be by for from has he in is it its of on that the to was were will with this these those you your yours we our us not or nor if else then than also shall may must can hereunder hereof thereof therefrom thereon".split()),
-              "hi": set("और है हैं था थी थे को के का की एक यह वह होंगे हेतु तक लिए साथ करें किया जिससे द्वारा पर में नहीं या यदि तब तो तथा जबकि करना चाहिए होगा सकते".split()), 
-              "te": set("మరియు ఉంది ఉన్నాయి ఒక ఇది అవి మీరు వారు నుండి కు కోసం తో లో కాదు లేదా అయితే అలాగే ఉండాలి ఉంటుంది".split()), }
-
-DATE_REGEX = re.compile(r"\b(\d{1,2}[-/. ]\d{1,2}[-/. ]\d{2,4}|\b\w+ \d{1,2}, \d{4}\b|\b\d{4}-\d{2}-\d{2}\b)\b") 
-MONEY_REGEX = re.compile(r"\b(?:USD|INR|Rs.?|₹|$)\s?\d{1,3}(?:[,\d]{0,})(?:.\d+)?\b") 
-DURATION_REGEX = re.compile(r"\b(\d+\s?(days?|months?|years?))\b", re.I)
-
-RISK_PATTERNS = [ (re.compile(r"auto[-\s]?renew|automatic renewal", re.I), "Auto-renewal present"), 
-                 (re.compile(r"indemnif(y|ies|ication)\b", re.I), "Broad indemnity risk"), 
-                 (re.compile(r"exclusive jurisdiction|venue\b", re.I), "Exclusive venue/jurisdiction"), 
-                 (re.compile(r"unlimited liability|liability.*(unlimited|without limit)", re.I), "Uncapped liability"), 
-                 (re.compile(r"non[-\s]?compete|restraint of trade", re.I), "Non-compete restriction"), ]
-
-def detect_language(text: str) -> str: 
-    try: 
-        return detect(text)
-    except Exception: 
-        return "en"
-
-def sentence_tokenize(text: str) -> List[str]:
-     parts = re.split(r"(?<=[.!?।])\s+|\n+", text.strip()) 
-     return [s.strip() for s in parts if s.strip()]
-
-def normalize(text: str) -> List[str]:
-    return re.findall(r"[\w']+", text.lower())
-
-def summarize_extract(text: str, max_sentences: int = 5) -> str:
-     lang = detect_language(text) 
-     stop = STOPWORDS.get(lang, STOPWORDS["en"])
-     sents = sentence_tokenize(text) 
-     if not sents: 
-        return ""
-     freqs: Dict[str, int] = {} 
-     for s in sents: 
-      for w in normalize(s):
-          if w not in stop and len(w) > 2: 
-              freqs[w] = freqs.get(w, 0) + 1 
-     if not freqs: 
-        return " ".join(sents[:max_sentences]) 
-     scores: List[Tuple[float, str]] = []
-
-
-     for s in sents: 
-      words = [w for w in normalize(s) if w in freqs] 
-      if not words: 
-       continue 
-      score = sum(freqs[w] for w in words) / (len(words) + 1) 
-      scores.append((score, s)) 
-     top = {s for _, s in sorted(scores, key=lambda x: x[0], reverse=True)[:max_sentences]}
-     return " ".join([s for s in sents if s in top])
-
-def extract_clauses(text: str) -> List[str]: 
-    chunks = re.split(r"\n\s*(?:\d+.|[A-Z][A-Z\s_-]{3,}|Section\s+\d+(?:.\d+))\s\n", text)
-    res = [c.strip() for c in chunks if c and c.strip()] 
-    if not res: 
-        res = [c.strip() for c in re.split(r"\n\n+", text) if c.strip()]
-    return res
-
-def classify_contract(text: str) -> str: 
-    t = text.lower() 
-    if any(k in t for k in ["lease", "tenant", "landlord", "premises"]):
-        return "Lease Agreement" 
-    if any(k in t for k in ["non-disclosure", "confidential", "nda"]):
-        return "NDA" 
-    if any(k in t for k in ["employee", "employer", "salary", "benefits", "termination"]):
-        return "Employment Contract" 
-    if any(k in t for k in ["service level", "sla", "vendor", "client"]): 
-        return "Service Agreement" 
-    return "General Contract"
-
-def keyword_qa(text: str, question: str) -> str: 
-    q_words = [w for w in normalize(question) if len(w) > 2] 
-    if not q_words: 
-     return "Question too short." 
-    best = (0, "") 
-    for sent in sentence_tokenize(text): 
-        score = sum(1 for qw in q_words 
-if qw in sent.lower()) 
-        if score > best[0]: best = (score, sent.strip()) 
-    return best[1] or "Answer not found in document."
-
-def find_entities_regex(text: str) -> Dict[str, List[str]]:
-     dates = [m.group(0) for m in DATE_REGEX.finditer(text)]
-     money = [m.group(0) for m in MONEY_REGEX.finditer(text)] 
-     durations = [m.group(0) for m in DURATION_REGEX.finditer(text)] 
-     return {"dates": list(dict.fromkeys(dates)), "money": list(dict.fromkeys(money)), "durations": list(dict.fromkeys(durations))}
-
-def detect_risks(text: str) -> List[str]: 
-    risks = []
-    for pat, label in RISK_PATTERNS: 
-     if pat.search(text): risks.append(label) 
-    return risks
-
-def upcoming_alerts(text: str, days_ahead: int = 60) -> List[Dict[str, Any]]: 
-    alerts = [] 
-    now = datetime.now() 
-    for m in DATE_REGEX.finditer(text): 
-        dtxt = m.group(0) 
-        try: 
-            d = dtparser.parse(dtxt, dayfirst=False, fuzzy=True) 
-            if now <= d <= now + timedelta(days=days_ahead): 
-                alerts.append({"type": "deadline", "when": d.isoformat(), "excerpt": dtxt}) 
-        except Exception: 
-            continue 
-    for m in DURATION_REGEX.finditer(text): 
-        span = m.span() 
-        ctx = text[max(0, span[0]-60):min(len(text), span[1]+60)] 
-        if re.search(r"renew|term|expire", ctx, re.I): 
-            alerts.append({"type": "renewal-window", "duration": m.group(0), "context": ctx.strip()}) 
-    return alerts
-
-def jaccard(a: set, b: set) -> float: 
-    if not a and not b: 
-        return 1.0 
-    return len(a & b) / max(1, len(a | b))
-
-def cosine_sim(a: Dict[str, int], b: Dict[str, int]) -> float:
-     keys = set(a) | set(b)
-     dot = sum(a.get(k, 0) * b.get(k, 0) for k in keys) 
-     na = math.sqrt(sum(v*v for v in a.values())) 
-     nb = math.sqrt(sum(v*v for v in b.values())) 
-     if na == 0 or nb == 0:
-         return 0.0 
-     return dot / (na * nb)
-
-def bow(text: str, stop: set) -> Dict[str, int]:
-     counts: Dict[str, int] = {}
-     for w in normalize(text): 
-        if w not in stop and len(w) > 2: 
-            counts[w] = counts.get(w, 0) + 1 
-     return counts
-
-def compare_contracts(text_a: str, text_b: str) -> Dict[str, Any]: 
-    lang_a = detect_language(text_a) 
-    stop_a = STOPWORDS.get(lang_a, STOPWORDS["en"]) 
-    lang_b = detect_language(text_b) 
-    stop_b = STOPWORDS.get(lang_b, STOPWORDS["en"])
-
-    clauses_a = extract_clauses(text_a)
-    clauses_b = extract_clauses(text_b)
-
-    bow_a = bow(text_a, stop_a)
-    bow_b = bow(text_b, stop_b)
-    cos = cosine_sim(bow_a, bow_b)
-
-    diff = "\n".join(difflib.unified_diff(text_a.splitlines(), text_b.splitlines(), fromfile="A", tofile="B", lineterm=""))
-
-    overlaps: List[Dict[str, Any]] = []
-    for i, ca in enumerate(clauses_a):
-      set_a = set(normalize(ca))
-      best = (0.0, -1)
-      for j, cb in enumerate(clauses_b):
-        set_b = set(normalize(cb))
-        sim = jaccard(set_a, set_b)
-        if sim > best[0]:
-            best = (sim, j)
-    overlaps.append({"clause_a_index": i, "best_b_index": best[1], "similarity": round(best[0], 3)})
-
-    return {
-      "lang_a": lang_a,
-      "lang_b": lang_b,
-      "cosine_similarity": round(cos, 3),
-      "diff": diff,
-      "overlaps": overlaps[:50],
-    }
-
-#==============================
+from typing import List, Tuple, Dict, Any, Optional, Union 
+import re 
+from datetime import datetime, timedelta 
+from langdetect import detect, DetectorFactory 
+import difflib 
+import functools
+import sys 
+import math
+
+from backend.align import align_clauses, jaccard
+from backend.risk_engine import BUILTIN_RULES, get_engine
+from backend.dates import RENEWAL_CONTEXT, normalize_date, parse_date
+from backend.metrics import span, timed
+
+#Minimal stopwords
+
+STOPWORDS = { "en": set("a an and are as at be by for from has he in is it its of on that the to was were will with this these those you your yours we our us not or nor if else then than also shall may must can hereunder hereof thereof therefrom thereon".split()),
+              "hi": set("और है हैं था थी थे को के का की एक यह वह होंगे हेतु तक लिए साथ करें किया जिससे द्वारा पर में नहीं या यदि तब तो तथा जबकि करना चाहिए होगा सकते".split()), 
+              "te": set("మరియు ఉంది ఉన్నాయి ఒక ఇది అవి మీరు వారు నుండి కు కోసం తో లో కాదు లేదా అయితే అలాగే ఉండాలి ఉంటుంది".split()), }
+
+DATE_REGEX = re.compile(r"\b(\d{1,2}[-/. ]\d{1,2}[-/. ]\d{2,4}|\b\w+ \d{1,2}, \d{4}\b|\b\d{4}-\d{2}-\d{2}\b)\b") 
+MONEY_REGEX = re.compile(r"\b(?:USD|INR|Rs.?|₹|$)\s?\d{1,3}(?:[,\d]{0,})(?:.\d+)?\b") 
+DURATION_REGEX = re.compile(r"\b(\d+\s?(days?|months?|years?))\b", re.I)
+WORD_REGEX = re.compile(r"[\w']+")
+CLAUSE_SPLIT_REGEX = re.compile(r"\n\s*(?:\d+.|[A-Z][A-Z\s_-]{3,}|Section\s+\d+(?:.\d+))\s\n")
+
+#Kept for callers that iterate the built-in rules; scanning goes through backend/risk_engine.py
+RISK_PATTERNS = [(re.compile(r.pattern, re.I), r.label) for r in BUILTIN_RULES]
+
+#Language detection. Devanagari and Telugu are recognised by counting characters
+#in their Unicode blocks over a fixed sample of the text; Latin text that reads as
+#English by stopword share is "en" outright. Only what is left goes to langdetect,
+#on a short sample and with a fixed seed so the answer never changes between calls.
+
+LANG_SAMPLE_CHARS = 6000
+LANGDETECT_SAMPLE_CHARS = 1000
+SCRIPT_SHARE = 0.3 # share of letters in a script's block that decides the language
+DEVANAGARI_REGEX = re.compile(r"[\u0900-\u097F]")
+TELUGU_REGEX = re.compile(r"[\u0C00-\u0C7F]")
+LATIN_REGEX = re.compile(r"[A-Za-z\u00C0-\u024F]")
+LATIN_WORD_REGEX = re.compile(r"[a-z]+")
+DetectorFactory.seed = 0
+
+def _language_sample(text: str, size: int = LANG_SAMPLE_CHARS) -> str:
+    # Start, middle and end of the text, so a cover page in another language does not decide alone
+    if len(text) <= size:
+        return text
+    third = size // 3
+    mid = len(text) // 2 - third // 2
+    return "\n".join((text[:third], text[mid:mid + third], text[-third:]))
+
+@functools.lru_cache(maxsize=1024)
+def _detect_sample(sample: str) -> str:
+    deva = len(DEVANAGARI_REGEX.findall(sample))
+    telugu = len(TELUGU_REGEX.findall(sample))
+    latin = len(LATIN_REGEX.findall(sample))
+    letters = sum(1 for ch in sample if ch.isalpha())
+    if not letters:
+        return "en"
+    if telugu >= SCRIPT_SHARE * letters and telugu >= deva:
+        return "te"
+    if deva >= SCRIPT_SHARE * letters:
+        return "hi"
+    if latin >= (1 - SCRIPT_SHARE) * letters:
+        words = LATIN_WORD_REGEX.findall(sample.lower())
+        if words and sum(1 for w in words if w in STOPWORDS["en"]) >= 0.15 * len(words):
+            return "en"
+    try: 
+        return detect(sample[:LANGDETECT_SAMPLE_CHARS])
+    except Exception: 
+        return "en"
+
+@timed()
+def detect_language(text: str) -> str: 
+    return _detect_sample(_language_sample(text))
+
+def warm_language_detector(): 
+    # langdetect loads its ~55 profiles on first use; do it at startup instead of in the first request 
+    try: 
+        detect("warm up the language profiles")
+    except Exception: 
+        pass
+
+def sentence_tokenize(text: str) -> List[str]:
+     parts = re.split(r"(?<=[.!?।])\s+|\n+", text.strip()) 
+     return [s.strip() for s in parts if s.strip()]
+
+def normalize(text: str) -> List[str]:
+    return WORD_REGEX.findall(text.lower())
+
+@timed()
+def summarize_extract(doc: "Doc", max_sentences: int = 5) -> str:
+     idx = as_index(doc) 
+     sents = idx.sentences 
+     if not sents: 
+        return ""
+     freqs = idx.tf 
+     if not freqs: 
+        return " ".join(sents[:max_sentences]) 
+     scores: List[Tuple[float, str]] = []
+
+
+     for s, toks in zip(sents, idx.tokens): 
+      words = [w for w in toks if w in freqs] 
+      if not words: 
+       continue 
+      score = sum(freqs[w] for w in words) / (len(words) + 1) 
+      scores.append((score, s)) 
+     top = {s for _, s in sorted(scores, key=lambda x: x[0], reverse=True)[:max_sentences]}
+     return " ".join([s for s in sents if s in top])
+
+def _stripped_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+def _split_spans(text: str, pattern) -> List[Tuple[int, int]]:
+    spans = []
+    pos = 0
+    for m in pattern.finditer(text):
+        spans.append(_stripped_span(text, pos, m.start()))
+        pos = m.end()
+    spans.append(_stripped_span(text, pos, len(text)))
+    return [(s, e) for s, e in spans if e > s]
+
+def clause_spans(text: str) -> List[Tuple[int, int]]:
+    # Same boundaries as extract_clauses, as (start, end) offsets into text
+    spans = _split_spans(text, CLAUSE_SPLIT_REGEX)
+    if not spans:
+        spans = _split_spans(text, re.compile(r"\n\n+"))
+    return spans
+
+@timed()
+def extract_clauses(doc: "Doc") -> List[str]: 
+    if isinstance(doc, DocumentIndex): 
+        return doc.clauses() 
+    return [doc[s:e] for s, e in clause_spans(doc)]
+
+class DocumentIndex:
+    # Built once per document and shared by the analyzers below. Every field is
+    # computed lazily on first use, so wrapping a plain string costs no more than
+    # the analyzer that asked for it; later analyzers reuse the same pass.
+    __slots__ = ("text", "_lang", "_sentences", "_lowered", "_tokens", "_tf", "_clause_spans", "_clause_tokens", "_clause_terms", "_dates", "_money", "_durations")
+
+    def __init__(self, text: str, lang: Optional[str] = None):
+        self.text = text
+        self._lang = lang
+        self._sentences = None
+        self._lowered = None
+        self._tokens = None
+        self._tf = None
+        self._clause_spans = None
+        self._clause_tokens = None
+        self._clause_terms = None
+        self._dates = None
+        self._money = None
+        self._durations = None
+
+    @property
+    def lang(self) -> str:
+        if self._lang is None:
+            self._lang = detect_language(self.text)
+        return self._lang
+
+    @lang.setter
+    def lang(self, value: str):
+        if value != self._lang:
+            self._lang = value
+            self._tf = None
+            self._clause_terms = None
+
+    @property
+    def has_language(self) -> bool:
+        # True once lang was set or detected; reading lang would run detection
+        return self._lang is not None
+
+    @property
+    def stop(self) -> set:
+        return STOPWORDS.get(self.lang, STOPWORDS["en"])
+
+    @property
+    def sentences(self) -> Tuple[str, ...]:
+        if self._sentences is None:
+            with span("tokenize.sentences"):
+                self._sentences = tuple(sentence_tokenize(self.text))
+        return self._sentences
+
+    @property
+    def lowered(self) -> Tuple[str, ...]:
+        if self._lowered is None:
+            self._lowered = tuple(s.lower() for s in self.sentences)
+        return self._lowered
+
+    @property
+    def tokens(self) -> Tuple[Tuple[str, ...], ...]:
+        # Per-sentence token arrays; interned so repeated terms share one string
+        if self._tokens is None:
+            lowered = self.lowered
+            with span("tokenize.words"):
+                self._tokens = tuple(tuple(sys.intern(w) for w in WORD_REGEX.findall(s)) for s in lowered)
+        return self._tokens
+
+    @property
+    def tf(self) -> Dict[str, int]:
+        # Content-term frequencies (stopwords and short tokens removed)
+        if self._tf is None:
+            stop = self.stop
+            counts: Dict[str, int] = {}
+            for toks in self.tokens:
+                for w in toks:
+                    if w not in stop and len(w) > 2:
+                        counts[w] = counts.get(w, 0) + 1
+            self._tf = counts
+        return self._tf
+
+    @property
+    def clause_spans(self) -> Tuple[Tuple[int, int], ...]:
+        if self._clause_spans is None:
+            self._clause_spans = tuple(clause_spans(self.text))
+        return self._clause_spans
+
+    def clauses(self) -> List[str]:
+        return [self.text[s:e] for s, e in self.clause_spans]
+
+    @property
+    def clause_tokens(self) -> Tuple[frozenset, ...]:
+        if self._clause_tokens is None:
+            self._clause_tokens = tuple(frozenset(normalize(self.text[s:e])) for s, e in self.clause_spans)
+        return self._clause_tokens
+
+    @property
+    def clause_terms(self) -> Tuple[frozenset, ...]:
+        # Content terms of each clause (same filter as tf); LSH blocking keys for align_clauses
+        if self._clause_terms is None:
+            stop = self.stop
+            self._clause_terms = tuple(frozenset(w for w in s if w not in stop and len(w) > 2) for s in self.clause_tokens)
+        return self._clause_terms
+
+    def _hits(self, pattern) -> Tuple[Tuple[int, int, str], ...]:
+        return tuple((m.start(), m.end(), m.group(0)) for m in pattern.finditer(self.text))
+
+    @property
+    def dates(self) -> Tuple[Tuple[int, int, str], ...]:
+        if self._dates is None:
+            self._dates = self._hits(DATE_REGEX)
+        return self._dates
+
+    @property
+    def money(self) -> Tuple[Tuple[int, int, str], ...]:
+        if self._money is None:
+            self._money = self._hits(MONEY_REGEX)
+        return self._money
+
+    @property
+    def durations(self) -> Tuple[Tuple[int, int, str], ...]:
+        if self._durations is None:
+            self._durations = self._hits(DURATION_REGEX)
+        return self._durations
+
+Doc = Union[str, DocumentIndex]
+
+def as_index(doc: Doc) -> DocumentIndex:
+    return doc if isinstance(doc, DocumentIndex) else DocumentIndex(doc)
+
+CONTRACT_KEYWORDS = (
+    ("Lease Agreement", ("lease", "tenant", "landlord", "premises")),
+    ("NDA", ("non-disclosure", "confidential", "nda")),
+    ("Employment Contract", ("employee", "employer", "salary", "benefits", "termination")),
+    ("Service Agreement", ("service level", "sla", "vendor", "client")),
+)
+
+@timed()
+def classify_contract(text: str) -> str: 
+    t = text.lower() 
+    for label, keywords in CONTRACT_KEYWORDS: 
+        if any(k in t for k in keywords): 
+            return label 
+    return "General Contract"
+
+@timed()
+def keyword_qa(doc: Doc, question: str) -> str: 
+    q_words = [w for w in normalize(question) if len(w) > 2] 
+    if not q_words: 
+     return "Question too short." 
+    idx = as_index(doc) 
+    best = (0, "") 
+    for sent, low in zip(idx.sentences, idx.lowered): 
+        score = sum(1 for qw in q_words if qw in low) 
+        if score > best[0]: best = (score, sent) 
+    return best[1] or "Answer not found in document."
+
+@timed()
+def find_entities_regex(doc: Doc, normalize_dates: bool = False) -> Dict[str, List[str]]:
+     idx = as_index(doc) 
+     dates = list(dict.fromkeys(h[2] for h in idx.dates))
+     money = [h[2] for h in idx.money] 
+     durations = [h[2] for h in idx.durations] 
+     out = {"dates": dates, "money": list(dict.fromkeys(money)), "durations": list(dict.fromkeys(durations))}
+     if normalize_dates: 
+        # ISO yyyy-mm-dd per entry of "dates" (None when unparseable) 
+        out["dates_iso"] = [normalize_date(d) for d in dates] 
+     return out
+
+@timed()
+def risk_hits(doc: Doc, packs: Optional[List[str]] = None) -> List[Dict[str, Any]]: 
+    # Every hit with label, span, clause index and severity, from one combined scan 
+    idx = as_index(doc) 
+    return get_engine(packs).scan(idx.text, idx.clause_spans)
+
+def risk_labels(hits: List[Dict[str, Any]], packs: Optional[List[str]] = None) -> List[str]: 
+    return get_engine(packs).labels(hits)
+
+@timed()
+def detect_risks(doc: Doc, packs: Optional[List[str]] = None) -> List[str]: 
+    engine = get_engine(packs) 
+    text = doc.text if isinstance(doc, DocumentIndex) else doc 
+    return engine.labels(engine.scan(text))
+
+@timed()
+def upcoming_alerts(doc: Doc, days_ahead: int = 60) -> List[Dict[str, Any]]: 
+    idx = as_index(doc) 
+    text = idx.text 
+    alerts = [] 
+    now = datetime.now() 
+    dates = idx.dates 
+    with span("upcoming_alerts.parse_dates"): 
+        parsed = [(dtxt, parse_date(dtxt)) for _, _, dtxt in dates] 
+    for dtxt, d in parsed: 
+        if d is not None and now <= d <= now + timedelta(days=days_ahead): 
+            alerts.append({"type": "deadline", "when": d.isoformat(), "excerpt": dtxt}) 
+    for start, end, dur in idx.durations: 
+        ctx = text[max(0, start-60):min(len(text), end+60)] 
+        if RENEWAL_CONTEXT.search(ctx): 
+            alerts.append({"type": "renewal-window", "duration": dur, "context": ctx.strip()}) 
+    return alerts
+
+def cosine_sim(a: Dict[str, int], b: Dict[str, int]) -> float:
+     keys = set(a) | set(b)
+     dot = sum(a.get(k, 0) * b.get(k, 0) for k in keys) 
+     na = math.sqrt(sum(v*v for v in a.values())) 
+     nb = math.sqrt(sum(v*v for v in b.values())) 
+     if na == 0 or nb == 0:
+         return 0.0 
+     return dot / (na * nb)
+
+def bow(doc: Doc, stop: Optional[set] = None) -> Dict[str, int]:
+     idx = as_index(doc) 
+     if stop is None or stop is idx.stop: 
+        return dict(idx.tf) 
+     counts: Dict[str, int] = {}
+     for toks in idx.tokens: 
+      for w in toks: 
+        if w not in stop and len(w) > 2: 
+            counts[w] = counts.get(w, 0) + 1 
+     return counts
+
+@timed()
+def compare_contracts(doc_a: Doc, doc_b: Doc, diff_mode: str = "auto", diff_limit: int = 50) -> Dict[str, Any]: 
+    idx_a = as_index(doc_a) 
+    idx_b = as_index(doc_b) 
+    text_a, text_b = idx_a.text, idx_b.text 
+    lang_a = idx_a.lang 
+    lang_b = idx_b.lang
+
+    bow_a = bow(idx_a)
+    bow_b = bow(idx_b)
+    cos = cosine_sim(bow_a, bow_b)
+
+    # "text": whole-document unified diff; "clause": hashed clause diff, first page only (see backend/diff.py)
+    if diff_mode == "auto":
+        from backend.diff import TEXT_DIFF_LIMIT
+        diff_mode = "text" if len(text_a) + len(text_b) <= TEXT_DIFF_LIMIT else "clause"
+    diff_page = None
+    if diff_mode == "clause":
+        from backend.diff import diff_page as clause_diff_page, format_hunks
+        diff_page = clause_diff_page(idx_a.clauses(), idx_b.clauses(), 0, diff_limit)
+        diff = format_hunks(diff_page["hunks"])
+    else:
+        diff = "\n".join(difflib.unified_diff(text_a.splitlines(), text_b.splitlines(), fromfile="A", tofile="B", lineterm=""))
+
+    # MinHash/LSH candidates on content terms + exact Jaccard on those only; see backend/align.py
+    alignment = align_clauses(idx_a.clause_tokens, idx_b.clause_tokens, idx_a.clause_terms, idx_b.clause_terms)
+    overlaps: List[Dict[str, Any]] = [
+      {"clause_a_index": i, "best_b_index": j, "similarity": round(sim, 3)}
+      for i, (sim, j) in enumerate(alignment["best"])
+    ]
+
+    return {
+      "lang_a": lang_a,
+      "lang_b": lang_b,
+      "cosine_similarity": round(cos, 3),
+      "diff": diff,
+      "diff_mode": diff_mode,
+      "diff_hunks": diff_page,
+      "overlaps": overlaps[:50],
+      "alignment": {k: alignment[k] for k in ("matched", "removed", "added")},
+    }
+
+#==============================
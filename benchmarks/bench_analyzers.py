@@ -0,0 +1,111 @@
+import argparse
+import gc
+import math
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.utils import compare_contracts, detect_risks, extract_clauses, keyword_qa, summarize_extract, upcoming_alerts
+from benchmarks.corpus import ContractSpec, contract_pair, generate_contract, parse_size
+from benchmarks.report import finish, new_report, peak_rss_mb
+
+#Microbenchmarks for the local analyzers on synthetic contracts from 1 KB to
+#10 MB. Each call gets a plain string, so the DocumentIndex build is part of the
+#measured cost, as it is for the first analyzer in a request. Every case must
+#scale about linearly: between consecutive sizes from SCALING_MIN_SIZE up, a
+#time growth exponent above --max-exponent fails the run. Run from the repo root:
+#    python -m benchmarks.bench_analyzers --sizes 1k 100k 1m --save-baseline bench_baseline.json
+#    python -m benchmarks.bench_analyzers --sizes 1k 100k 1m --baseline bench_baseline.json
+
+DEFAULT_SIZES = ["1k", "10k", "100k", "1m", "10m"]
+# Below this, fixed per-call costs dominate and the exponent says little
+SCALING_MIN_SIZE = "100k"
+MAX_EXPONENT = 1.2 # 1.0 is linear, 2.0 quadratic; the slack absorbs timing noise
+QUESTION = "When is the payment due and how much is the fee?"
+
+CASES: Dict[str, Callable[[str, str], Any]] = {
+    "extract_clauses": lambda a, b: extract_clauses(a),
+    "summarize_extract": lambda a, b: summarize_extract(a, max_sentences=6),
+    "keyword_qa": lambda a, b: keyword_qa(a, QUESTION),
+    "upcoming_alerts": lambda a, b: upcoming_alerts(a),
+    "detect_risks": lambda a, b: detect_risks(a),
+    "compare_contracts": lambda a, b: compare_contracts(a, b),
+}
+
+def measure(fn: Callable[[], Any], min_time: float, max_runs: int) -> List[float]:
+    # Repeats until min_time has been spent (at least once); GC is kept out of the timed region
+    runs: List[float] = []
+    spent = 0.0
+    while not runs or (spent < min_time and len(runs) < max_runs):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        runs.append(elapsed)
+        spent += elapsed
+    return runs
+
+def scaling(metrics: Dict[str, Any], min_size: str = SCALING_MIN_SIZE,
+            max_exponent: float = MAX_EXPONENT) -> Dict[str, Any]:
+    # exponent = log(t2 / t1) / log(s2 / s1) for each pair of consecutive measured sizes >= min_size
+    exponents: Dict[str, Dict[str, Dict[str, float]]] = {}
+    violations: List[Dict[str, Any]] = []
+    for case, by_lang in metrics.items():
+        if not isinstance(by_lang, dict):
+            continue
+        for lang, by_size in by_lang.items():
+            sizes: List[Tuple[int, str]] = sorted((parse_size(k), k) for k in by_size if parse_size(k) >= parse_size(min_size))
+            for (n1, k1), (n2, k2) in zip(sizes, sizes[1:]):
+                t1, t2 = by_size[k1]["min_s"], by_size[k2]["min_s"]
+                if n2 == n1 or t1 <= 0 or t2 <= 0:
+                    continue
+                exponent = round(math.log(t2 / t1) / math.log(n2 / n1), 3)
+                exponents.setdefault(case, {}).setdefault(lang, {})[f"{k1}-{k2}"] = exponent
+                if exponent > max_exponent:
+                    violations.append({"case": case, "lang": lang, "from": k1, "to": k2, "exponent": exponent})
+    return {"min_size": min_size, "max_exponent": max_exponent, "exponents": exponents, "violations": violations}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Analyzer microbenchmarks on synthetic contracts")
+    ap.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--langs", nargs="+", default=["en"])
+    ap.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    ap.add_argument("--max-exponent", type=float, default=MAX_EXPONENT, help="fail when time grows faster than size**this")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per case and size")
+    ap.add_argument("--max-runs", type=int, default=50)
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--save-baseline")
+    ap.add_argument("--tolerance", type=float, default=0.1)
+    args = ap.parse_args()
+
+    report = new_report("analyzers", {k: getattr(args, k) for k in ("sizes", "langs", "cases", "seed", "min_time", "max_exponent")})
+    for lang in args.langs:
+        for size in args.sizes:
+            spec = ContractSpec(lang, parse_size(size), seed=args.seed)
+            a, b = contract_pair(spec) if "compare_contracts" in args.cases else (generate_contract(spec), "")
+            mb = len(a.encode("utf-8")) / (1 << 20)
+            for case in args.cases:
+                runs = measure(lambda: CASES[case](a, b), args.min_time, args.max_runs)
+                best = min(runs)
+                report["metrics"].setdefault(case, {}).setdefault(lang, {})[size] = {
+                    "min_s": round(best, 6),
+                    "median_s": round(statistics.median(runs), 6),
+                    "mb_s": round(mb / best, 2) if best > 0 else 0.0,
+                }
+                print(f"{case:18} {lang} {size:>5} {best * 1000:10.2f} ms", file=sys.stderr)
+    report["scaling"] = scaling(report["metrics"], max_exponent=args.max_exponent)
+    for v in report["scaling"]["violations"]:
+        print(f"superlinear: {v['case']} {v['lang']} {v['from']} -> {v['to']} exponent {v['exponent']}", file=sys.stderr)
+    report["metrics"]["peak_rss_mb"] = peak_rss_mb()
+    status = finish(report, args.out, args.baseline, args.save_baseline, args.tolerance)
+    return 1 if report["scaling"]["violations"] else status
+
+if __name__ == "__main__":
+    sys.exit(main())
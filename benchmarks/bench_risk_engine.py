@@ -0,0 +1,65 @@
+import argparse
+import json
+import random
+import re
+import time
+
+from backend.risk_engine import get_engine
+
+#Risk-engine scaling benchmark: single combined scan vs. the old one-regex-per-rule
+#loop, on inputs of growing size. Run from the repo root:
+#    python -m benchmarks.bench_risk_engine --sizes 1 2 4 8
+
+LEGACY_PATTERNS = [
+    re.compile(r"auto[-\s]?renew|automatic renewal", re.I),
+    re.compile(r"indemnif(y|ies|ication)\b", re.I),
+    re.compile(r"exclusive jurisdiction|venue\b", re.I),
+    re.compile(r"unlimited liability|liability.*(unlimited|without limit)", re.I),
+    re.compile(r"non[-\s]?compete|restraint of trade", re.I),
+]
+
+FILLER = ("the supplier shall deliver the services in accordance with the schedule and "
+          "liability of either party is subject to the limits in this agreement").split()
+
+def make_text(size_mb: float, seed: int = 7, long_lines: bool = False) -> str:
+    # long_lines drops newlines and full stops: the worst case for liability.*(...)
+    rnd = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    out, n = [], 0
+    while n < target:
+        sent = " ".join(rnd.choice(FILLER) for _ in range(rnd.randint(8, 20)))
+        if rnd.random() < 0.01:
+            sent += " " + rnd.choice(["auto-renew", "indemnification", "exclusive jurisdiction", "non-compete"])
+        sent += " " if long_lines else ".\n"
+        out.append(sent)
+        n += len(sent)
+    return "".join(out)
+
+def legacy_scan(text: str):
+    # All hits, like RiskEngine.scan (the old detect_risks stopped at the first hit per rule)
+    return [m.span() for p in LEGACY_PATTERNS for m in p.finditer(text)]
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--long-lines", action="store_true")
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+    engine = get_engine([])
+    rows = []
+    for mb in args.sizes:
+        text = make_text(mb, long_lines=args.long_lines)
+        row = {"mb": mb, "engine_s": round(timed(engine.scan, text), 4)}
+        row["engine_s_per_mb"] = round(row["engine_s"] / mb, 4)
+        if not args.skip_legacy:
+            row["legacy_s"] = round(timed(legacy_scan, text), 4)
+        rows.append(row)
+        print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+#Seeded synthetic contracts in en, hi and te for the benchmarks. Every clause is
+#built from its own Random(seed:index), so the same arguments always give the
+#same text, and contract_pair() can edit a few clauses of a contract without
+#disturbing the rest (which is what /compare and the clause diff care about).
+#
+#    python -m benchmarks.corpus --out /tmp/corpus --langs en hi te --sizes 1k 100k 1m
+
+MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December")
+
+# Risk phrases are kept in English in every language: that is how they appear in
+# Indian contracts, and it is what the built-in risk rules match
+RISKS = ("This Agreement shall auto-renew unless terminated in writing.",
+         "The Supplier shall indemnify the Client against all third-party claims.",
+         "The courts of Mumbai shall have exclusive jurisdiction.",
+         "Liability under this clause is unlimited.",
+         "The Employee agrees to a non-compete period after termination.")
+
+LANGS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "en": {
+        "titles": ("DEFINITIONS", "SCOPE OF SERVICES", "PAYMENT TERMS", "TERM AND TERMINATION", "CONFIDENTIALITY",
+                   "INTELLECTUAL PROPERTY", "WARRANTIES", "LIMITATION OF LIABILITY", "GOVERNING LAW", "NOTICES"),
+        "filler": ("The {party} shall perform its obligations with reasonable skill and care.",
+                   "Each party shall keep the other informed of any matter that may affect the services.",
+                   "The {party} may not assign this Agreement without prior written consent.",
+                   "Any amendment to this Agreement must be in writing and signed by both parties.",
+                   "The {party} shall maintain accurate records of all work performed under this Agreement.",
+                   "Nothing in this Agreement creates a partnership or joint venture between the parties.",
+                   "The {party} shall comply with all applicable laws and regulations."),
+        "date": ("The {party} shall deliver the final report by {date}.", "This Agreement takes effect on {date}."),
+        "money": ("The Client shall pay {money} within thirty days of each invoice.", "A fee of {money} is payable on signature."),
+        "duration": ("The {party} may terminate this Agreement with {duration} notice.", "This Agreement remains in force for {duration}."),
+        "parties": ("Supplier", "Client", "Contractor", "Company"),
+        "detail": ("This applies to the {terms} schedule.", "The {terms} items are covered by this clause."),
+        "syllables": ("ka", "ro", "mi", "ten", "vel", "dor", "sa", "lin", "bru", "cha", "po", "ter", "nex", "ul", "ga", "fi"),
+    },
+    "hi": {
+        "titles": ("परिभाषाएँ", "सेवाओं का दायरा", "भुगतान की शर्तें", "अवधि और समाप्ति", "गोपनीयता",
+                   "बौद्धिक संपदा", "वारंटी", "दायित्व की सीमा", "शासी कानून", "सूचनाएँ"),
+        "filler": ("{party} अपने दायित्वों का पालन उचित कौशल और सावधानी के साथ करेगा।",
+                   "प्रत्येक पक्ष दूसरे पक्ष को सेवाओं को प्रभावित करने वाले किसी भी विषय की सूचना देगा।",
+                   "{party} पूर्व लिखित सहमति के बिना इस समझौते को हस्तांतरित नहीं करेगा।",
+                   "इस समझौते में कोई भी संशोधन लिखित रूप में और दोनों पक्षों द्वारा हस्ताक्षरित होना चाहिए।",
+                   "{party} इस समझौते के तहत किए गए सभी कार्यों का सटीक रिकॉर्ड रखेगा।",
+                   "{party} सभी लागू कानूनों और विनियमों का पालन करेगा।"),
+        "date": ("{party} अंतिम रिपोर्ट {date} तक प्रस्तुत करेगा।", "यह समझौता {date} से प्रभावी होगा।"),
+        "money": ("ग्राहक प्रत्येक चालान के तीस दिनों के भीतर {money} का भुगतान करेगा।", "हस्ताक्षर पर {money} का शुल्क देय है।"),
+        "duration": ("{party} {duration} की सूचना देकर इस समझौते को समाप्त कर सकता है।", "यह समझौता {duration} तक लागू रहेगा।"),
+        "parties": ("आपूर्तिकर्ता", "ग्राहक", "ठेकेदार", "कंपनी"),
+        "detail": ("यह {terms} अनुसूची पर लागू होता है।", "{terms} मदें इस खंड के अंतर्गत आती हैं।"),
+        "syllables": ("क", "रा", "मि", "ते", "ल", "दो", "सा", "नि", "बु", "चा", "पो", "र", "ने", "उ", "गा", "फि"),
+    },
+    "te": {
+        "titles": ("నిర్వచనాలు", "సేవల పరిధి", "చెల్లింపు నిబంధనలు", "కాలపరిమితి మరియు రద్దు", "గోప్యత",
+                   "మేధో సంపత్తి", "వారంటీలు", "బాధ్యత పరిమితి", "వర్తించే చట్టం", "నోటీసులు"),
+        "filler": ("{party} తన బాధ్యతలను తగిన నైపుణ్యం మరియు జాగ్రత్తతో నిర్వహించాలి.",
+                   "ప్రతి పక్షం సేవలను ప్రభావితం చేసే ఏ విషయాన్ని అయినా మరొక పక్షానికి తెలియజేయాలి.",
+                   "{party} ముందస్తు వ్రాతపూర్వక అనుమతి లేకుండా ఈ ఒప్పందాన్ని బదిలీ చేయకూడదు.",
+                   "ఈ ఒప్పందంలో ఏ సవరణ అయినా వ్రాతపూర్వకంగా ఉండాలి మరియు ఇరు పక్షాలు సంతకం చేయాలి.",
+                   "{party} ఈ ఒప్పందం కింద చేసిన అన్ని పనుల ఖచ్చితమైన రికార్డులను నిర్వహించాలి.",
+                   "{party} వర్తించే అన్ని చట్టాలు మరియు నిబంధనలను పాటించాలి."),
+        "date": ("{party} తుది నివేదికను {date} లోపు సమర్పించాలి.", "ఈ ఒప్పందం {date} నుండి అమలులోకి వస్తుంది."),
+        "money": ("క్లయింట్ ప్రతి ఇన్వాయిస్ అందిన ముప్పై రోజులలో {money} చెల్లించాలి.", "సంతకం చేసినప్పుడు {money} రుసుము చెల్లించాలి."),
+        "duration": ("{party} {duration} నోటీసుతో ఈ ఒప్పందాన్ని రద్దు చేయవచ్చు.", "ఈ ఒప్పందం {duration} పాటు అమలులో ఉంటుంది."),
+        "parties": ("సరఫరాదారు", "క్లయింట్", "కాంట్రాక్టర్", "కంపెనీ"),
+        "detail": ("ఇది {terms} షెడ్యూల్‌కు వర్తిస్తుంది.", "{terms} అంశాలు ఈ నిబంధన కిందకు వస్తాయి."),
+        "syllables": ("క", "రా", "మి", "తె", "ల", "దొ", "సా", "ని", "బు", "చా", "పొ", "ర", "నె", "ఉ", "గా", "ఫి"),
+    },
+}
+
+SIZE_SUFFIXES = {"k": 1 << 10, "m": 1 << 20}
+LEXICON_SIZE = 4000
+_lexicons: Dict[str, List[str]] = {}
+
+def lexicon(lang: str) -> List[str]:
+    # Pseudo-words that give clauses their own vocabulary, as real clauses have; without them
+    # every clause of a template corpus looks alike to the aligner
+    words = _lexicons.get(lang)
+    if words is None:
+        rnd = random.Random(f"lexicon:{lang}")
+        syllables = LANGS[lang]["syllables"]
+        words = sorted({"".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 4))) for _ in range(LEXICON_SIZE)})
+        _lexicons[lang] = words
+    return words
+
+def parse_size(value: str) -> int:
+    # "1k", "10m", "2048" -> bytes
+    value = value.strip().lower().rstrip("b")
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+class ContractSpec:
+    # Densities are per-sentence probabilities; sentences_per_clause sets how often a new clause starts
+    def __init__(self, lang: str = "en", size: int = 1 << 14, seed: int = 0, sentences_per_clause: int = 6,
+                 date_rate: float = 0.08, money_rate: float = 0.06, duration_rate: float = 0.05,
+                 risk_rate: float = 0.03, anchor: Optional[date] = None):
+        if lang not in LANGS:
+            raise ValueError(f"Unsupported language: {lang}")
+        self.lang = lang
+        self.size = size
+        self.seed = seed
+        self.sentences_per_clause = sentences_per_clause
+        self.date_rate = date_rate
+        self.money_rate = money_rate
+        self.duration_rate = duration_rate
+        self.risk_rate = risk_rate
+        # Dates are spread around the anchor so upcoming_alerts() has work to do; pin it for byte-identical output
+        self.anchor = anchor or date.today()
+
+def _date(rnd: random.Random, spec: ContractSpec) -> str:
+    d = spec.anchor + timedelta(days=rnd.randint(-365, 365))
+    if spec.lang == "en" and rnd.random() < 0.5:
+        return f"{MONTHS[d.month - 1]} {d.day}, {d.year}"
+    return d.strftime("%d/%m/%Y")
+
+def _money(rnd: random.Random, spec: ContractSpec) -> str:
+    amount = rnd.choice((500, 1200, 5000, 25000, 100000, 250000))
+    return f"USD {amount:,}" if spec.lang == "en" else f"INR {amount:,}"
+
+def _duration(rnd: random.Random) -> str:
+    return f"{rnd.choice((7, 15, 30, 60, 90))} days" if rnd.random() < 0.6 else f"{rnd.choice((6, 12, 24))} months"
+
+def _sentence(rnd: random.Random, spec: ContractSpec, topic: List[str]) -> str:
+    vocab = LANGS[spec.lang]
+    roll = rnd.random()
+    if roll < 0.4:
+        terms = rnd.sample(topic, 2) + rnd.sample(lexicon(spec.lang), 2)
+        return rnd.choice(vocab["detail"]).format(terms=" ".join(terms))
+    roll = rnd.random()
+    party = rnd.choice(vocab["parties"])
+    if roll < spec.risk_rate:
+        return rnd.choice(RISKS)
+    roll -= spec.risk_rate
+    if roll < spec.date_rate:
+        return rnd.choice(vocab["date"]).format(party=party, date=_date(rnd, spec))
+    roll -= spec.date_rate
+    if roll < spec.money_rate:
+        return rnd.choice(vocab["money"]).format(party=party, money=_money(rnd, spec))
+    roll -= spec.money_rate
+    if roll < spec.duration_rate:
+        return rnd.choice(vocab["duration"]).format(party=party, duration=_duration(rnd))
+    return rnd.choice(vocab["filler"]).format(party=party)
+
+def make_clause(spec: ContractSpec, index: int, variant: str = "") -> str:
+    rnd = random.Random(f"{spec.seed}:{spec.lang}:{index}{variant}")
+    title = LANGS[spec.lang]["titles"][index % len(LANGS[spec.lang]["titles"])]
+    n = max(1, int(rnd.gauss(spec.sentences_per_clause, spec.sentences_per_clause / 3)))
+    topic = rnd.sample(lexicon(spec.lang), 6)
+    body = " ".join(_sentence(rnd, spec, topic) for _ in range(n))
+    # A "12. " line is a clause heading for CLAUSE_SPLIT_REGEX in every script
+    return f"\n{index + 1}. \n{title}\n{body}\n"
+
+def _assemble(spec: ContractSpec, clause) -> str:
+    out: List[str] = ["MASTER SERVICES AGREEMENT\n" if spec.lang == "en" else "AGREEMENT\n"]
+    size = len(out[0])
+    i = 0
+    while size < spec.size:
+        c = clause(i)
+        out.append(c)
+        size += len(c.encode("utf-8"))
+        i += 1
+    return "".join(out)
+
+def generate_contract(spec: ContractSpec) -> str:
+    # About spec.size UTF-8 bytes (it stops after the clause that crosses the target)
+    return _assemble(spec, lambda i: make_clause(spec, i))
+
+def contract_pair(spec: ContractSpec, edit_rate: float = 0.1) -> Tuple[str, str]:
+    # (original, revision): the revision rewrites about edit_rate of the clauses and keeps the rest verbatim
+    edits = random.Random(f"{spec.seed}:edits")
+    a = generate_contract(spec)
+    b = _assemble(spec, lambda i: make_clause(spec, i, ":v" if edits.random() < edit_rate else ""))
+    return a, b
+
+def main():
+    ap = argparse.ArgumentParser(description="Write a seeded synthetic contract corpus")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--langs", nargs="+", default=["en", "hi", "te"])
+    ap.add_argument("--sizes", nargs="+", default=["1k", "100k", "1m"])
+    ap.add_argument("--count", type=int, default=1, help="contracts per language and size")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--anchor", type=date.fromisoformat, default=None, help="date the generated dates are spread around")
+    args = ap.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for lang in args.langs:
+        for size in args.sizes:
+            for k in range(args.count):
+                spec = ContractSpec(lang, parse_size(size), seed=args.seed + k, anchor=args.anchor)
+                path = os.path.join(args.out, f"{lang}_{size}_{k}.txt")
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write(generate_contract(spec))
+                print(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.corpus import ContractSpec, contract_pair, generate_contract, parse_size
+from benchmarks.report import finish, new_report, peak_rss_mb, percentile
+
+#End-to-end load harness: drives /analyze, /ask, /compare and /ws/{room_id}
+#in-process through Starlette's TestClient, with a fresh temporary data
+#directory and the IBM providers stubbed out (unset credentials, so every stage
+#takes its local path) unless --fake-ibm points them at `python -m backend.fake_ibm`.
+#Reports p50/p99 latency, throughput and peak RSS as JSON. Run from the repo root:
+#    python -m benchmarks.load --requests 100 --concurrency 8 --save-baseline load_baseline.json
+#    python -m benchmarks.load --requests 100 --concurrency 8 --baseline load_baseline.json
+
+IBM_ENV = ("WATSONX_APIKEY", "WATSONX_PROJECT_ID", "WATSONX_URL", "IBM_IAM_URL", "WATSON_NLU_APIKEY", "WATSON_NLU_URL")
+
+def configure_env(data_dir: str, fake_ibm: str):
+    # Must run before backend.main is imported: the stores and providers read these at import time
+    os.environ.update(
+        CLAUSEWISE_DOC_DB=os.path.join(data_dir, "docs.db"),
+        CLAUSEWISE_ROOM_DB=os.path.join(data_dir, "rooms.db"),
+        CLAUSEWISE_GEN_CACHE_DB=os.path.join(data_dir, "generations.db"),
+        CLAUSEWISE_CORPUS_DIR=os.path.join(data_dir, "corpus"),
+    )
+    os.environ.pop("CLAUSEWISE_CACHE_DB", None)
+    for name in IBM_ENV:
+        os.environ.pop(name, None)
+    if fake_ibm:
+        url = fake_ibm.rstrip("/")
+        os.environ.update(WATSONX_APIKEY="fake", WATSONX_PROJECT_ID="fake", WATSONX_URL=url,
+                          IBM_IAM_URL=f"{url}/identity/token", WATSON_NLU_APIKEY="fake", WATSON_NLU_URL=url)
+
+def summarize_latencies(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    ms = [x * 1000 for x in latencies]
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+    }
+
+def run_http(name: str, call: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int):
+        nonlocal errors
+        start = time.perf_counter()
+        resp = call(i)
+        elapsed = time.perf_counter() - start
+        with lock:
+            if resp.status_code == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    result = summarize_latencies(latencies, errors, time.perf_counter() - start)
+    print(f"{name:8} p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.2f} req/s",
+          file=sys.stderr)
+    return result
+
+def run_rooms(client, rooms: int, clients_per_room: int, ops_per_client: int) -> Dict[str, Any]:
+    # Each client inserts ops_per_client characters one op at a time; latency is send -> own entry broadcast back
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def session(room: int):
+        nonlocal errors
+        local: List[float] = []
+        with client.websocket_connect(f"/ws/bench-{room}") as ws:
+            state = ws.receive_json()
+            me, rev = state["payload"]["client_id"], state["payload"]["rev"]
+            for k in range(ops_per_client):
+                start = time.perf_counter()
+                ws.send_json({"type": "ops", "rev": rev, "ops": [{"op": "insert", "pos": 0, "text": "x"}]})
+                while True:
+                    msg = ws.receive_json()
+                    if msg.get("type") == "resync":
+                        rev = msg["payload"]["rev"]
+                        with lock:
+                            errors += 1
+                        break
+                    if msg.get("type") != "ops":
+                        continue
+                    rev = msg["payload"]["rev"]
+                    if any(e.get("client") == me for e in msg["payload"]["entries"]):
+                        local.append(time.perf_counter() - start)
+                        break
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=rooms * clients_per_room) as pool:
+        list(pool.map(session, [r for r in range(rooms) for _ in range(clients_per_room)]))
+    result = summarize_latencies(latencies, errors, time.perf_counter() - start)
+    print(f"{'ws ops':8} p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.2f} ops/s",
+          file=sys.stderr)
+    return result
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="In-process load test of the ClauseWise API")
+    ap.add_argument("--requests", type=int, default=100, help="requests per HTTP endpoint")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--size", default="20k", help="contract size, e.g. 20k or 1m")
+    ap.add_argument("--langs", nargs="+", default=["en", "hi", "te"])
+    ap.add_argument("--pool", type=int, default=12, help="distinct contracts; requests cycle through them, so repeats hit the cache")
+    ap.add_argument("--rooms", type=int, default=4)
+    ap.add_argument("--clients-per-room", type=int, default=3)
+    ap.add_argument("--ops-per-client", type=int, default=50)
+    ap.add_argument("--endpoints", nargs="+", default=["analyze", "ask", "compare", "ws"], choices=["analyze", "ask", "compare", "ws"])
+    ap.add_argument("--fake-ibm", default="", help="base URL of a running backend.fake_ibm server")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--save-baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    args = ap.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="clausewise-load-")
+    configure_env(data_dir, args.fake_ibm)
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    size = parse_size(args.size)
+    specs = [ContractSpec(args.langs[i % len(args.langs)], size, seed=args.seed + i) for i in range(args.pool)]
+    docs = [generate_contract(s).encode("utf-8") for s in specs]
+    pairs: List[Tuple[bytes, bytes]] = [tuple(t.encode("utf-8") for t in contract_pair(s)) for s in specs]
+    report = new_report("load", {k: getattr(args, k) for k in (
+        "requests", "concurrency", "size", "langs", "pool", "rooms", "clients_per_room", "ops_per_client", "endpoints", "fake_ibm", "seed")})
+    metrics = report["metrics"]
+
+    with TestClient(app) as client:
+        if "analyze" in args.endpoints:
+            metrics["analyze"] = run_http("analyze", lambda i: client.post(
+                "/analyze", files={"file": (f"c{i}.txt", docs[i % len(docs)])}), args.requests, args.concurrency)
+        if "ask" in args.endpoints:
+            doc_ids = [client.post("/documents", files={"file": (f"c{i}.txt", d)}).json()["doc_id"] for i, d in enumerate(docs)]
+            metrics["ask"] = run_http("ask", lambda i: client.post(
+                "/ask", data={"question": "When is the payment due?", "doc_id": doc_ids[i % len(doc_ids)]}), args.requests, args.concurrency)
+        if "compare" in args.endpoints:
+            metrics["compare"] = run_http("compare", lambda i: client.post("/compare", files={
+                "file_a": ("a.txt", pairs[i % len(pairs)][0]), "file_b": ("b.txt", pairs[i % len(pairs)][1])}), args.requests, args.concurrency)
+        if "ws" in args.endpoints:
+            metrics["ws"] = run_rooms(client, args.rooms, args.clients_per_room, args.ops_per_client)
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return finish(report, args.out, args.baseline, args.save_baseline, args.tolerance)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import json
+import platform
+import resource
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+#Shared JSON reporting for the benchmark scripts: every report carries its
+#metrics as nested dicts of numbers, and compare() flattens two reports and
+#flags metrics that moved the wrong way by more than a tolerance. Metric names
+#decide the direction: throughput-like names are better when higher, everything
+#else (seconds, latencies, RSS) when lower.
+
+HIGHER_IS_BETTER = ("throughput", "per_s", "mb_s")
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1 << 20) if sys.platform == "darwin" else rss / 1024, 1)
+
+def new_report(kind: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "metrics": {},
+    }
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+def flatten(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for key, value in metrics.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            out.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = float(value)
+    return out
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> Dict[str, Any]:
+    # {"regressions": [...], "improvements": [...]} with the relative change of each metric that moved past tolerance
+    cur, base = flatten(report["metrics"]), flatten(baseline["metrics"])
+    regressions, improvements = [], []
+    for name in sorted(cur.keys() & base.keys()):
+        old, new = base[name], cur[name]
+        if old == 0:
+            continue
+        change = (new - old) / abs(old)
+        better = change > 0 if any(h in name for h in HIGHER_IS_BETTER) else change < 0
+        if abs(change) <= tolerance:
+            continue
+        entry = {"metric": name, "baseline": old, "current": new, "change": round(change, 3)}
+        (improvements if better else regressions).append(entry)
+    return {"tolerance": tolerance, "regressions": regressions, "improvements": improvements}
+
+def finish(report: Dict[str, Any], out: Optional[str] = None, baseline: Optional[str] = None,
+           save_baseline: Optional[str] = None, tolerance: float = 0.1) -> int:
+    # Prints (and optionally writes) the report; exit status 1 when a baseline comparison found regressions
+    status = 0
+    if baseline:
+        with open(baseline, encoding="utf-8") as fh:
+            report["comparison"] = compare(report, json.load(fh), tolerance)
+        status = 1 if report["comparison"]["regressions"] else 0
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    for path in (out, save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(text + "\n")
+    return status
@@ -0,0 +1,3 @@
+from clausewise.client import ClausewiseClient, ClausewiseError, content_id
+
+__all__ = ["ClausewiseClient", "ClausewiseError", "content_id"]
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+#Python client for the ClauseWise API, shared by the Gradio and Streamlit apps.
+#One pooled requests.Session with timeouts; every file is uploaded once to
+#/documents and then referenced by doc_id (the SHA-256 of its bytes, computed
+#locally, so a file the server already has is never re-sent); /analyze,
+#/compare and /ask results are cached client-side, keyed by those ids.
+
+DEFAULT_URL = os.getenv("CLAUSEWISE_BACKEND_URL", "http://127.0.0.1:8000")
+DEFAULT_TIMEOUT = (5.0, 120.0) # connect, read
+CACHE_SIZE = 128
+CACHE_TTL = 600.0 # alerts depend on today's date, so analyses are not kept forever
+
+Content = Union[bytes, str]
+
+class ClausewiseError(RuntimeError):
+    def __init__(self, status: int, detail: Any):
+        super().__init__(f"HTTP {status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+def content_id(data: Content) -> str:
+    # Same digest the server uses as doc_id and analysis cache key
+    raw = data.encode("utf-8") if isinstance(data, str) else data
+    return hashlib.sha256(raw).hexdigest()
+
+class _TTLCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.items: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item[0] > self.ttl:
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self.items[key] = (time.monotonic(), value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_entries:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.items.clear()
+
+class ClausewiseClient:
+    def __init__(self, base_url: str = DEFAULT_URL, timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 pool_size: int = 16, cache_size: int = CACHE_SIZE, cache_ttl: float = CACHE_TTL):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Retries only where repeating is harmless: idempotent methods and connection failures
+        retry = Retry(total=2, connect=2, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD", "DELETE"}))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = _TTLCache(cache_size, cache_ttl)
+        self._uploaded: set = set()
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        resp = self.session.request(method, f"{self.base_url}{path}", timeout=kwargs.pop("timeout", self.timeout), **kwargs)
+        if resp.status_code >= 400:
+            try:
+                detail = resp.json().get("detail", resp.text)
+            except ValueError:
+                detail = resp.text
+            raise ClausewiseError(resp.status_code, detail)
+        return resp
+
+    def _json(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        return self._request(method, path, **kwargs).json()
+
+    #---- Documents ----
+
+    def upload(self, data: Content, filename: str = "contract.txt", force: bool = False) -> str:
+        # doc_id for data, uploading it only if neither this client nor the server has it yet
+        doc_id = content_id(data)
+        if not force:
+            with self._lock:
+                if doc_id in self._uploaded:
+                    return doc_id
+            try:
+                self._json("GET", f"/documents/{doc_id}")
+            except ClausewiseError as exc:
+                if exc.status != 404:
+                    raise
+                force = True
+        if force:
+            raw = data.encode("utf-8") if isinstance(data, str) else data
+            doc_id = self._json("POST", "/documents", files={"file": (filename, raw)})["doc_id"]
+        with self._lock:
+            self._uploaded.add(doc_id)
+        return doc_id
+
+    def _with_doc(self, data: Content, filename: str, call):
+        # The server's document store is bounded; a 404 means it evicted ours, so upload again once
+        doc_id = self.upload(data, filename)
+        try:
+            return call(doc_id)
+        except ClausewiseError as exc:
+            if exc.status != 404:
+                raise
+            with self._lock:
+                self._uploaded.discard(doc_id)
+            return call(self.upload(data, filename, force=True))
+
+    #---- Analysis ----
+
+    def cached_analysis(self, data: Content) -> Optional[Dict[str, Any]]:
+        return self.cache.get(("analyze", content_id(data)))
+
+    def analyze(self, data: Content, filename: str = "contract.txt", refresh: bool = False) -> Dict[str, Any]:
+        key = ("analyze", content_id(data))
+        if not refresh:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+        result = self._with_doc(data, filename, lambda doc_id: self._json("POST", "/analyze", data={"doc_id": doc_id}))
+        self.cache.set(key, result)
+        return result
+
+    def ask(self, data: Content, question: str, filename: str = "contract.txt") -> Dict[str, Any]:
+        key = ("ask", content_id(data), question.strip())
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        result = self._with_doc(data, filename, lambda doc_id: self._json(
+            "POST", "/ask", data={"doc_id": doc_id, "question": question}))
+        if not result.get("degraded"):
+            self.cache.set(key, result)
+        return result
+
+    def compare(self, data_a: Content, data_b: Content, diff_mode: str = "auto") -> Dict[str, Any]:
+        key = ("compare", content_id(data_a), content_id(data_b), diff_mode)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        doc_b = self.upload(data_b, "b.txt")
+        result = self._with_doc(data_a, "a.txt", lambda doc_a: self._json(
+            "POST", "/compare", data={"doc_id_a": doc_a, "doc_id_b": doc_b, "diff_mode": diff_mode}))
+        self.cache.set(key, result)
+        return result
+
+    #---- Batches ----
+
+    def analyze_many(self, documents: Sequence[Content], max_workers: int = 4,
+                     return_exceptions: bool = False) -> List[Any]:
+        # Concurrent analyze() over a shared connection pool; results in input order
+        def one(data: Content):
+            try:
+                return self.analyze(data)
+            except Exception as exc:
+                if return_exceptions:
+                    return exc
+                raise
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(one, documents))
+
+    def submit_batch(self, files: Iterable[Tuple[str, bytes]]) -> Dict[str, Any]:
+        # Server-side bulk job (POST /analyze/batch); .zip archives are expanded by the server
+        return self._json("POST", "/analyze/batch", files=[("files", (name, raw)) for name, raw in files])
+
+    def batch_status(self, job_id: str) -> Dict[str, Any]:
+        return self._json("GET", f"/analyze/batch/{job_id}")
+
+    def iter_batch_results(self, job_id: str, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        # Items as the server finishes them, until the job is done
+        resp = self._request("GET", f"/analyze/batch/{job_id}/results", params={"offset": offset, "stream": "true"},
+                             stream=True, timeout=(self.timeout[0], None))
+        with resp:
+            for line in resp.iter_lines():
+                if line:
+                    yield json.loads(line)
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Tests import backend.* and benchmarks.* from the repo root, however pytest is invoked
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Stores opened through the module-level singletons write here, never into the checkout
+os.environ.setdefault("CLAUSEWISE_DATA_DIR", tempfile.mkdtemp(prefix="clausewise-tests-"))
@@ -0,0 +1,59 @@
+from backend.align import MAX_CANDIDATES, align_clauses, candidate_pairs, jaccard
+from backend.utils import DocumentIndex, compare_contracts
+from benchmarks.corpus import ContractSpec, contract_pair, parse_size
+
+def test_candidate_ratio_stays_small_on_large_documents():
+    a, b = contract_pair(ContractSpec("en", parse_size("256k"), seed=0))
+    idx_a, idx_b = DocumentIndex(a), DocumentIndex(b)
+    n, m = len(idx_a.clause_terms), len(idx_b.clause_terms)
+    assert n > 500 and m > 500
+    pairs = candidate_pairs(idx_a.clause_terms, idx_b.clause_terms)
+    # all-pairs would be n*m; blocking must keep this to a few candidates per clause
+    assert len(pairs) <= 0.01 * n * m
+    assert len(pairs) <= 5 * n
+
+def test_candidates_per_clause_are_capped():
+    # 40 near-identical clauses all collide (under the common-term share); each keeps at most MAX_CANDIDATES partners
+    base = "supplier delivers widgets warehouse invoice pallet freight carrier customs"
+    sets_a = [frozenset(base.split() + [f"a{i}"]) for i in range(40)] + [frozenset({f"x{i}", f"y{i}"}) for i in range(400)]
+    sets_b = [frozenset(base.split() + [f"b{i}"]) for i in range(40)] + [frozenset({f"u{i}", f"v{i}"}) for i in range(400)]
+    pairs = candidate_pairs(sets_a, sets_b)
+    per_clause = {}
+    for i, _ in pairs:
+        per_clause[i] = per_clause.get(i, 0) + 1
+    assert per_clause and max(per_clause.values()) <= MAX_CANDIDATES
+    assert all(i < 40 and j < 40 for i, j in pairs)
+
+def test_unchanged_and_edited_clauses_are_aligned():
+    a, b = contract_pair(ContractSpec("en", parse_size("128k"), seed=3))
+    clauses = DocumentIndex(a).clauses()
+    edited = clauses[40].replace("shall", "will", 1).rstrip() + " Notices are sent by courier.\n"
+    b = a.replace(clauses[40], edited)
+    idx_a, idx_b = DocumentIndex(a), DocumentIndex(b)
+    alignment = align_clauses(idx_a.clause_tokens, idx_b.clause_tokens, idx_a.clause_terms, idx_b.clause_terms)
+    by_a = {m["a"]: m for m in alignment["matched"]}
+    assert by_a[40]["b"] == 40 and by_a[40]["status"] == "modified"
+    unchanged = [m for m in alignment["matched"] if m["status"] == "unchanged"]
+    assert len(unchanged) >= len(clauses) - 1
+    assert alignment["removed"] == [] and alignment["added"] == []
+
+def test_small_inputs_match_brute_force():
+    a = ["the tenant shall pay rent monthly", "the landlord shall repair the roof", "either party may terminate"]
+    b = ["either party may terminate on notice", "the tenant shall pay rent every month"]
+    sets_a = [frozenset(s.split()) for s in a]
+    sets_b = [frozenset(s.split()) for s in b]
+    best = align_clauses(sets_a, sets_b)["best"]
+    for i, s in enumerate(sets_a):
+        sims = [jaccard(s, t) for t in sets_b]
+        assert best[i][0] == max(sims)
+        assert best[i][1] == sims.index(max(sims))
+
+def test_compare_contracts_reports_alignment():
+    # clause headings are "N. " lines (CLAUSE_SPLIT_REGEX)
+    a = "\n1. \nThe term is twelve months.\n2. \nThe client pays USD 5,000 monthly for the services.\n"
+    b = a + "3. \nRecords may be audited yearly by an independent auditor.\n"
+    b = b.replace("5,000", "6,000")
+    result = compare_contracts(a, b)
+    assert result["alignment"]["added"] == [2]
+    statuses = [m["status"] for m in result["alignment"]["matched"]]
+    assert statuses.count("unchanged") >= 1 and "modified" in statuses
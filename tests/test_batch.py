@@ -0,0 +1,94 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+import backend.batch as batch
+from backend.batch import BatchManager, BatchTooLarge, analyze_local, read_batch_files
+from backend.utils import detect_risks, extract_clauses
+
+LEASE = "\n1. \nThe tenant pays rent of USD 2,000 monthly.\n2. \nEither party may terminate with 30 days notice.\n"
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+def test_archives_expand_to_their_documents():
+    raw = _zip({"a.txt": LEASE, "docs/b.txt": LEASE.upper(), "__MACOSX/._a.txt": "x", ".hidden": "x", "docs/": ""})
+    files = read_batch_files([("plain.txt", b"hello"), ("bundle.zip", raw)])
+    assert [name for name, _ in files] == ["plain.txt", "a.txt", "docs/b.txt"]
+    assert files[1][1] == LEASE.encode()
+
+def test_member_count_is_limited():
+    raw = _zip({f"{i}.txt": "x" for i in range(5)})
+    with pytest.raises(BatchTooLarge):
+        read_batch_files([("bundle.zip", raw)], max_files=4)
+    assert len(read_batch_files([("bundle.zip", raw)], max_files=5)) == 5
+
+def test_zip_bomb_is_rejected_before_decompressing(monkeypatch):
+    # 8 MB of zeros deflates to a few KB; the declared size is what gets checked
+    raw = _zip({"bomb.txt": b"\0" * (8 << 20)})
+    assert len(raw) < 64 << 10
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda *a, **k: pytest.fail("member was decompressed"))
+    with pytest.raises(BatchTooLarge, match="bomb.txt"):
+        read_batch_files([("bundle.zip", raw)], max_file_bytes=1 << 20)
+
+def test_total_uncompressed_size_is_limited():
+    raw = _zip({f"{i}.txt": b"a" * 1000 for i in range(4)})
+    with pytest.raises(BatchTooLarge, match="in total"):
+        read_batch_files([("bundle.zip", raw), ("plain.txt", b"b" * 500)], max_total_bytes=4000)
+
+def test_analyze_local_matches_the_analyzers():
+    result = analyze_local(LEASE)
+    assert result["language"] == "en"
+    assert result["contract_type"] == "Lease Agreement"
+    assert result["clauses"] == extract_clauses(LEASE)
+    assert result["risks"] == detect_risks(LEASE)
+
+def test_batch_endpoint_answers_413(monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    client = TestClient(main.app)
+    monkeypatch.setattr(main, "BATCH_MAX_UPLOAD_BYTES", 100)
+    resp = client.post("/analyze/batch", files=[("files", ("big.txt", b"x" * 101, "text/plain"))])
+    assert resp.status_code == 413
+    monkeypatch.setattr(main, "BATCH_MAX_UPLOAD_BYTES", 1 << 20)
+    bomb = _zip({"bomb.txt": b"\0" * (20 << 20)})
+    resp = client.post("/analyze/batch", files=[("files", ("bundle.zip", bomb, "application/zip"))])
+    assert resp.status_code == 413
+    resp = client.post("/analyze/batch", files=[("files", ("bundle.zip", b"not a zip", "application/zip"))])
+    assert resp.status_code == 400
+
+def _off_loop(fn, seen):
+    # Records whether fn ran with no event loop in its thread, i.e. in an executor
+    def wrapper(*args):
+        try:
+            asyncio.get_running_loop()
+            seen.append("loop")
+        except RuntimeError:
+            seen.append("executor")
+        return fn(*args)
+    return wrapper
+
+def test_archives_are_expanded_off_the_event_loop(monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    seen = []
+    monkeypatch.setattr(main, "read_batch_files", _off_loop(read_batch_files, seen))
+    resp = TestClient(main.app).post("/analyze/batch", files=[("files", ("bundle.zip", _zip({"a.txt": LEASE}), "application/zip"))])
+    assert resp.status_code == 200 and seen == ["executor"]
+
+def test_documents_are_hashed_off_the_event_loop(monkeypatch):
+    seen = []
+    monkeypatch.setattr(batch, "content_digest", _off_loop(batch.content_digest, seen))
+    async def scenario():
+        job = BatchManager().submit([("a.txt", LEASE.encode()), ("b.txt", (LEASE + "3. \nMore.\n").encode())])
+        return [item async for item in job.follow()]
+    items = asyncio.run(scenario())
+    assert sorted(item["status"] for item in items) == ["ok", "ok"] and seen == ["executor", "executor"]
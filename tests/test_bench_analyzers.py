@@ -0,0 +1,19 @@
+from benchmarks.bench_analyzers import scaling
+
+def _metrics(times):
+    return {"compare_contracts": {"en": {size: {"min_s": t} for size, t in times.items()}}, "peak_rss_mb": 100.0}
+
+def test_linear_growth_passes():
+    result = scaling(_metrics({"1k": 0.5, "100k": 0.01, "1m": 0.1, "10m": 1.05}))
+    assert result["violations"] == []
+    assert set(result["exponents"]["compare_contracts"]["en"]) == {"100k-1m", "1m-10m"}
+
+def test_quadratic_growth_fails():
+    result = scaling(_metrics({"100k": 0.01, "1m": 1.0, "10m": 100.0}))
+    assert [(v["from"], v["to"]) for v in result["violations"]] == [("100k", "1m"), ("1m", "10m")]
+    assert all(1.9 < v["exponent"] <= 2.0 for v in result["violations"])
+
+def test_sizes_below_the_floor_are_ignored():
+    # 1k -> 100k looks quadratic only because fixed costs dominate at 1k
+    result = scaling(_metrics({"1k": 0.00001, "100k": 0.1}))
+    assert result["violations"] == [] and result["exponents"] == {}
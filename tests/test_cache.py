@@ -0,0 +1,61 @@
+import time
+import uuid
+
+from backend.cache import MISSING, AnalysisCache, MemoryTier, content_digest
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryTier(max_entries=2, ttl=0)
+    tier.set("a", 1)
+    tier.set("b", 2)
+    assert tier.get("a") == 1 # a is now the most recent
+    tier.set("c", 3)
+    assert tier.get("b") is MISSING and tier.get("a") == 1 and tier.get("c") == 3
+
+def test_memory_tier_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    tier = MemoryTier(max_entries=8, ttl=10)
+    tier.set("a", 1)
+    now[0] += 9
+    assert tier.get("a") == 1
+    now[0] += 2
+    assert tier.get("a") is MISSING and len(tier) == 0
+
+def test_hits_and_misses_are_counted_per_stage():
+    cache = AnalysisCache(max_entries=8, ttl=0)
+    calls = []
+    compute = lambda: calls.append(1) or ["clause"]
+    assert cache.get_or_compute("d", "clauses", compute) == ["clause"]
+    assert cache.get_or_compute("d", "clauses", compute) == ["clause"]
+    assert cache.get("other", "clauses") is MISSING
+    assert calls == [1]
+    stats = cache.stats()
+    assert stats["stages"]["clauses"] == {"memory_hits": 1, "disk_hits": 0, "misses": 2}
+    assert stats["hit_ratio"] == round(1 / 3, 3)
+
+def test_disk_tier_serves_a_restarted_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+    AnalysisCache(db_path=path).set("d", "risk_hits", [{"label": "Termination", "start": 0, "end": 9}])
+    fresh = AnalysisCache(db_path=path)
+    assert fresh.get("d", "risk_hits") == [{"label": "Termination", "start": 0, "end": 9}]
+    assert fresh.get("d", "risk_hits") # promoted to memory
+    assert fresh.stats()["stages"]["risk_hits"] == {"memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+def test_endpoints_share_entries_by_content_digest():
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    client = TestClient(main.app)
+    text = f"\n1. \nThe tenant pays rent monthly. Ref {uuid.uuid4().hex}.\n2. \nEither party may terminate with notice.\n"
+    raw = text.encode()
+    first = client.post("/analyze", files={"file": ("a.txt", raw, "text/plain")}).json()
+    before = main.ANALYSIS_CACHE.stats()["stages"]["clauses"]["memory_hits"]
+    second = client.post("/analyze", files={"file": ("copy.txt", raw, "text/plain")}).json()
+    assert second["clauses"] == first["clauses"]
+    assert main.ANALYSIS_CACHE.stats()["stages"]["clauses"]["memory_hits"] == before + 1
+    # /compare builds its indexes through the same digest-keyed entries
+    digest = content_digest(raw)
+    assert main.ANALYSIS_CACHE.get(digest, "index") is not MISSING
+    resp = client.post("/compare", files={"file_a": ("a.txt", raw, "text/plain"), "file_b": ("b.txt", raw, "text/plain")})
+    assert resp.status_code == 200
+    assert main.ANALYSIS_CACHE.stats()["stages"]["index"]["memory_hits"] >= 2
@@ -0,0 +1,114 @@
+import io
+import uuid
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from backend.utils import detect_risks
+from clausewise import ClausewiseClient, ClausewiseError, content_id
+
+class AppAdapter(BaseAdapter):
+    # Sends the client's real requests.Session traffic to the app in-process and logs (method, path)
+    def __init__(self, app):
+        from fastapi.testclient import TestClient
+        super().__init__()
+        self.app_client = TestClient(app).__enter__() # one event loop for all requests, so batch jobs keep running
+        self.calls = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        path = request.path_url
+        self.calls.append((request.method, path.split("?")[0]))
+        resp = self.app_client.request(request.method, path, content=request.body, headers=dict(request.headers))
+        out = requests.Response()
+        out.status_code = resp.status_code
+        out.headers = CaseInsensitiveDict(resp.headers)
+        out.raw = io.BytesIO(resp.content)
+        out.url = request.url
+        out.request = request
+        out.encoding = resp.encoding
+        return out
+
+    def close(self):
+        self.app_client.__exit__(None, None, None)
+
+def contract(tag: str) -> str:
+    # Unique per test run so the server-side stores start cold
+    return (f"\n1. \nThe tenant shall pay rent of USD 1,200 monthly. Ref {tag}-{uuid.uuid4().hex}.\n"
+            "2. \nEither party may terminate this agreement with 30 days notice.\n"
+            "3. \nThe landlord is liable for structural repairs.\n")
+
+@pytest.fixture
+def app_client():
+    import backend.main as main
+
+    adapter = AppAdapter(main.app)
+    client = ClausewiseClient("http://testserver")
+    client.session.mount("http://testserver", adapter)
+    client.adapter = adapter
+    yield client
+    client.close()
+    adapter.close()
+
+def test_documents_are_uploaded_once(app_client):
+    text = contract("upload")
+    doc_id = app_client.upload(text)
+    assert doc_id == content_id(text.encode("utf-8"))
+    assert app_client.adapter.calls == [("GET", f"/documents/{doc_id}"), ("POST", "/documents")]
+    assert app_client.upload(text) == doc_id
+    assert len(app_client.adapter.calls) == 2
+    # A second client finds the document on the server and does not send it again
+    other = ClausewiseClient("http://testserver")
+    other.session.mount("http://testserver", app_client.adapter)
+    assert other.upload(text) == doc_id
+    assert app_client.adapter.calls[2:] == [("GET", f"/documents/{doc_id}")]
+
+def test_analysis_is_cached_by_content(app_client):
+    text = contract("analyze")
+    result = app_client.analyze(text)
+    assert len(result["clauses"]) == 3 and result["risks"] == detect_risks(text)
+    calls = len(app_client.adapter.calls)
+    assert app_client.analyze(text.encode("utf-8")) == result == app_client.cached_analysis(text)
+    assert len(app_client.adapter.calls) == calls
+    app_client.analyze(text, refresh=True)
+    assert app_client.adapter.calls[calls:] == [("POST", "/analyze")]
+
+def test_an_evicted_document_is_uploaded_again(app_client):
+    import backend.main as main
+
+    text = contract("evicted")
+    doc_id = app_client.upload(text)
+    main.DOC_STORE.delete(doc_id)
+    del app_client.adapter.calls[:]
+    answer = app_client.ask(text, "How much is the rent?")
+    assert answer["doc_id"] == doc_id and "1,200" in answer["answer"]
+    assert app_client.adapter.calls == [("POST", "/ask"), ("POST", "/documents"), ("POST", "/ask")]
+
+def test_compare_sends_ids_and_caches(app_client):
+    a, b = contract("a"), contract("b") + "4. \nThe tenant may sublet with consent.\n"
+    result = app_client.compare(a, b)
+    assert result == app_client.compare(a, b)
+    assert [c for c in app_client.adapter.calls if c[1] == "/compare"] == [("POST", "/compare")]
+
+def test_errors_carry_status_and_detail(app_client):
+    with pytest.raises(ClausewiseError) as exc:
+        app_client.batch_status("no-such-job")
+    assert exc.value.status == 404 and exc.value.detail == "Unknown batch job"
+
+def test_batches_stream_results(app_client):
+    files = [(f"c{i}.txt", contract(f"batch{i}").encode()) for i in range(3)]
+    job = app_client.submit_batch(files)
+    items = list(app_client.iter_batch_results(job["job_id"]))
+    assert sorted(item["filename"] for item in items) == ["c0.txt", "c1.txt", "c2.txt"]
+    status = app_client.batch_status(job["job_id"])
+    assert status["status"] == "done" and status["completed"] == 3
+
+def test_analyze_many_keeps_order_and_can_return_errors(app_client):
+    texts = [contract(f"many{i}") for i in range(3)]
+    results = app_client.analyze_many(texts, max_workers=3)
+    assert [r["clauses"][0] for r in results] == [t.splitlines()[2] for t in texts]
+    app_client.cache.clear()
+    broken = ClausewiseClient("http://127.0.0.1:9", timeout=(0.2, 0.2))
+    out = broken.analyze_many(["x"], return_exceptions=True)
+    assert isinstance(out[0], Exception)
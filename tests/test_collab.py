@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import backend.collab_manager as collab_manager
+from backend.collab_manager import CollabManager
+from backend.ot import apply_ops
+from backend.pubsub import InProcessPubSub
+
+class FakeWS:
+    def __init__(self, stalled=False, broken=False):
+        self.sent = []
+        self.closed_with = None
+        self.stalled = asyncio.Event() if stalled else None
+        self.broken = broken
+
+    async def send_text(self, text):
+        if self.broken:
+            raise RuntimeError("socket gone")
+        if self.stalled is not None:
+            await self.stalled.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=None):
+        self.closed_with = code
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_a_stalled_client_does_not_hold_up_the_room():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        fast, slow = FakeWS(), FakeWS(stalled=True)
+        await collab.join("r", slow)
+        await collab.join("r", fast)
+        for i in range(5):
+            await asyncio.wait_for(collab.broadcast("r", {"type": "alert", "payload": i}), 0.5)
+        await settle()
+        assert [m["payload"] for m in fast.sent if m["type"] == "alert"] == [0, 1, 2, 3, 4]
+        assert slow.sent == []
+        assert collab.metrics()["r"]["queue_depth_max"] >= 5
+        slow.stalled.set()
+        await settle()
+        assert [m["payload"] for m in slow.sent if m["type"] == "alert"] == [0, 1, 2, 3, 4]
+    asyncio.run(scenario())
+
+def test_a_client_that_falls_too_far_behind_is_evicted(monkeypatch):
+    monkeypatch.setattr(collab_manager, "CLIENT_QUEUE_LIMIT", 3)
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        fast, slow = FakeWS(), FakeWS(stalled=True)
+        await collab.join("r", slow)
+        await collab.join("r", fast)
+        for i in range(4):
+            collab.broadcast_nowait("r", {"type": "alert", "payload": i})
+            await settle()
+        assert slow.closed_with == 1013
+        metrics = collab.metrics()["r"]
+        assert metrics["clients"] == 1 and metrics["evicted"] == 1
+        assert len([m for m in fast.sent if m["type"] == "alert"]) == 4
+    asyncio.run(scenario())
+
+def test_a_stalled_client_catches_up_on_merged_ops(monkeypatch):
+    monkeypatch.setattr(collab_manager, "CLIENT_QUEUE_LIMIT", 3)
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        fast, slow = FakeWS(), FakeWS(stalled=True)
+        await collab.join("r", slow)
+        writer = await collab.join("r", fast)
+        for i in range(10):
+            await collab.apply_ops("r", writer.id, i, [{"op": "insert", "pos": i, "text": str(i)}])
+            await asyncio.sleep(collab_manager.TICK_SECONDS * 2) # one ops broadcast per edit
+        collab.broadcast_nowait("r", {"type": "alert", "payload": "late"})
+        assert slow.closed_with is None and len(collab.rooms["r"].clients) == 2
+        slow.stalled.set()
+        await settle()
+        state = slow.sent[0]["payload"]
+        text, rev = state["snapshot"]["document"], state["rev"]
+        batches = [m["payload"] for m in slow.sent if m["type"] == "ops"]
+        assert len(batches) < 10
+        for batch in batches:
+            assert batch["from_rev"] == rev
+            for entry in batch["entries"]:
+                text, rev = apply_ops(text, entry["ops"]), entry["rev"]
+            assert rev == batch["rev"]
+        assert (text, rev) == ("0123456789", 10)
+        assert slow.sent[-1]["type"] == "alert" and collab.metrics()["r"]["coalesced"] > 0
+    asyncio.run(scenario())
+
+def test_a_client_whose_socket_fails_is_dropped():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        await collab.join("r", FakeWS(broken=True))
+        await settle()
+        assert collab.metrics()["r"]["clients"] == 0
+    asyncio.run(scenario())
+
+def test_broadcasts_are_encoded_once_per_room(monkeypatch):
+    calls = []
+    encode = collab_manager.encode
+    monkeypatch.setattr(collab_manager, "encode", lambda m: calls.append(m.get("type")) or encode(m))
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        for _ in range(10):
+            await collab.join("r", FakeWS())
+        calls.clear()
+        collab.broadcast_nowait("r", {"type": "alert", "payload": "x"})
+        assert calls == ["alert"]
+        assert not collab.broadcast_nowait("missing", {"type": "alert"})
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+import pytest
+
+from backend.corpus import ContractCorpus, _CSR
+from backend.utils import DocumentIndex
+
+LEASE = "\n1. \nThe tenant pays rent of USD 2,000 monthly to the landlord.\n2. \nThe landlord repairs the roof and the heating.\n"
+NDA = "\n1. \nThe recipient keeps confidential information secret.\n2. \nDisclosure to third parties requires written consent.\n"
+SERVICES = "\n1. \nThe supplier delivers consulting services each quarter.\n2. \nInvoices are payable within thirty days.\n"
+
+def test_similar_ranks_the_closest_contract_first(tmp_path):
+    corpus = ContractCorpus(str(tmp_path))
+    for doc_id, text in (("lease", LEASE), ("nda", NDA), ("services", SERVICES)):
+        corpus.add(doc_id, DocumentIndex(text), doc_id)
+    query = DocumentIndex(LEASE.replace("2,000", "2,500"))
+    result = corpus.similar(query, k=2)
+    assert result["matches"][0]["doc_id"] == "lease"
+    assert len(result["matches"]) <= 2
+    assert result["clause_matches"][0]["doc_id"] == "lease"
+
+def test_add_defers_statistics_to_the_next_query(tmp_path, monkeypatch):
+    calls = []
+    weighted = _CSR.weighted
+    monkeypatch.setattr(_CSR, "weighted", lambda self, idf: calls.append(1) or weighted(self, idf))
+    corpus = ContractCorpus(str(tmp_path))
+    for i in range(5):
+        corpus.add(f"doc{i}", DocumentIndex(LEASE + f"\n3. \nExtra clause number {i} about parking.\n"))
+    assert calls == []
+    corpus.similar(DocumentIndex(LEASE), k=3)
+    corpus.similar(DocumentIndex(NDA), k=3)
+    assert len(calls) == 2 # doc and clause matrices, once
+    corpus.add("nda", DocumentIndex(NDA))
+    assert corpus.similar(DocumentIndex(NDA), k=1)["matches"][0]["doc_id"] == "nda"
+    assert len(calls) == 4
+
+def test_corpus_directory_is_created_on_first_use(tmp_path):
+    root = tmp_path / "corpus"
+    corpus = ContractCorpus(str(root))
+    assert not root.exists()
+    assert corpus.stats()["documents"] == 0
+    assert root.is_dir()
+
+def test_reopened_corpus_answers_the_same(tmp_path):
+    corpus = ContractCorpus(str(tmp_path))
+    corpus.add("lease", DocumentIndex(LEASE))
+    corpus.add("nda", DocumentIndex(NDA))
+    before = corpus.similar(DocumentIndex(LEASE), k=2)
+    reopened = ContractCorpus(str(tmp_path))
+    assert reopened.stats() == corpus.stats()
+    assert reopened.similar(DocumentIndex(LEASE), k=2) == before
+
+@pytest.mark.parametrize("k", [0, -1, 2.5, "3", True])
+def test_similar_rejects_invalid_k(tmp_path, k):
+    corpus = ContractCorpus(str(tmp_path))
+    corpus.add("lease", DocumentIndex(LEASE))
+    with pytest.raises(ValueError):
+        corpus.similar(DocumentIndex(LEASE), k=k)
@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta
+
+from dateutil import parser as dtparser
+
+from backend.dates import _fast_parse, normalize_date, parse_date
+from backend.utils import DATE_REGEX, upcoming_alerts
+
+MONTH_NAMES = ["January", "Feb", "March", "Apr", "May", "June", "Jul", "August", "Sept", "October", "Nov", "December"]
+
+def _samples():
+    rng = random.Random(7)
+    for _ in range(400):
+        y, m, d = rng.randint(1990, 2060), rng.randint(1, 12), rng.randint(1, 28)
+        yield f"{y}-{m:02d}-{d:02d}"
+        sep = rng.choice("/-.")
+        yield f"{m}{sep}{d}{sep}{y}"
+        yield f"{d + 12 if d <= 16 else d}{sep}{m}{sep}{y % 100:02d}" # day first only when it cannot be a month
+        yield f"{MONTH_NAMES[m - 1]} {d}, {y}"
+
+def test_fast_paths_agree_with_dateutil():
+    for text in _samples():
+        assert DATE_REGEX.fullmatch(text), text
+        fast = _fast_parse(text)
+        assert fast is not None, text
+        assert fast == dtparser.parse(text, dayfirst=False, fuzzy=True), text
+
+def test_impossible_dates_fall_back_and_fail_cleanly():
+    assert normalize_date("2024-02-30") is None
+    assert normalize_date("13/13/2024") is None
+
+def test_results_are_memoized():
+    parse_date.cache_clear()
+    for _ in range(50):
+        assert normalize_date("March 3, 2031") == "2031-03-03"
+    info = parse_date.cache_info()
+    assert info.misses == 1 and info.hits == 49
+
+def test_upcoming_alerts_keep_dates_inside_the_window():
+    soon = (datetime.now() + timedelta(days=10)).date().isoformat()
+    late = (datetime.now() + timedelta(days=200)).date().isoformat()
+    past = (datetime.now() - timedelta(days=10)).date().isoformat()
+    text = f"Payment is due on {soon}. The option lapses on {late}. Signed on {past}. The term renews every 12 months."
+    alerts = upcoming_alerts(text, days_ahead=60)
+    assert [a["excerpt"] for a in alerts if a["type"] == "deadline"] == [soon]
+    assert any(a["type"] == "renewal-window" and a["duration"].startswith("12 months") for a in alerts)
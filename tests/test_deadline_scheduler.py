@@ -0,0 +1,106 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import backend.deadline_scheduler as deadline_scheduler
+from backend.collab_manager import CollabManager
+from backend.deadline_scheduler import LEAD_DAYS, DeadlineScheduler, scan_document
+from backend.pubsub import InProcessPubSub
+from tests.test_collab import FakeWS, settle
+
+def day(offset: int) -> str:
+    return (datetime.now() + timedelta(days=offset)).date().isoformat()
+
+async def debounced(scheduler, room_id="r"):
+    # Runs the pending debounce right away instead of waiting DEBOUNCE_SECONDS
+    sched = scheduler.rooms[room_id]
+    handle, sched.debounce = sched.debounce, None
+    handle.cancel()
+    await scheduler._recompute(room_id, sched)
+    await settle()
+
+def alerts(ws):
+    return [m["payload"] for m in ws.sent if m["type"] == "alert"]
+
+def test_scan_document_keeps_future_dates_and_renewal_windows():
+    deadlines, renewals = scan_document(
+        f"Payment was due on {day(-3)}. The report is due on {day(10)}. "
+        "This agreement will automatically renew unless notice is given 30 days before expiry."
+    )
+    assert list(deadlines) == [day(10)]
+    assert renewals == {"30 days"}
+
+def test_deadlines_inside_a_lead_window_alert_once_and_the_rest_are_queued():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        scheduler = DeadlineScheduler(collab)
+        ws = FakeWS()
+        conn = await collab.join("r", ws)
+        await collab.update_document("r", f"Delivery is due on {day(3)}.", conn.id)
+        await settle()
+        await debounced(scheduler)
+        [alert] = alerts(ws)
+        assert alert["kind"] == "deadline" and alert["date"] == day(3) and alert["days_left"] == 3
+        # 60, 30 and 7 days ahead have passed; 1 and 0 are still to come
+        assert sorted(e[4] for e in scheduler.heap) == [0, 1]
+        # Recomputing the same text neither repeats the alert nor grows the heap
+        scheduler.document_changed("r", collab.rooms["r"].state["document"])
+        await debounced(scheduler)
+        assert len(alerts(ws)) == 1 and len(scheduler.heap) == 2
+    asyncio.run(scenario())
+
+def test_due_entries_fire_from_the_timer_task(monkeypatch):
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        scheduler = DeadlineScheduler(collab)
+        ws = FakeWS()
+        conn = await collab.join("r", ws)
+        await collab.update_document("r", f"Delivery is due on {day(3)}.", conn.id)
+        await settle()
+        await debounced(scheduler)
+        scheduler.start()
+        await settle()
+        # Jump two days ahead: the 1-day lead entry is now due
+        real_time = time.time
+        monkeypatch.setattr(deadline_scheduler.time, "time", lambda: real_time() + 2 * 86400)
+        scheduler._wakeup.set()
+        await settle()
+        await scheduler.close()
+        assert [a["days_left"] for a in alerts(ws)] == [3, 1]
+        assert scheduler.fired == 2 and [e[4] for e in scheduler.heap] == [0]
+    asyncio.run(scenario())
+
+def test_edits_invalidate_queued_entries_and_eviction_drops_the_room():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        scheduler = DeadlineScheduler(collab)
+        ws = FakeWS()
+        conn = await collab.join("r", ws)
+        await collab.update_document("r", f"Closing is on {day(90)}.", conn.id)
+        await settle()
+        await debounced(scheduler)
+        assert len(scheduler.heap) == len(LEAD_DAYS) and alerts(ws) == []
+        await collab.update_document("r", f"Closing is on {day(120)}.", conn.id)
+        await settle()
+        await debounced(scheduler)
+        live = [e for e in scheduler.heap if scheduler._live(e)]
+        assert {e[3] for e in live} == {day(120)} and len(scheduler.heap) == 2 * len(LEAD_DAYS)
+        scheduler.document_changed("r", None)
+        assert "r" not in scheduler.rooms and not any(scheduler._live(e) for e in scheduler.heap)
+    asyncio.run(scenario())
+
+def test_renewal_windows_alert_once_per_duration():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        scheduler = DeadlineScheduler(collab)
+        ws = FakeWS()
+        conn = await collab.join("r", ws)
+        text = "This lease will automatically renew for 12 months unless cancelled."
+        await collab.update_document("r", text, conn.id)
+        await settle()
+        await debounced(scheduler)
+        await collab.update_document("r", text + " Notes added.", conn.id)
+        await settle()
+        await debounced(scheduler)
+        assert [(a["kind"], a["duration"]) for a in alerts(ws)] == [("renewal-window", "12 months")]
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import pytest
+
+from backend.diff import WORD_DIFF_LIMIT, clause_opcodes, diff_page, format_hunks, iter_hunks, word_diff
+from backend.utils import compare_contracts
+
+A = ["The term is twelve months.", "Rent is USD 2,000 per month.", "The landlord repairs the roof.", "Notices go by email."]
+
+def test_formatting_changes_are_not_differences():
+    b = ["the term is   twelve months", "Rent is USD 2,000 per month.", "THE LANDLORD REPAIRS THE ROOF", "Notices go by email."]
+    assert clause_opcodes(A, b) == []
+
+def test_changed_inserted_and_deleted_clauses():
+    b = [A[0], "Rent is USD 2,500 per month.", A[2], "Pets are not allowed."]
+    ops = clause_opcodes(A, b)
+    assert ops == [("modify", 1, 1), ("modify", 3, 3)]
+    ops = clause_opcodes(A, [A[0], A[2], A[3], "Pets are not allowed."])
+    assert ops == [("delete", 1, -1), ("insert", -1, 3)]
+
+def test_word_diff_marks_only_the_changed_words():
+    segs = word_diff("Rent is USD 2,000 per month.", "Rent is USD 2,500 per month.")
+    assert segs == [["=", "Rent is USD"], ["-", "2,000"], ["+", "2,500"], ["=", "per month."]]
+
+def test_huge_clauses_are_diffed_sentence_by_sentence():
+    sentences = [f"Sentence number {i} says the supplier delivers item {i} on time." for i in range(WORD_DIFF_LIMIT // 5)]
+    a = " ".join(sentences)
+    b = a.replace("item 7 on", "item 70 on")
+    segs = word_diff(a, b)
+    changed = [text for tag, text in segs if tag != "="]
+    assert changed == ["7", "70"]
+    assert sum(len(text.split()) for tag, text in segs if tag in "=-") == len(a.split())
+
+def test_pages_and_streamed_hunks_agree():
+    a = [f"Clause {i} keeps its text." for i in range(30)]
+    b = [c.replace("keeps", "changes") if i % 3 == 0 else c for i, c in enumerate(a)]
+    page = diff_page(a, b, offset=2, limit=3)
+    assert page["total"] == 10 and len(page["hunks"]) == 3
+    assert [h["a_index"] for h in page["hunks"]] == [6, 9, 12]
+    assert list(iter_hunks(a, b, 2, 3)) == page["hunks"]
+    assert "[-keeps-] [+changes+]" in format_hunks(page["hunks"])
+
+@pytest.mark.parametrize("offset, limit", [(-1, 5), (0, 0), (2, -3)])
+def test_pages_reject_bad_offsets_and_limits(offset, limit):
+    with pytest.raises(ValueError):
+        diff_page(A, A[::-1], offset, limit)
+
+def test_diff_endpoint_answers_400_for_bad_paging():
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    client = TestClient(main.app)
+    files = {"file_a": ("a.txt", "\n1. \nRent is due monthly.\n".encode()), "file_b": ("b.txt", "\n1. \nRent is due weekly.\n".encode())}
+    assert client.post("/compare/diff", files=files, data={"offset": "-1"}).status_code == 400
+    assert client.post("/compare/diff", files=files, data={"limit": "0"}).status_code == 400
+    assert client.post("/compare/diff", files=files, data={"limit": "0", "stream": "true"}).status_code == 200
+    page = client.post("/compare/diff", files=files).json()
+    assert page["total"] == 1 and page["hunks"][0]["op"] == "modify"
+
+def test_compare_switches_to_clause_mode_on_large_documents():
+    clause = "\n{}. \nThe supplier delivers goods number {} within thirty days of each order.\n"
+    a = "".join(clause.format(i, i) for i in range(1, 3000))
+    b = a.replace("goods number 1500 ", "goods number 1501 ")
+    result = compare_contracts(a, b)
+    assert result["diff_mode"] == "clause"
+    assert result["diff_hunks"]["total"] == 1
+    small = compare_contracts("\n1. \nThe term is one year.\n", "\n1. \nThe term is two years.\n")
+    assert small["diff_mode"] == "text" and "+The term is two years." in small["diff"]
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+from backend.doc_store import DocumentStore
+from backend.retrieval import DocumentRetriever
+from backend.utils import DocumentIndex, keyword_qa
+
+LEASE = ("\n1. \nThe tenant pays rent of USD 2,000 on the first day of each month.\n"
+         "2. \nEither party may terminate this lease with 60 days written notice.\n"
+         "3. \nThe landlord repairs the roof, the heating and the plumbing.\n")
+
+def test_documents_round_trip_with_their_retriever(tmp_path):
+    path = str(tmp_path / "nested" / "docs.db")
+    store = DocumentStore(path)
+    assert not os.path.exists(path)
+    doc = store.put("d1", DocumentIndex(LEASE))
+    assert os.path.exists(path)
+    reopened = DocumentStore(path).get("d1")
+    assert reopened.text == LEASE and reopened.meta() == doc.meta()
+    question = "How much notice is needed to terminate?"
+    assert reopened.retriever.answer(question) == doc.retriever.answer(question)
+    assert "60 days" in reopened.retriever.answer(question)
+
+def test_bm25_answers_like_a_fresh_index():
+    index = DocumentIndex(LEASE)
+    restored = DocumentRetriever.from_dict(DocumentRetriever.build(index).to_dict())
+    for question in ("When is the rent due?", "Who repairs the roof?"):
+        assert restored.answer(question) == DocumentRetriever.build(index).answer(question)
+    assert "roof" in restored.answer("Who repairs the roof?")
+    assert keyword_qa(LEASE, "Who repairs the roof?")
+
+def test_delete_forgets_the_document(tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.db"))
+    store.put("d1", DocumentIndex(LEASE))
+    assert store.delete("d1") and store.get("d1") is None
+    assert not store.delete("d1")
+
+def test_importing_the_app_creates_no_files(tmp_path):
+    # Every store opens lazily; with no data dir override nothing may appear in the working directory
+    env = {k: v for k, v in os.environ.items() if not k.startswith("CLAUSEWISE_")}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = root
+    (tmp_path / "frontend").mkdir() # the app serves ./frontend, so it runs from a directory that has one
+    subprocess.run([sys.executable, "-c", "import backend.main"], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == ["frontend"]
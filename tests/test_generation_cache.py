@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+from backend.ibm_clients import GenerationCache
+from backend.pipeline import run_stage
+
+def counting(value, delay=0.0):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+    return generate, calls
+
+def test_key_depends_on_every_input():
+    base = GenerationCache.key("m", {"t": 0.2}, "sys", "user")
+    assert base == GenerationCache.key("m", {"t": 0.2}, "sys", "user")
+    assert len({base, GenerationCache.key("m2", {"t": 0.2}, "sys", "user"), GenerationCache.key("m", {"t": 0.3}, "sys", "user"),
+                GenerationCache.key("m", {"t": 0.2}, "sys2", "user"), GenerationCache.key("m", {"t": 0.2}, "sys", "user2")}) == 5
+
+def test_disk_tier_is_created_on_first_write_and_survives_restarts(tmp_path):
+    path = tmp_path / "data" / "generations.db"
+    cache = GenerationCache(db_path=str(path))
+    assert not path.exists()
+    cache.set("k", "text")
+    assert path.exists()
+    assert GenerationCache(db_path=str(path)).get("k") == "text"
+
+def test_hits_misses_and_empty_results():
+    cache = GenerationCache()
+    generate, calls = counting("text")
+
+    async def main():
+        assert await cache.aget_or_generate("k", generate) == "text"
+        assert await cache.aget_or_generate("k", generate) == "text"
+        empty, empty_calls = counting("")
+        assert await cache.aget_or_generate("e", empty) == ""
+        assert await cache.aget_or_generate("e", empty) == ""
+        return len(empty_calls)
+    assert asyncio.run(main()) == 2 # failed/empty generations are retried, not cached
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    db = str(tmp_path / "gen.db")
+    GenerationCache(db_path=db).get_or_generate("k", lambda: "stored")
+    assert GenerationCache(db_path=db).get_or_generate("k", lambda: "regenerated") == "stored"
+
+def test_concurrent_requests_are_coalesced():
+    cache = GenerationCache()
+    generate, calls = counting("once", delay=0.05)
+
+    async def main():
+        return await asyncio.gather(*[cache.aget_or_generate("k", generate) for _ in range(10)])
+    assert asyncio.run(main()) == ["once"] * 10
+    assert len(calls) == 1 and cache.stats()["coalesced"] == 9
+
+def test_threads_are_coalesced():
+    cache = GenerationCache()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.05)
+        return "once"
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.get_or_generate("k", generate))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert out == ["once"] * 8 and len(calls) == 1
+
+def test_cancelled_leader_hands_over_to_a_follower():
+    cache = GenerationCache()
+    generate, calls = counting("gen", delay=0.3)
+
+    async def stage():
+        return await cache.aget_or_generate("k", generate)
+
+    async def main():
+        return await asyncio.gather(run_stage("simplify", stage, fallback=lambda: "fb", deadline=0.1),
+                                    run_stage("simplify", stage, fallback=lambda: "fb", deadline=2))
+    short, long = asyncio.run(main())
+    assert (short.value, short.degraded) == ("fb", True)
+    assert (long.value, long.degraded) == ("gen", False)
+    assert len(calls) == 2 and cache.stats()["abandoned"] == 1 and cache.stats()["inflight"] == 0
+
+def test_cancelled_follower_does_not_affect_the_others():
+    cache = GenerationCache()
+    generate, calls = counting("gen", delay=0.2)
+
+    async def stage():
+        return await cache.aget_or_generate("k", generate)
+
+    async def main():
+        return await asyncio.gather(run_stage("simplify", stage, fallback=lambda: "fb", deadline=2),
+                                    run_stage("simplify", stage, fallback=lambda: "fb", deadline=0.05),
+                                    run_stage("simplify", stage, fallback=lambda: "fb", deadline=2))
+    assert [r.value for r in asyncio.run(main())] == ["gen", "fb", "gen"]
+    assert len(calls) == 1
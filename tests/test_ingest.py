@@ -0,0 +1,65 @@
+import io
+import re
+
+from backend.ingest import RegexStream, SpooledUpload, SplitStream, analyze_stream, iter_clauses, iter_sentences
+from backend.utils import DATE_REGEX, DocumentIndex, clause_spans, find_entities_regex, risk_hits, sentence_tokenize
+from benchmarks.corpus import ContractSpec, generate_contract
+
+def upload(text: str) -> SpooledUpload:
+    raw = text.encode("utf-8")
+    return SpooledUpload("digest", len(raw), io.BytesIO(raw))
+
+def pieces(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+CONTRACT = generate_contract(ContractSpec("en", 1 << 16, seed=11, risk_rate=0.2))
+
+def test_chunks_decode_characters_split_across_reads():
+    text = "అద్దె ఒప్పందం. किराया समझौता। " * 200
+    assert "".join(upload(text).chunks(chunk_size=7)) == text
+    assert upload(text).read_text() == text
+
+def test_split_stream_matches_in_memory_split():
+    for size in (13, 500, 1 << 20):
+        assert list(iter_sentences(pieces(CONTRACT, size))) == sentence_tokenize(CONTRACT)
+        assert [(s, e) for s, e, _ in iter_clauses(pieces(CONTRACT, size))] == list(clause_spans(CONTRACT))
+
+def test_regex_stream_matches_finditer():
+    expected = [(m.start(), m.end(), m.group(0)) for m in DATE_REGEX.finditer(CONTRACT)]
+    for size in (17, 1000):
+        stream = RegexStream(DATE_REGEX)
+        got = [hit[:3] for chunk in pieces(CONTRACT, size) for hit in stream.feed(chunk)] + [hit[:3] for hit in stream.close()]
+        assert got == expected
+
+def test_split_stream_does_not_emit_segments_that_may_grow():
+    stream = SplitStream(re.compile(r"\n+"), holdback=4)
+    assert stream.feed("first line\nsecond li") == [(0, 10, "first line")]
+    assert stream.feed("ne\nthird") == [(11, 22, "second line")]
+    assert stream.close() == [(23, 28, "third")]
+
+def test_streamed_analysis_matches_in_memory_analyzers():
+    # overlapping risk hits included: the indemnity hit lies inside the liability one
+    text = CONTRACT + "\n99. \nLiability for indemnification claims shall be unlimited.\n"
+    index = DocumentIndex(text)
+    out = analyze_stream(upload(text))
+    assert out["clauses"] == index.clauses()
+    assert out["risk_hits"] == risk_hits(index)
+    entities = find_entities_regex(index)
+    assert out["entities"] == {k: entities[k] for k in ("dates", "money", "durations")}
+    assert out["language"] == "en"
+
+def test_streamed_risk_hits_include_headings():
+    # Headings are clause separators; a rule matching one must still be reported, outside any clause
+    text = ("Intro text here.\nNON-COMPETE \nThe supplier shall not work for competitors.\n"
+            "INDEMNIFICATION \nThe supplier shall hold the client harmless.\n") * 3
+    expected = risk_hits(DocumentIndex(text))
+    assert [(h["rule"], h["start"], h["clause"]) for h in expected[:2]] == [("non-compete", 17, -1), ("indemnity", 75, -1)]
+    assert analyze_stream(upload(text))["risk_hits"] == expected
+
+def test_split_stream_keeps_separator_spans_across_chunks():
+    stream = SplitStream(re.compile(r"\n[A-Z]{4,}\n"), holdback=8, keep_separators=True)
+    text = "one\nHEADING\ntwo\nOTHER\nthree"
+    for chunk in pieces(text, 3):
+        stream.feed(chunk)
+    stream.close()
+    assert stream.separator_spans == [(3, 12, "\nHEADING\n"), (15, 22, "\nOTHER\n")]
@@ -0,0 +1,89 @@
+import asyncio
+import re
+
+from backend import metrics
+from backend.metrics import Registry, record, server_timing, span, timed
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    calls = registry.counter("jobs", "Jobs run")
+    calls.inc(kind="batch")
+    calls.inc(2, kind="batch")
+    calls.inc(kind='say "hi"\n')
+    hist = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(v, route="/x")
+    registry.register_collector(lambda: [("rooms", "gauge", "Rooms", [({}, 2), ({"room": "a"}, 0.5)])])
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP jobs Jobs run", "# TYPE jobs counter"]
+    assert 'jobs_total{kind="batch"} 3' in lines
+    assert 'jobs_total{kind="say \\"hi\\"\\n"} 1' in lines
+    # Buckets are cumulative and end with +Inf
+    assert [l for l in lines if l.startswith("latency_seconds")] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 1',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 4.25',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+    assert "# TYPE rooms gauge" in lines and "rooms 2" in lines and 'rooms{room="a"} 0.5' in lines
+    # Asking for an existing metric returns it rather than a second family
+    assert registry.counter("jobs", "other help") is calls
+
+def test_a_failing_collector_does_not_break_the_scrape():
+    registry = Registry()
+    registry.counter("ok", "fine").inc()
+    def broken():
+        raise KeyError("gone")
+    registry.register_collector(broken)
+    text = registry.render()
+    assert "ok_total 1" in text and "# collector broken failed: KeyError" in text
+
+def test_spans_are_collected_per_request():
+    record("outside", 0.01) # no request in progress: only the histogram sees it
+    token, timings = metrics.start_request()
+    try:
+        with span("parse"):
+            pass
+
+        @timed()
+        def extract():
+            return 1
+
+        @timed("remote.call")
+        async def call():
+            return 2
+
+        assert extract() == 1 and asyncio.run(call()) == 2
+    finally:
+        metrics.end_request(token)
+    record("after", 0.01)
+    assert [name for name, _ in timings] == ["parse", "extract", "remote.call"]
+    assert all(seconds >= 0 for _, seconds in timings)
+
+def test_server_timing_sums_repeated_spans():
+    header = server_timing([("simplify", 0.01), ("nlu analyze", 0.002), ("simplify", 0.03)], total=0.05)
+    assert header == 'simplify;dur=40.0;desc="x2", nlu_analyze;dur=2.0, total;dur=50.0'
+
+def test_responses_carry_server_timing_and_metrics_are_scraped():
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    client = TestClient(main.app)
+    raw = b"1. The tenant pays rent monthly.\n2. Either party may terminate with notice.\n"
+    resp = client.post("/compare", files={"file_a": ("a.txt", raw, "text/plain"), "file_b": ("b.txt", raw + b"3. New.\n", "text/plain")})
+    assert resp.status_code == 200
+    names = [part.split(";")[0] for part in resp.headers["Server-Timing"].split(", ")]
+    assert "compare_contracts" in names and names[-1] == "total"
+    scrape = client.get("/metrics")
+    assert scrape.status_code == 200 and scrape.headers["content-type"].startswith("text/plain")
+    body = scrape.text
+    assert re.search(r'clausewise_http_request_seconds_count\{method="POST",route="/compare",status="200"\} [1-9]', body)
+    assert 'clausewise_span_seconds_count{span="compare_contracts"}' in body
+    for family in ("clausewise_cache_hit_ratio", "clausewise_provider_breaker_state", "clausewise_ws_rooms"):
+        assert f"# TYPE {family} gauge" in body
+
+def test_profiles_are_kept_up_to_a_limit():
+    ids = [metrics.keep_profile(f"main;f {i}") for i in range(metrics.PROFILE_KEEP + 3)]
+    assert ids[0] not in metrics.PROFILES and metrics.PROFILES[ids[-1]] == f"main;f {metrics.PROFILE_KEEP + 2}"
+    assert len(metrics.PROFILES) == metrics.PROFILE_KEEP
@@ -0,0 +1,136 @@
+import asyncio
+import io
+import re
+import uuid
+
+import pytest
+
+import backend.nlu as nlu
+from backend.cache import AnalysisCache
+from backend.ingest import SpooledUpload
+from backend.nlu import _merge, chunked_nlu, nlu_chunks, stream_nlu_chunks, streamed_nlu
+from backend.pipeline import Degraded
+
+TEXT = " ".join(f"{i}. Acme Corp shall pay the fee of USD 1,000 by 01/02/2030 under clause {i}." for i in range(1, 41))
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(nlu, "ANALYSIS_CACHE", AnalysisCache(max_entries=256, ttl=0))
+
+def fake_nlu(calls, fail=lambda chunk: False):
+    # Finds "Acme Corp" with chunk-relative offsets, like the NLU service
+    async def analyze(chunk):
+        calls.append(chunk)
+        if fail(chunk):
+            raise RuntimeError("503")
+        mentions = [{"text": m.group(), "location": [m.start(), m.end()]} for m in re.finditer("Acme Corp", chunk)]
+        return {
+            "language": "en",
+            "entities": [{"type": "Organization", "text": "Acme Corp", "relevance": 0.5, "count": len(mentions), "mentions": mentions}],
+            "keywords": [{"text": "fee", "relevance": 0.4, "count": chunk.count("fee")}],
+        }
+    return analyze
+
+def test_chunks_are_whole_clauses_within_the_limit():
+    chunks = nlu_chunks(TEXT, limit=400)
+    assert len(chunks) > 1
+    for offset, chunk in chunks:
+        assert len(chunk) <= 400 and TEXT[offset:offset + len(chunk)] == chunk
+    # Only whitespace between clauses is left out
+    assert "".join(c for _, c in chunks).replace(" ", "") == TEXT.replace(" ", "")
+
+def test_an_overlong_clause_is_cut_at_whitespace():
+    text = "word " * 500
+    chunks = nlu_chunks(text, limit=300)
+    assert all(len(c) <= 300 for _, c in chunks)
+    assert all(set(c.split()) == {"word"} for _, c in chunks) # no word split in two
+
+def test_merge_adds_counts_combines_relevance_and_shifts_mentions():
+    items = [
+        {"type": "Organization", "text": "Acme", "relevance": 0.5, "count": 1, "mentions": [{"text": "Acme", "location": [0, 4]}]},
+        {"type": "Organization", "text": "ACME", "relevance": 0.5, "count": 2, "mentions": [{"text": "ACME", "location": [3, 7]}]},
+        {"type": "Person", "text": "Bo", "relevance": 0.9, "count": 1},
+    ]
+    merged = _merge(items, lambda e: (e["type"], e["text"].lower()), [0, 100, 0], limit=10)
+    assert [e["text"] for e in merged] == ["Bo", "Acme"]
+    acme = merged[1]
+    assert acme["count"] == 3 and acme["relevance"] == 0.75
+    assert [m["location"] for m in acme["mentions"]] == [[0, 4], [103, 107]]
+    assert "mentions" not in merged[0]
+    assert len(_merge(items, lambda e: e["text"], [0, 0, 0], limit=1)) == 1
+
+def test_chunked_nlu_maps_offsets_back_into_the_document():
+    calls = []
+    out = asyncio.run(chunked_nlu(TEXT, fake_nlu(calls), limit=400))
+    assert out["chunks"] == len(calls) > 1 and out["fallback_chunks"] == 0
+    [acme] = out["entities"]
+    assert acme["count"] == 40 and len(acme["mentions"]) == 40
+    assert all(TEXT[s:e] == "Acme Corp" for s, e in (m["location"] for m in acme["mentions"]))
+    assert out["keywords"][0]["count"] == 40 and out["language"] == "en"
+
+def test_chunks_are_cached_by_content():
+    calls = []
+    asyncio.run(chunked_nlu(TEXT, fake_nlu(calls), limit=400))
+    first = len(calls)
+    asyncio.run(chunked_nlu(TEXT, fake_nlu(calls), limit=400))
+    assert len(calls) == first
+    # Editing one clause only sends the chunk holding it
+    asyncio.run(chunked_nlu(TEXT.replace("USD 1,000 by 01/02/2030 under clause 20.", "USD 9,000 by 01/02/2030 under clause 20."),
+                            fake_nlu(calls), limit=400))
+    assert len(calls) == first + 1
+
+def test_failed_chunks_fall_back_to_regex_and_degrade():
+    calls = []
+    failing = lambda chunk: "clause 1." in chunk
+    with pytest.raises(Degraded) as exc:
+        asyncio.run(chunked_nlu(TEXT, fake_nlu(calls, failing), limit=400))
+    out = exc.value.value
+    assert out["fallback_chunks"] == 1
+    types = {e["type"] for e in out["entities"]}
+    assert {"Organization", "Date", "Money"} <= types
+    # Failures are not cached: the next run asks NLU again for that chunk
+    calls.clear()
+    asyncio.run(chunked_nlu(TEXT, fake_nlu(calls), limit=400))
+    assert len(calls) == 1
+
+def test_no_successful_chunk_degrades_to_empty():
+    with pytest.raises(Degraded) as exc:
+        asyncio.run(chunked_nlu(TEXT, fake_nlu([], lambda chunk: True), limit=400))
+    assert exc.value.value == {}
+    assert asyncio.run(chunked_nlu("", fake_nlu([]))) == {}
+
+class SmallReads(SpooledUpload):
+    # Chunk text that spans many reads from the spooled file
+    def chunks(self, chunk_size: int = 97):
+        return super().chunks(chunk_size)
+
+def spooled(text: str) -> SpooledUpload:
+    raw = text.encode("utf-8")
+    return SmallReads("digest", len(raw), io.BytesIO(raw))
+
+def test_streamed_chunks_match_in_memory_chunks():
+    text = (TEXT + " ఈ ఒప్పందం రెండు పక్షాల మధ్య కుదిరింది. " + "word " * 3000) * 8
+    assert list(stream_nlu_chunks(spooled(text), limit=400)) == nlu_chunks(text, limit=400)
+
+def test_streamed_nlu_matches_chunked_nlu(monkeypatch):
+    failing = lambda chunk: "clause 7." in chunk
+    with pytest.raises(Degraded) as expected:
+        asyncio.run(chunked_nlu(TEXT, fake_nlu([], failing), limit=400))
+    monkeypatch.setattr(nlu, "ANALYSIS_CACHE", AnalysisCache(max_entries=256, ttl=0))
+    with pytest.raises(Degraded) as streamed:
+        asyncio.run(streamed_nlu(spooled(TEXT), fake_nlu([], failing), limit=400, concurrency=3))
+    assert streamed.value.value == expected.value.value
+    assert asyncio.run(streamed_nlu(spooled(""), fake_nlu([]))) == {}
+
+def test_large_uploads_use_chunked_nlu(monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    calls = []
+    monkeypatch.setattr(main, "LARGE_DOC_BYTES", 1024)
+    monkeypatch.setattr(main.IBM, "nlu_ready", lambda: True)
+    monkeypatch.setattr(main.IBM, "nlu_entities", fake_nlu(calls))
+    text = f"Ref {uuid.uuid4().hex}. " + TEXT
+    out = TestClient(main.app).post("/analyze", files={"file": ("big.txt", text.encode(), "text/plain")}).json()
+    assert out["streamed"] and out["uses_watson_nlu"] and "nlu" not in out["degraded"]
+    assert calls and out["entities"]["entities"][0]["text"] == "Acme Corp"
@@ -0,0 +1,88 @@
+import asyncio
+import random
+
+import pytest
+
+from backend.collab_manager import CollabManager
+from backend.ot import apply_ops, replace_ops, transform, validate
+from backend.pubsub import InProcessPubSub
+from tests.test_collab import FakeWS, settle
+
+def random_ops(rng, text, n):
+    ops, length = [], len(text)
+    for _ in range(n):
+        if length and rng.random() < 0.5:
+            pos = rng.randrange(length)
+            size = rng.randint(1, min(5, length - pos))
+            ops.append({"op": "delete", "pos": pos, "len": size})
+            length -= size
+        else:
+            word = rng.choice(["a", "xy", "clause ", "!"])
+            ops.append({"op": "insert", "pos": rng.randint(0, length), "text": word})
+            length += len(word)
+    return ops
+
+def test_concurrent_edits_converge():
+    rng = random.Random(11)
+    for _ in range(2000):
+        base = "".join(rng.choice("abcdef ") for _ in range(rng.randint(0, 20)))
+        a, b = random_ops(rng, base, rng.randint(1, 3)), random_ops(rng, base, rng.randint(1, 3))
+        a2, b2 = transform(a, b, a_first=True)
+        assert apply_ops(apply_ops(base, b), a2) == apply_ops(apply_ops(base, a), b2), (base, a, b)
+
+def test_inserts_at_the_same_spot_are_ordered_by_tie_break():
+    a = [{"op": "insert", "pos": 2, "text": "A"}]
+    b = [{"op": "insert", "pos": 2, "text": "B"}]
+    a2, b2 = transform(a, b, a_first=True)
+    assert apply_ops(apply_ops("xxxx", b), a2) == "xxABxx" == apply_ops(apply_ops("xxxx", a), b2)
+
+def test_replace_ops_is_minimal():
+    ops = replace_ops("The rent is 2,000 per month.", "The rent is 2,500 per month.")
+    assert ops == [{"op": "delete", "pos": 14, "len": 1}, {"op": "insert", "pos": 14, "text": "5"}]
+    assert apply_ops("abc", replace_ops("abc", "")) == "" and replace_ops("same", "same") == []
+
+@pytest.mark.parametrize("ops", [
+    [{"op": "insert", "pos": 9, "text": "x"}],
+    [{"op": "delete", "pos": 2, "len": 5}],
+    [{"op": "insert", "pos": 0}],
+    [{"op": "move", "pos": 0}],
+    [{"op": "insert", "pos": "0", "text": "x"}],
+])
+def test_validate_rejects_malformed_ops(ops):
+    with pytest.raises(ValueError):
+        validate(ops, 4)
+
+def test_server_rebases_late_ops_and_clients_replay_the_log():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        ws_a, ws_b = FakeWS(), FakeWS()
+        a = await collab.join("r", ws_a)
+        b = await collab.join("r", ws_b)
+        await collab.update_document("r", "The term is one year.", a.id)
+        # Both clients edit revision 1 without seeing each other's change
+        await collab.apply_ops("r", a.id, 1, [{"op": "insert", "pos": 0, "text": "Clause 1. "}])
+        await collab.apply_ops("r", b.id, 1, [{"op": "delete", "pos": 12, "len": 3}, {"op": "insert", "pos": 12, "text": "two"}])
+        await asyncio.sleep(0.1) # one broadcast per tick
+        await settle()
+        room = collab.rooms["r"]
+        assert room.state["document"] == "Clause 1. The term is two year." and room.rev == 3
+        # A client replaying the broadcast entries from its join state reaches the same text
+        text, rev = "", 0
+        for message in ws_b.sent:
+            if message["type"] == "ops" and message["payload"]["from_rev"] == rev:
+                for entry in message["payload"]["entries"]:
+                    text, rev = apply_ops(text, entry["ops"]), entry["rev"]
+        assert (text, rev) == (room.state["document"], room.rev)
+    asyncio.run(scenario())
+
+def test_ops_against_an_unknown_revision_get_a_resync():
+    async def scenario():
+        collab = CollabManager(None, InProcessPubSub())
+        ws = FakeWS()
+        conn = await collab.join("r", ws)
+        await collab.apply_ops("r", conn.id, 7, [{"op": "insert", "pos": 0, "text": "x"}])
+        await collab.apply_ops("r", conn.id, 0, [{"op": "delete", "pos": 0, "len": 1}])
+        await settle()
+        assert [m["type"] for m in ws.sent] == ["state", "resync"] # the second resync replaced the first in the queue
+        assert collab.rooms["r"].state["document"] == "" and collab.rooms["r"].rev == 0
+    asyncio.run(scenario())
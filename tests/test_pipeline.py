@@ -0,0 +1,116 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from backend.cache import ANALYSIS_CACHE, MISSING
+from backend.nlu import chunked_nlu
+from backend.pipeline import DEFAULT_DEADLINES, Degraded, run_stage, stage_deadline
+from backend.summarize import map_reduce_summary
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_stage_value_and_timing():
+    res = run(run_stage("risks", lambda x: x * 2, 21))
+    assert (res.value, res.degraded, res.reason) == (42, False, None)
+    assert res.elapsed >= 0
+
+@pytest.mark.parametrize("stage", ["language", "contract_type", "clauses", "summary", "nlu", "risk_hits", "alerts", "simplify:3", "answer"])
+def test_every_analyze_stage_has_its_own_deadline(stage):
+    # Stage names as /analyze and /ask pass them; an unknown name silently gets the 10 s default
+    assert stage.split(":")[0] in DEFAULT_DEADLINES
+
+def test_risk_stage_deadline(monkeypatch):
+    assert stage_deadline("risk_hits") == 5.0
+    monkeypatch.setenv("CLAUSEWISE_DEADLINE_RISK_HITS", "0.5")
+    assert stage_deadline("risk_hits") == 0.5
+
+def test_deadline_returns_the_fallback():
+    def slow():
+        time.sleep(0.3)
+        return "late"
+    start = time.perf_counter()
+    res = run(run_stage("summary", slow, fallback=lambda: "local", deadline=0.05))
+    assert (res.value, res.degraded, res.reason) == ("local", True, "timeout")
+    assert time.perf_counter() - start < 0.25
+
+def test_errors_return_the_fallback():
+    async def broken():
+        raise ValueError("boom")
+    res = run(run_stage("nlu", broken, fallback=lambda: {}))
+    assert (res.value, res.degraded, res.reason) == ({}, True, "error: ValueError")
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_stage_can_report_its_own_fallback(sync):
+    def local():
+        raise Degraded("extract", "granite unavailable")
+
+    async def remote():
+        raise Degraded("extract", "granite unavailable")
+    res = run(run_stage("summary", local if sync else remote, fallback=lambda: "unused"))
+    assert (res.value, res.degraded, res.reason) == ("extract", True, "fallback: granite unavailable")
+
+def test_cached_stage_skips_degraded_values():
+    from backend.main import cached_stage
+    digest = uuid.uuid4().hex
+    calls = []
+
+    async def flaky(ok):
+        calls.append(ok)
+        if not ok:
+            raise Degraded("fallback")
+        return "real"
+
+    res = run(cached_stage(digest, "summary", flaky, False))
+    assert res.degraded and res.value == "fallback"
+    assert ANALYSIS_CACHE.get(digest, "summary") is MISSING
+    res = run(cached_stage(digest, "summary", flaky, True))
+    assert not res.degraded and ANALYSIS_CACHE.get(digest, "summary") == "real"
+    res = run(cached_stage(digest, "summary", flaky, False))
+    assert res.value == "real" and calls == [False, True]
+
+def test_summary_without_granite_is_not_cached():
+    from backend.main import IBM, cached_stage, summarise
+    from backend.utils import DocumentIndex
+    assert not IBM.wx_available()
+    digest = uuid.uuid4().hex
+    index = DocumentIndex("The supplier shall deliver the goods. The buyer shall pay within 30 days.")
+    res = run(cached_stage(digest, "summary", summarise, index))
+    assert res.degraded and res.reason == "fallback: granite unavailable" and res.value
+    assert ANALYSIS_CACHE.get(digest, "summary") is MISSING
+
+def test_map_reduce_summary_degrades_when_a_chunk_fails():
+    clauses = [f"Clause {i}. " + "The supplier shall deliver goods on time. " * 40 for i in range(6)]
+
+    async def generate(prompt, text):
+        return None if "Clause 3." in text else "- bullet"
+
+    with pytest.raises(Degraded) as exc:
+        run(map_reduce_summary(clauses, generate, limit=2000))
+    assert exc.value.value and "failed" in exc.value.reason
+
+    async def healthy(prompt, text):
+        return f"- {len(text)}"
+    assert run(map_reduce_summary(clauses, healthy, limit=2000))
+
+def test_chunked_nlu_degrades_on_failed_chunks():
+    # unique text: chunk results are cached by content
+    text = uuid.uuid4().hex + "\n".join(f"\n{i}. \nPayment of USD {i},000 is due on 01/0{i % 9 + 1}/2030." for i in range(1, 40))
+
+    async def partial(chunk):
+        if "USD 5,000" in chunk:
+            return {}
+        return {"entities": [{"type": "Party", "text": "Supplier", "relevance": 0.5, "mentions": [{"text": "x", "location": [0, 1]}]}],
+                "keywords": []}
+
+    with pytest.raises(Degraded) as exc:
+        run(chunked_nlu(text, partial, limit=300))
+    assert exc.value.value["fallback_chunks"] == 1
+
+    async def down(chunk):
+        return {}
+    with pytest.raises(Degraded) as exc:
+        run(chunked_nlu(uuid.uuid4().hex + text, down, limit=300))
+    assert exc.value.value == {}
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import httpx
+
+from backend.ibm_async import NLU_STAGES, WX_STAGES, AsyncIBMProviders
+from backend.ibm_clients import GenerationCache
+from backend.pipeline import stage_deadline
+from backend.resilience import CircuitBreaker, TokenBucket
+
+def providers(handler, failures: int = 2, reset: float = 30.0) -> AsyncIBMProviders:
+    # Configured provider whose HTTP client answers from handler; memory-only generation cache
+    p = AsyncIBMProviders()
+    p.wx_apikey, p.wx_project, p.wx_url = "key", "project", "http://wx.test"
+    p.iam_url = "http://wx.test/identity/token"
+    p.gen_cache = GenerationCache()
+    p.wx_breaker = CircuitBreaker(failures, reset)
+    p.wx_bucket = TokenBucket(1000.0, 1000.0)
+
+    async def route(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/identity/token":
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 3600})
+        return await handler(request)
+
+    p._client = httpx.AsyncClient(transport=httpx.MockTransport(route))
+    p._client_loop = asyncio.get_running_loop()
+    return p
+
+def generated(text: str) -> httpx.Response:
+    return httpx.Response(200, json={"results": [{"generated_text": text}]})
+
+async def hang(request):
+    await asyncio.sleep(30)
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() # the single half-open trial
+    assert breaker.state == "half_open" and not breaker.allow()
+    breaker.record_failure() # trial failed: open again
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+def test_breaker_release_frees_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+def test_token_bucket_queues_and_rejects():
+    async def main():
+        bucket = TokenBucket(rate=100.0, capacity=2.0)
+        assert await bucket.acquire() and await bucket.acquire()
+        start = time.perf_counter()
+        assert await bucket.acquire(max_wait=1.0)
+        assert time.perf_counter() - start >= 0.005
+        assert not await TokenBucket(rate=1.0, capacity=1.0).acquire(n=5.0, max_wait=0.1)
+    asyncio.run(main())
+
+def test_service_errors_open_the_breaker_and_client_errors_do_not():
+    async def main():
+        async def bad_request(request):
+            return httpx.Response(400, json={"error": "bad"})
+        p = providers(bad_request)
+        assert await p.generate("sys", "a") is None
+        assert await p.generate("sys", "b") is None
+        assert p.wx_breaker.state == "closed"
+
+        async def unavailable(request):
+            return httpx.Response(503)
+        p = providers(unavailable)
+        assert await p.generate("sys", "a") is None
+        assert await p.generate("sys", "b") is None
+        assert p.wx_breaker.state == "open"
+        assert await p.generate("sys", "c") is None # short-circuited, not sent
+        assert p.counters["wx_calls"] == 2
+    asyncio.run(main())
+
+def test_calls_cancelled_by_the_stage_deadline_count_as_failures():
+    async def main():
+        p = providers(hang)
+        for i in range(2):
+            try:
+                await asyncio.wait_for(p.generate("sys", f"slow {i}"), 0.05)
+            except asyncio.TimeoutError:
+                pass
+        assert p.wx_breaker.state == "open"
+        assert await p.generate("sys", "next") is None
+        assert p.counters["wx_calls"] == 2
+    asyncio.run(main())
+
+def test_cancelled_half_open_trial_does_not_wedge_the_breaker():
+    async def main():
+        answer = {"hang": True}
+
+        async def handler(request):
+            if answer["hang"]:
+                await asyncio.sleep(30)
+            return generated("- ok")
+
+        p = providers(handler, failures=1, reset=0.05)
+        p.wx_breaker.record_failure()
+        await asyncio.sleep(0.06)
+        try:
+            await asyncio.wait_for(p.generate("sys", "trial"), 0.05) # half-open trial, cancelled
+        except asyncio.TimeoutError:
+            pass
+        assert p.wx_breaker.state == "open" and not p.wx_breaker.trial_in_flight
+        answer["hang"] = False
+        await asyncio.sleep(0.06)
+        assert await p.generate("sys", "retry") == "- ok"
+        assert p.wx_breaker.state == "closed"
+    asyncio.run(main())
+
+def test_default_timeouts_fit_inside_stage_deadlines():
+    p = AsyncIBMProviders()
+    assert p.wx_timeout + p.max_queue_wait < min(stage_deadline(s) for s in WX_STAGES)
+    assert p.nlu_timeout + p.max_queue_wait < min(stage_deadline(s) for s in NLU_STAGES)
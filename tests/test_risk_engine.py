@@ -0,0 +1,79 @@
+import json
+import re
+
+from backend.risk_engine import BUILTIN_RULES, RiskEngine, RiskRule, get_engine
+from backend.utils import DocumentIndex, detect_risks, risk_hits
+from benchmarks.corpus import ContractSpec, generate_contract
+
+# detect_risks before the combined engine: one search per rule, labels in rule order
+LEGACY_PATTERNS = [
+    (re.compile(r"auto[-\s]?renew|automatic renewal", re.I), "Auto-renewal present"),
+    (re.compile(r"indemnif(y|ies|ication)\b", re.I), "Broad indemnity risk"),
+    (re.compile(r"exclusive jurisdiction|venue\b", re.I), "Exclusive venue/jurisdiction"),
+    (re.compile(r"unlimited liability|liability.*(unlimited|without limit)", re.I), "Uncapped liability"),
+    (re.compile(r"non[-\s]?compete|restraint of trade", re.I), "Non-compete restriction"),
+]
+
+FIXTURES = [
+    "Liability for indemnification claims shall be unlimited.",
+    "liability under the non-compete is without limit",
+    "This Agreement shall auto-renew unless terminated in writing.",
+    "The courts of Delhi have exclusive jurisdiction; venue is New Delhi.",
+    "The Supplier shall indemnify the Client. Unlimited liability applies to the non compete.",
+    "Automatic renewal and restraint of trade: indemnification of exclusive jurisdiction claims.",
+    "Liability is capped at the fees paid. The parties agree to a venue in Mumbai.",
+    "The supplier indemnifies the buyer.\nLiability\nis unlimited.",
+    "Nothing here is risky at all.",
+    "",
+]
+
+def legacy_labels(text):
+    return [label for pattern, label in LEGACY_PATTERNS if pattern.search(text)]
+
+def per_rule_hits(rules, text):
+    # What each rule finds on its own: non-overlapping finditer() per rule
+    out = []
+    for rule in rules:
+        flags = "".join(f for f in rule.flags if f in "imsx")
+        body = f"(?{flags}:{rule.pattern})" if flags else rule.pattern
+        pattern = re.compile((r"\b" if rule.word_start else "") + body)
+        out.extend((m.start(), m.end(), rule.id) for m in pattern.finditer(text))
+    return sorted(out)
+
+def engine_hits(engine, text):
+    return sorted((h["start"], h["end"], h["rule"]) for h in engine.scan(text))
+
+def test_labels_match_legacy_detect_risks():
+    for text in FIXTURES:
+        assert detect_risks(text) == legacy_labels(text), text
+
+def test_overlapping_hits_are_all_reported():
+    assert detect_risks("Liability for indemnification claims shall be unlimited.") == ["Broad indemnity risk", "Uncapped liability"]
+    assert detect_risks("liability under the non-compete is without limit") == ["Uncapped liability", "Non-compete restriction"]
+
+def test_hits_match_per_rule_scans():
+    engine = get_engine([])
+    for text in FIXTURES:
+        assert engine_hits(engine, text) == per_rule_hits(BUILTIN_RULES, text), text
+    text = generate_contract(ContractSpec("en", 1 << 16, seed=5, risk_rate=0.3))
+    assert engine_hits(engine, text) == per_rule_hits(BUILTIN_RULES, text)
+
+def test_hits_match_without_hoisting():
+    # One rule without a word start disables the hoisted \b
+    rules = list(BUILTIN_RULES) + [RiskRule("fee", "Fee mentioned", r"fee", "low", word_start=False),
+                                   RiskRule("liab", "Liability mentioned", r"liab", "low")]
+    engine = RiskEngine(rules)
+    for text in FIXTURES + ["Coffee fees: liability without limit, feefee."]:
+        assert engine_hits(engine, text) == per_rule_hits(rules, text), text
+
+def test_hits_carry_clause_index():
+    text = "\n1. \nThe supplier shall indemnify the client.\n2. \nThis agreement will auto-renew yearly.\n"
+    hits = risk_hits(DocumentIndex(text))
+    assert [(h["rule"], h["clause"]) for h in hits] == [("indemnity", 0), ("auto-renewal", 1)]
+    assert all(text[h["start"]:h["end"]] == h["match"] for h in hits)
+
+def test_rule_pack_adds_rules(tmp_path):
+    pack = tmp_path / "pack.json"
+    pack.write_text(json.dumps({"rules": [{"id": "penalty", "label": "Penalty clause", "pattern": r"penalt(?:y|ies)", "severity": "high"}]}))
+    labels = detect_risks("Unlimited liability and penalties apply.", packs=[str(pack)])
+    assert labels == ["Uncapped liability", "Penalty clause"]
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+import time
+
+from backend.collab_manager import ClientConn, CollabManager, RoomMetrics, encode
+from backend.pubsub import InProcessPubSub
+from backend.room_store import RoomStore
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=None):
+        pass
+
+def test_database_is_created_on_first_use(tmp_path):
+    path = tmp_path / "data" / "rooms.db"
+    store = RoomStore(str(path))
+    assert not path.exists()
+    assert store.load("r", 10) is None
+    assert path.exists()
+
+def test_writes_do_not_wait_for_the_database(tmp_path):
+    store = RoomStore(str(tmp_path / "rooms.db"))
+    entry = {"rev": 1, "client": "c", "ops": [{"op": "insert", "pos": 0, "text": "hi"}]}
+    with store._lock: # a slow commit in progress
+        start = time.perf_counter()
+        store.append_op("r", 10, entry)
+        store.append_chat("r", 11, {"user": "a", "text": "hello"}, 200)
+        assert time.perf_counter() - start < 0.5
+    saved = store.load("r", 200)
+    assert saved["log"] == [entry]
+    assert saved["chat"] == [{"user": "a", "text": "hello"}]
+    assert saved["seq"] == 11
+    store.close()
+
+def test_snapshot_replaces_the_log_and_never_goes_backwards(tmp_path):
+    store = RoomStore(str(tmp_path / "rooms.db"))
+    for rev in (1, 2, 3):
+        store.append_op("r", rev, {"rev": rev, "client": "c", "ops": []})
+    store.save_snapshot("r", 2, 2, "two")
+    store.save_snapshot("r", 1, 1, "one")
+    saved = store.load("r", 200)
+    assert saved["document"] == "two" and [e["rev"] for e in saved["log"]] == [3]
+    store.close()
+
+def test_queued_writes_commit_from_one_thread(tmp_path):
+    store = RoomStore(str(tmp_path / "rooms.db"))
+    threads = set()
+    with store._lock:
+        store._db().set_trace_callback(lambda sql: threads.add(threading.get_ident()))
+    for i in range(50):
+        store.append_chat("r", i, {"user": "a", "text": str(i)}, 10)
+    store.flush()
+    assert len(threads) == 1 and threading.get_ident() not in threads
+    assert [c["text"] for c in store.load("r", 10)["chat"]] == [str(i) for i in range(40, 50)]
+    store.close()
+
+def test_rooms_survive_eviction(tmp_path):
+    async def scenario():
+        store = RoomStore(str(tmp_path / "rooms.db"))
+        collab = CollabManager(store, InProcessPubSub())
+        await collab.start()
+        ws = FakeWS()
+        conn = await collab.join("r", ws)
+        await collab.apply_ops("r", conn.id, 0, [{"op": "insert", "pos": 0, "text": "hello"}])
+        await collab.add_chat("r", "ann", "looks good")
+        await collab.leave("r", ws)
+        assert collab.evict_idle(now=time.monotonic() + 10 ** 6) == 1
+        await asyncio.to_thread(store.flush)
+        other = CollabManager(RoomStore(str(tmp_path / "rooms.db")), InProcessPubSub())
+        room = await other.room("r")
+        assert room.state["document"] == "hello" and list(room.state["chat"]) == [{"user": "ann", "text": "looks good"}]
+        await collab.close()
+    asyncio.run(scenario())
+
+def test_only_the_newest_resync_stays_queued():
+    async def scenario():
+        conn = ClientConn(FakeWS(), RoomMetrics(), lambda c: None)
+        conn.close() # stop the writer; offer() on a closed conn is refused, so reopen the flag
+        conn.closed = False
+        conn.offer("ops", encode({"type": "ops"}))
+        conn.offer("resync", encode({"type": "resync", "payload": 1}))
+        conn.offer("resync", encode({"type": "resync", "payload": 2}))
+        assert [json.loads(p).get("payload") for _, p in conn.queue] == [None, 2]
+        assert conn.metrics.coalesced == 1
+    asyncio.run(scenario())
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+import backend.summarize as summarize
+from backend.pipeline import Degraded
+from backend.summarize import map_reduce_summary, summary_chunks
+
+def clause(i: int, sentences: int = 30) -> str:
+    return f"\n{i}. \n" + " ".join(f"The supplier shall deliver lot {i}-{j} within {j} days." for j in range(sentences))
+
+def recording(monkeypatch, module, name, threads):
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(module, name, wrapper)
+
+def test_chunks_keep_clauses_whole_and_respect_the_limit():
+    clauses = [clause(i, 8) for i in range(40)]
+    chunks = summary_chunks(clauses, limit=2000)
+    assert all(len(c) <= 2000 for c in chunks)
+    assert "\n\n".join(chunks).replace("\n\n", "") == "".join(clauses)
+
+def test_editing_one_clause_changes_few_chunks():
+    clauses = [clause(i, 8) for i in range(60)]
+    before = set(summary_chunks(clauses, limit=2000))
+    clauses[30] = clause(30, 8).replace("supplier", "vendor")
+    after = set(summary_chunks(clauses, limit=2000))
+    assert len(after - before) <= 2
+
+def test_partial_summaries_are_cached():
+    clauses = [uuid.uuid4().hex + clause(i) for i in range(8)]
+    calls = []
+
+    async def generate(prompt, text):
+        calls.append(prompt)
+        return f"- summary of {len(text)} chars"
+    first = asyncio.run(map_reduce_summary(clauses, generate, limit=3000))
+    n = len(calls)
+    assert asyncio.run(map_reduce_summary(clauses, generate, limit=3000)) == first
+    assert len(calls) == n
+
+def test_local_work_runs_on_the_stage_pool(monkeypatch):
+    threads = []
+    recording(monkeypatch, summarize, "summary_chunks", threads)
+    recording(monkeypatch, summarize, "summarize_extract", threads)
+
+    async def failing(prompt, text):
+        return None
+    with pytest.raises(Degraded):
+        asyncio.run(map_reduce_summary([uuid.uuid4().hex + clause(i) for i in range(6)], failing, limit=3000))
+    assert threads and all(name.startswith("clausewise-stage") for name in threads)
+
+def test_summarise_fallback_runs_on_the_stage_pool(monkeypatch):
+    import backend.main as main
+    from backend.utils import DocumentIndex
+    threads = []
+    recording(monkeypatch, main, "summarize_extract", threads)
+    with pytest.raises(Degraded):
+        asyncio.run(main.summarise(DocumentIndex("".join(clause(i) for i in range(5)))))
+    assert threads and all(name.startswith("clausewise-stage") for name in threads)
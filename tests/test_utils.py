@@ -0,0 +1,96 @@
+import pytest
+
+import backend.utils as utils
+from backend.utils import (
+    DocumentIndex, detect_language, detect_risks, extract_clauses, find_entities_regex, keyword_qa, summarize_extract, upcoming_alerts,
+)
+from benchmarks.corpus import ContractSpec, generate_contract
+
+TEXT = generate_contract(ContractSpec("en", 16 << 10, seed=5))
+QUESTION = "When is the payment due and how much is the fee?"
+
+def test_analyzers_answer_the_same_from_text_or_index():
+    index = DocumentIndex(TEXT)
+    assert extract_clauses(index) == extract_clauses(TEXT)
+    assert summarize_extract(index, 6) == summarize_extract(TEXT, 6)
+    assert keyword_qa(index, QUESTION) == keyword_qa(TEXT, QUESTION)
+    assert find_entities_regex(index) == find_entities_regex(TEXT)
+    assert detect_risks(index) == detect_risks(TEXT)
+    assert upcoming_alerts(index) == upcoming_alerts(TEXT)
+
+def test_shared_index_tokenizes_once(monkeypatch):
+    calls = []
+    tokenize = utils.sentence_tokenize
+    monkeypatch.setattr(utils, "sentence_tokenize", lambda text: calls.append(1) or tokenize(text))
+    index = DocumentIndex(TEXT)
+    summarize_extract(index, 6)
+    keyword_qa(index, QUESTION)
+    keyword_qa(index, "Who may terminate?")
+    assert calls == [1]
+    assert index.tokens is index.tokens and index.tf is index.tf
+
+def test_has_language_does_not_detect():
+    index = DocumentIndex(TEXT)
+    assert not index.has_language
+    assert index.lang == "en" and index.has_language
+    assert DocumentIndex(TEXT, lang="hi").has_language
+
+def test_language_change_resets_term_statistics():
+    index = DocumentIndex("The parties shall keep the information confidential.\n1. \nThe tenant pays the rent.\n")
+    index.lang = "en"
+    tf_en, terms_en = index.tf, index.clause_terms
+    assert "the" not in tf_en and "parties" in tf_en
+    index.lang = "hi" # English stopwords no longer apply
+    assert index.tf is not tf_en and "the" in index.tf
+    assert index.clause_terms is not terms_en and any("the" in t for t in index.clause_terms)
+
+def test_clause_views_line_up():
+    index = DocumentIndex(TEXT)
+    assert index.clauses() == [TEXT[s:e] for s, e in index.clause_spans]
+    assert len(index.clause_tokens) == len(index.clause_terms) == len(index.clause_spans)
+    for tokens, terms in zip(index.clause_tokens, index.clause_terms):
+        assert terms <= tokens and all(len(t) > 2 and t not in index.stop for t in terms)
+    for s, e, hit in index.dates:
+        assert TEXT[s:e] == hit
+
+HINDI = "यह अनुबंध दोनों पक्षों के बीच किया गया है और भुगतान तीस दिनों के भीतर किया जाएगा। "
+TELUGU = "ఈ ఒప్పందం రెండు పక్షాల మధ్య కుదిరింది మరియు చెల్లింపు ముప్పై రోజులలో చేయబడుతుంది. "
+SPANISH = "El arrendatario pagará la renta mensual dentro de los primeros cinco días de cada mes. "
+
+@pytest.fixture
+def langdetect_calls(monkeypatch):
+    calls = []
+    utils._detect_sample.cache_clear()
+    monkeypatch.setattr(utils, "detect", lambda sample: calls.append(sample) or "es")
+    yield calls
+    utils._detect_sample.cache_clear()
+
+def test_scripts_and_english_are_detected_without_langdetect(langdetect_calls):
+    assert detect_language(HINDI * 3) == "hi"
+    assert detect_language(TELUGU * 3) == "te"
+    assert detect_language("Clause 2.1 (the " + HINDI + ") " + TELUGU * 2) == "te"
+    assert detect_language(TEXT) == "en"
+    assert detect_language("12/05/2030 - 4,500.00") == "en" # no letters at all
+    assert langdetect_calls == []
+
+def test_other_latin_text_goes_to_langdetect_on_a_short_sample(langdetect_calls):
+    assert detect_language(SPANISH * 200) == "es"
+    [sample] = langdetect_calls
+    assert len(sample) == utils.LANGDETECT_SAMPLE_CHARS
+
+def test_language_is_sampled_from_start_middle_and_end(langdetect_calls):
+    # A Hindi cover page does not make an English contract Hindi
+    text = HINDI * 5 + TEXT
+    sample = utils._language_sample(text)
+    assert len(sample) <= utils.LANG_SAMPLE_CHARS + 2 and sample.startswith(HINDI) and sample.endswith(TEXT[-100:])
+    assert detect_language(text) == "en"
+
+def test_langdetect_failures_fall_back_to_english(monkeypatch):
+    utils._detect_sample.cache_clear()
+    def fail(sample):
+        raise ValueError("no features in text")
+    monkeypatch.setattr(utils, "detect", fail)
+    try:
+        assert detect_language(SPANISH) == "en"
+    finally:
+        utils._detect_sample.cache_clear()